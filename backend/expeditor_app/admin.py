@@ -5,8 +5,10 @@ from django.utils import timezone
 from .models import (
     Projects, CheckDetail, Sklad, City, Ekispiditor, Check, Filial, ProblemCheck, IntegrationEndpoint,
     ScheduledTask, EmailRecipient, TaskRun, TaskList, EmailConfig, TelegramAccount, CheckAnalytics, YandexToken,
-    UserSession, UserActivity,
+    UserSession, UserActivity, ExpeditorDailyKPI, CheckMonthlyRollup, AnalysisWatermark,
+    DirtyPartition, CheckAnalyticsMember, ProfileRun,
 )
+from .kpi import annotate_expeditor_kpis
 
 @admin.register(Projects)
 class ProjectsAdmin(admin.ModelAdmin):
@@ -49,6 +51,10 @@ class EkispiditorAdmin(admin.ModelAdmin):
     list_filter = ['filial','is_active', 'created_at']
     readonly_fields = ['today_checks_count']
 
+    def get_queryset(self, request):
+        # today_checks_count from one KPI subquery instead of a COUNT per row
+        return annotate_expeditor_kpis(super().get_queryset(request))
+
 @admin.register(Check)
 class CheckAdmin(admin.ModelAdmin):
     list_display = ['check_id', 'ekispiditor', 'project', 'city', 'status', 'yetkazilgan_vaqti']
@@ -500,15 +506,15 @@ class UserActivityAdmin(admin.ModelAdmin):
 @admin.register(CheckAnalytics)
 class CheckAnalyticsAdmin(admin.ModelAdmin):
     list_display = ['time_window_display', 'total_checks', 'unique_expiditors', 'most_active_expiditor', 'most_active_count', 'analysis_date']
-    list_filter = ['analysis_date', 'window_duration_minutes', 'radius_meters']
+    list_filter = ['analysis_date', 'window_duration_minutes', 'radius_meters', 'window_mode']
     search_fields = ['most_active_expiditor']
-    readonly_fields = ['created_at', 'updated_at', 'time_window_display', 'area_display', 'analysis_date']
+    readonly_fields = ['created_at', 'updated_at', 'time_window_display', 'area_display', 'analysis_date', 'fingerprint']
     ordering = ['-analysis_date', '-window_start']
     exclude = ['analysis_date']  # Exclude from form since it's auto-generated
     
     fieldsets = (
         ('Time Window', {
-            'fields': ('window_start', 'window_end', 'window_duration_minutes', 'time_window_display')
+            'fields': ('window_start', 'window_end', 'window_duration_minutes', 'window_mode', 'time_window_display')
         }),
         ('Geographic Area', {
             'fields': ('center_lat', 'center_lon', 'radius_meters', 'area_display')
@@ -522,12 +528,62 @@ class CheckAnalyticsAdmin(admin.ModelAdmin):
             'description': 'Raw check IDs and details stored during analysis'
         }),
         ('Metadata', {
-            'fields': ('created_at', 'updated_at'),
+            'fields': ('fingerprint', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
 
 
+@admin.register(CheckAnalyticsMember)
+class CheckAnalyticsMemberAdmin(admin.ModelAdmin):
+    list_display = ['analytics', 'check_ref', 'position', 'role']
+    list_filter = ['role']
+    search_fields = ['check_ref__check_id']
+    raw_id_fields = ['analytics', 'check_ref']
+    list_select_related = ['analytics', 'check_ref']
+
+
+@admin.register(AnalysisWatermark)
+class AnalysisWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['key', 'processed_until', 'updated_at']
+    search_fields = ['key']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(DirtyPartition)
+class DirtyPartitionAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'date', 'ekispiditor', 'cell_lat', 'cell_lon', 'created_at']
+    list_filter = ['kind', 'date']
+    search_fields = ['ekispiditor']
+    readonly_fields = ['created_at']
+
+
+@admin.register(ProfileRun)
+class ProfileRunAdmin(admin.ModelAdmin):
+    list_display = ['user', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['created_at']
+
+
+@admin.register(ExpeditorDailyKPI)
+class ExpeditorDailyKPIAdmin(admin.ModelAdmin):
+    list_display = ['ekispiditor', 'date', 'checks_count', 'delivered_count', 'total_sum', 'violation_count', 'distance_km', 'updated_at']
+    list_filter = ['date']
+    search_fields = ['ekispiditor__ekispiditor_name']
+    list_select_related = ['ekispiditor']
+    readonly_fields = ['updated_at']
+    ordering = ['-date', 'ekispiditor']
+
+
+@admin.register(CheckMonthlyRollup)
+class CheckMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['month', 'ekispiditor', 'project', 'sklad', 'city', 'status', 'checks_count', 'total_sum', 'updated_at']
+    list_filter = ['month', 'status']
+    search_fields = ['ekispiditor__ekispiditor_name', 'project__project_name']
+    list_select_related = ['ekispiditor', 'project', 'sklad', 'city']
+    readonly_fields = ['updated_at']
+
+
 # CustomUserAdmin temporarily disabled
 # @admin.register(CustomUser)
 # class CustomUserAdmin(admin.ModelAdmin):
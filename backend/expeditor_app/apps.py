@@ -4,3 +4,6 @@ class ExpeditorAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'expeditor_app'
     verbose_name = 'Expeditor Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
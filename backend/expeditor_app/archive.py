@@ -0,0 +1,283 @@
+"""
+Cold archive for old checks (PostgreSQL).
+
+Checks and check details older than CHECK_ARCHIVE_AFTER_MONTHS are moved,
+one local month at a time, into tables of the same shape in the
+`archive` schema, so the hot tables and their indexes only hold the
+months the dashboards look at. For every archived month a set of
+CheckMonthlyRollup rows (counts and payment sums per expeditor, project,
+sklad, city and status) stays in the hot database.
+
+The views expeditor_app_check_all / expeditor_app_checkdetail_all union
+the hot and archive tables and back the read-only CheckAll /
+CheckDetailAll models. They are built from those models' fields after
+every migrate and dropped before it (signals), so migrations can alter
+the hot tables' columns and the views follow them. A check re-imported
+after its month was archived replaces its archived copy
+(drop_archived_copies), so each check_id is in the views once. Statistics queries whose range starts before the
+first hot month read those (check_models_for); everything else keeps
+using Check / CheckDetail. Once the hot tables are partitioned, the
+emptied month partitions are dropped.
+
+Moved rows leave the hot tables without post_delete signals, so the move
+writes their SyncTombstone rows itself: delta-sync clients drop archived
+checks and the conditional GET state of the check tables changes.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Check, CheckDetail, CheckAll, CheckDetailAll, CheckMonthlyRollup, SyncTombstone
+from .partitioning import (
+    PARTITION_KEYS, add_months, is_partitioned, month_boundary, month_start, partition_name,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = 'archive'
+BOUNDARY_CACHE_KEY = 'archive:boundary'
+BOUNDARY_TIMEOUT = 600
+
+# hot model -> union view model
+UNION_MODELS = {
+    Check: CheckAll,
+    CheckDetail: CheckDetailAll,
+}
+
+# hot model -> SyncTombstone.model_name of its moved rows
+TOMBSTONE_MODELS = {
+    Check: SyncTombstone.MODEL_CHECK,
+    CheckDetail: SyncTombstone.MODEL_CHECK_DETAIL,
+}
+
+
+def _q(name):
+    return connection.ops.quote_name(name)
+
+
+def _archive_table(model):
+    return f'{_q(ARCHIVE_SCHEMA)}.{_q(model._meta.db_table)}'
+
+
+def _columns(cursor, relation):
+    """(name, type) of the columns of a table, in order."""
+    cursor.execute(
+        """
+        SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+        """,
+        [relation],
+    )
+    return cursor.fetchall()
+
+
+def drop_union_views():
+    """Drop the union views, which would keep migrations from altering or
+    dropping the hot tables' columns; ensure_archive_tables recreates them."""
+    with connection.cursor() as cursor:
+        for union_model in UNION_MODELS.values():
+            cursor.execute(f'DROP VIEW IF EXISTS {_q(union_model._meta.db_table)}')
+
+
+def ensure_archive_tables():
+    """Create (or catch up) the archive tables and the union views.
+
+    Columns added to the hot tables are added to the archive tables and
+    changed types are changed there too; columns dropped from the hot
+    tables stay but become nullable. The views select the columns of
+    CheckAll / CheckDetailAll. Runs after every migrate; archive_month
+    calls it too.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {_q(ARCHIVE_SCHEMA)}')
+        for model, union_model in UNION_MODELS.items():
+            table = model._meta.db_table
+            archive = _archive_table(model)
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [table])
+            if not cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {archive} (LIKE {_q(table)}) WITH (fillfactor = 100)')
+
+            hot_columns = dict(_columns(cursor, table))
+            archived = dict(_columns(cursor, f'{ARCHIVE_SCHEMA}.{table}'))
+            for name, column_type in hot_columns.items():
+                if name not in archived:
+                    cursor.execute(f'ALTER TABLE {archive} ADD COLUMN {_q(name)} {column_type}')
+                elif archived[name] != column_type:
+                    cursor.execute(
+                        f'ALTER TABLE {archive} ALTER COLUMN {_q(name)} TYPE {column_type} '
+                        f'USING {_q(name)}::{column_type}'
+                    )
+            for name in archived.keys() - hot_columns.keys():
+                cursor.execute(f'ALTER TABLE {archive} ALTER COLUMN {_q(name)} DROP NOT NULL')
+
+            key = PARTITION_KEYS[model]
+            for columns in ([key], ['check_id']) + ((['ekispiditor_ref_id', key],) if model is Check else ()):
+                index = f"{table}_arch_{'_'.join(columns)}"[:63]
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {_q(index)} ON {archive} ({", ".join(_q(c) for c in columns)})'
+                )
+
+            columns = [field.column for field in union_model._meta.concrete_fields]
+            missing = [name for name in columns if name not in hot_columns]
+            if missing:
+                # The hot table is behind the models (migrating backwards)
+                logger.warning(f'Not creating {union_model._meta.db_table}: {table} has no {", ".join(missing)}')
+                continue
+            column_list = ', '.join(_q(name) for name in columns)
+            view = _q(union_model._meta.db_table)
+            cursor.execute(f'DROP VIEW IF EXISTS {view}')
+            cursor.execute(
+                f'CREATE VIEW {view} AS SELECT {column_list} FROM {_q(table)} '
+                f'UNION ALL SELECT {column_list} FROM {archive}'
+            )
+
+
+def archive_horizon():
+    """First month that stays in the hot tables."""
+    return add_months(month_start(timezone.localdate()), -settings.CHECK_ARCHIVE_AFTER_MONTHS)
+
+
+def archive_boundary():
+    """Start of the first month that was never archived, or None if
+    nothing has been archived yet."""
+    boundary = cache.get(BOUNDARY_CACHE_KEY)
+    if boundary is None:
+        last_month = CheckMonthlyRollup.objects.aggregate(last=Max('month'))['last']
+        boundary = month_boundary(add_months(last_month, 1)) if last_month else False
+        cache.set(BOUNDARY_CACHE_KEY, boundary, BOUNDARY_TIMEOUT)
+    return boundary or None
+
+
+def check_models_for(start):
+    """(check model, detail model) to query for a range starting at `start`
+    (an aware datetime, or None for an open range)."""
+    boundary = archive_boundary()
+    if boundary is None or (start is not None and start >= boundary):
+        return Check, CheckDetail
+    return CheckAll, CheckDetailAll
+
+
+def drop_archived_copies(check_ids):
+    """Delete the archived rows of checks that are in the hot tables again
+    (re-imported after their month was archived). Returns the number of
+    rows deleted."""
+    if connection.vendor != 'postgresql' or not check_ids:
+        return 0
+    deleted = 0
+    with connection.cursor() as cursor:
+        for model in UNION_MODELS:
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [f'{ARCHIVE_SCHEMA}.{model._meta.db_table}'])
+            if not cursor.fetchone()[0]:
+                continue
+            cursor.execute(
+                f'DELETE FROM {_archive_table(model)} a USING {_q(model._meta.db_table)} h '
+                f'WHERE a.check_id = h.check_id AND h.check_id = ANY(%s)',
+                [list(check_ids)],
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def _move_rows(cursor, model, start, end):
+    """Move the rows of [start, end) to the archive table, replacing
+    archived rows with the same check_id, and tombstone them, in one
+    statement. Returns the number of rows moved."""
+    table = model._meta.db_table
+    key = _q(PARTITION_KEYS[model])
+    column_list = ', '.join(_q(name) for name, _ in _columns(cursor, table))
+    archive = _archive_table(model)
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {_q(table)} WHERE {key} >= %s AND {key} < %s RETURNING {column_list}), '
+        f'replaced AS (DELETE FROM {archive} WHERE check_id IN (SELECT check_id FROM moved)), '
+        f'archived AS (INSERT INTO {archive} ({column_list}) SELECT {column_list} FROM moved), '
+        f'tombstoned AS (INSERT INTO {_q(SyncTombstone._meta.db_table)} (model_name, object_id, check_id, deleted_at) '
+        f'SELECT %s, id, check_id, now() FROM moved) '
+        f'SELECT count(*) FROM moved',
+        [start, end, TOMBSTONE_MODELS[model]],
+    )
+    return cursor.fetchone()[0]
+
+
+def _rebuild_rollup(cursor, month, start, end):
+    CheckMonthlyRollup.objects.filter(month=month).delete()
+    cursor.execute(
+        f"""
+        INSERT INTO {_q(CheckMonthlyRollup._meta.db_table)}
+            (month, ekispiditor_id, project_id, sklad_id, city_id, status, checks_count,
+             total_sum, nalichniy, uzcard, humo, click, updated_at)
+        SELECT %s, c.ekispiditor_ref_id, c.project_ref_id, c.sklad_ref_id, c.city_ref_id, c.status, count(*),
+               coalesce(sum(d.total_sum), 0), coalesce(sum(d.nalichniy), 0), coalesce(sum(d.uzcard), 0),
+               coalesce(sum(d.humo), 0), coalesce(sum(d.click), 0), now()
+        FROM {_q(CheckAll._meta.db_table)} c
+        LEFT JOIN {_q(CheckDetailAll._meta.db_table)} d ON d.check_id = c.check_id
+        WHERE c.yetkazilgan_vaqti >= %s AND c.yetkazilgan_vaqti < %s
+        GROUP BY c.ekispiditor_ref_id, c.project_ref_id, c.sklad_ref_id, c.city_ref_id, c.status
+        """,
+        [month, start, end],
+    )
+    return cursor.rowcount
+
+
+def _drop_empty_partition(cursor, model, month):
+    name = partition_name(model, month)
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    if not cursor.fetchone()[0]:
+        return
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {_q(name)})')
+    if cursor.fetchone()[0]:
+        return
+    cursor.execute(f'ALTER TABLE {_q(model._meta.db_table)} DETACH PARTITION {_q(name)}')
+    cursor.execute(f'DROP TABLE {_q(name)}')
+    logger.info(f'Dropped archived partition {name}')
+
+
+def archive_month(month):
+    """Move one month of checks and details to the archive and rebuild its
+    rollups, in one transaction. Returns (checks moved, details moved)."""
+    start, end = month_boundary(month), month_boundary(add_months(month, 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        checks_moved = _move_rows(cursor, Check, start, end)
+        details_moved = _move_rows(cursor, CheckDetail, start, end)
+        _rebuild_rollup(cursor, month, start, end)
+        for model in UNION_MODELS:
+            if is_partitioned(model):
+                _drop_empty_partition(cursor, model, month)
+    cache.delete(BOUNDARY_CACHE_KEY)
+    logger.info(f'Archived {month:%Y-%m}: {checks_moved} checks, {details_moved} details')
+    return checks_moved, details_moved
+
+
+def months_to_archive(horizon=None):
+    """Months before the horizon that still have rows in the hot tables."""
+    horizon = horizon or archive_horizon()
+    firsts = [
+        model.objects.filter(**{f'{key}__lt': month_boundary(horizon)}).aggregate(first=Min(key))['first']
+        for model, key in PARTITION_KEYS.items()
+    ]
+    firsts = [month_start(first) for first in firsts if first]
+    if not firsts:
+        return []
+    months = []
+    month = min(firsts)
+    while month < horizon:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def archive_old_checks(horizon=None):
+    """Archive every month before the horizon. Returns (checks, details) moved."""
+    ensure_archive_tables()
+    checks_total = details_total = 0
+    for month in months_to_archive(horizon):
+        checks_moved, details_moved = archive_month(month)
+        checks_total += checks_moved
+        details_total += details_moved
+    return checks_total, details_total
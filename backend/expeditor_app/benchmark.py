@@ -0,0 +1,183 @@
+"""
+End-to-end API benchmark.
+
+Times the major endpoints in-process (Django test client, as a
+superuser, cache disabled so every request does the full work) and
+returns a JSON-serializable report. Parameters mirror what the frontend
+sends: the last BENCHMARK_DAYS days, the busiest expeditor for the
+per-expeditor views. Reports taken at different dataset sizes (see the
+benchmark_api command) share the same shape and can be compared.
+"""
+
+import os
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from contextlib import ExitStack
+
+from .models import Check, CheckAnalytics, CheckDetail
+
+BENCHMARK_DAYS = 30
+MANAGER_REPORT_DAYS = 7
+BENCHMARK_USERNAME = 'api-benchmark'
+
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+# benchmark name: (url name, query parameters; formatted with benchmark_context())
+BENCHMARK_ENDPOINTS = {
+    'statistics': ('statistics', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'analytics_summary': ('analytics-summary', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'violation_dashboard': ('violation-dashboard', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'violation_detail': ('violation-detail', {
+        'expeditor': '{expeditor}', 'date_from': '{date_from}', 'date_to': '{date_to}',
+    }),
+    'violation_insights': ('violation-insights', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'manager_report': ('manager-report', {'date_from': '{report_from}', 'date_to': '{report_to}'}),
+    'check_list': ('check-list', {
+        'ekispiditor_id': '{ekispiditor_id}', 'date_from': '{date_from}', 'date_to': '{date_to}',
+    }),
+}
+
+
+def benchmark_context():
+    """Values the endpoint parameters are formatted with."""
+    today = timezone.localdate()
+    busiest = (
+        CheckAnalytics.objects.exclude(most_active_expiditor__isnull=True)
+        .values('most_active_expiditor').annotate(n=Count('id')).order_by('-n').first()
+    )
+    since = timezone.now() - timedelta(days=BENCHMARK_DAYS)
+    top_expeditor = (
+        Check.objects.filter(yetkazilgan_vaqti__gte=since, ekispiditor_ref__isnull=False)
+        .values('ekispiditor_ref_id', 'ekispiditor').annotate(n=Count('id')).order_by('-n').first()
+    ) or {}
+    return {
+        'date_from': (today - timedelta(days=BENCHMARK_DAYS)).isoformat(),
+        'date_to': today.isoformat(),
+        'report_from': f'{today - timedelta(days=MANAGER_REPORT_DAYS)}T00:00:00',
+        'report_to': f'{today}T23:59:59',
+        'expeditor': busiest['most_active_expiditor'] if busiest else (top_expeditor.get('ekispiditor') or ''),
+        'ekispiditor_id': top_expeditor.get('ekispiditor_ref_id') or '',
+    }
+
+
+def dataset_size():
+    return {
+        'checks': Check.objects.count(),
+        'check_details': CheckDetail.objects.count(),
+        'analytics': CheckAnalytics.objects.count(),
+    }
+
+
+def environment():
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SHOW server_version')
+            version = cursor.fetchone()[0]
+        else:
+            version = None
+    return {
+        'git_revision': revision,
+        'database': connection.vendor,
+        'database_version': version,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _benchmark_user():
+    user, created = get_user_model().objects.get_or_create(
+        username=BENCHMARK_USERNAME, defaults={'is_staff': True, 'is_superuser': True},
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    return user
+
+
+def time_endpoint(client, url, params, repeat):
+    """Timings of `repeat` requests after one untimed warm-up request."""
+    durations, queries, sql_ms = [], 0, 0.0
+    status, response_bytes = None, 0
+    for run in range(repeat + 1):
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            start = time.perf_counter()
+            response = client.get(url, params)
+            elapsed = time.perf_counter() - start
+        if run == 0:
+            continue
+        durations.append(elapsed * 1000)
+        queries = sum(len(c.captured_queries) for c in captured)
+        sql_ms = sum(float(q['time']) for c in captured for q in c.captured_queries) * 1000
+        status = response.status_code
+        response_bytes = 0 if response.streaming else len(response.content)
+    return {
+        'status': status,
+        'runs': repeat,
+        'min_ms': round(min(durations), 1),
+        'median_ms': round(statistics.median(durations), 1),
+        'p95_ms': round(_percentile(durations, 0.95), 1),
+        'max_ms': round(max(durations), 1),
+        'queries': queries,
+        'sql_ms': round(sql_ms, 1),
+        'response_bytes': response_bytes,
+    }
+
+
+def run_benchmark(repeat=5, endpoints=None, progress=None):
+    """Benchmark the endpoints against the current dataset."""
+    names = endpoints or list(BENCHMARK_ENDPOINTS)
+    context = benchmark_context()
+    results = {}
+    with override_settings(CACHES=DUMMY_CACHES, ALLOWED_HOSTS=['testserver']):
+        client = Client()
+        client.force_login(_benchmark_user())
+        for name in names:
+            url_name, params = BENCHMARK_ENDPOINTS[name]
+            params = {key: value.format(**context) for key, value in params.items()}
+            results[name] = time_endpoint(client, reverse(url_name), params, repeat)
+            if progress:
+                progress(name, results[name])
+    return {
+        'rows': dataset_size(),
+        'parameters': context,
+        'endpoints': results,
+    }
+
+
+def compare(previous, current):
+    """(size label, endpoint, previous median, current median, ratio) for
+    every size and endpoint present in both reports."""
+    rows = []
+    for label, run in current.get('sizes', {}).items():
+        old_run = previous.get('sizes', {}).get(label)
+        if not old_run:
+            continue
+        for name, result in run['endpoints'].items():
+            old = old_run['endpoints'].get(name)
+            if not old or not old['median_ms']:
+                continue
+            rows.append((label, name, old['median_ms'], result['median_ms'], result['median_ms'] / old['median_ms']))
+    return rows
@@ -0,0 +1,137 @@
+"""
+Bootstrap API: all dashboard reference data in one request.
+
+Replaces the separate first-load calls for projects, sklads, cities,
+filials, expeditors and the Telegram target. Each section carries a
+version derived from its tables (see conditional.tables_version); the
+rendered section is kept in the cache under that version, so it is built
+once per change instead of once per page load. Snapshots are refreshed
+right after an import. Clients send the versions they already hold and
+get back only the sections that changed.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .conditional import tables_version
+from .kpi import annotate_expeditor_kpis
+from .models import Projects, Sklad, City, Filial, Ekispiditor, ExpeditorDailyKPI, TelegramAccount
+from .serializers import (
+    ProjectsSerializer, SkladSerializer, CitySerializer, FilialSerializer, BootstrapEkispiditorSerializer,
+)
+from .views import telegram_target_payload
+
+# Versions change whenever the data does, so this only bounds how long an
+# unreachable (outdated) snapshot lingers in the cache.
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def _build_projects():
+    return list(ProjectsSerializer(Projects.objects.order_by('project_name'), many=True).data)
+
+
+def _build_sklads():
+    return list(SkladSerializer(Sklad.objects.order_by('sklad_name'), many=True).data)
+
+
+def _build_cities():
+    return list(CitySerializer(City.objects.select_related('filial').order_by('city_name'), many=True).data)
+
+
+def _build_filials():
+    return list(FilialSerializer(Filial.objects.order_by('filial_name'), many=True).data)
+
+
+def _build_expeditors():
+    queryset = annotate_expeditor_kpis(
+        Ekispiditor.objects.filter(is_active=True).select_related('filial').order_by('ekispiditor_name')
+    )
+    return list(BootstrapEkispiditorSerializer(queryset, many=True).data)
+
+
+def _build_telegram():
+    return telegram_target_payload()
+
+
+# name -> (tables the section is built from, extra version input, builder)
+SECTIONS = {
+    'projects': ((Projects,), None, _build_projects),
+    'sklads': ((Sklad,), None, _build_sklads),
+    'cities': ((City, Filial), None, _build_cities),
+    'filials': ((Filial,), None, _build_filials),
+    'expeditors': ((Ekispiditor, Filial, ExpeditorDailyKPI), lambda: timezone.localdate().isoformat(), _build_expeditors),
+    'telegram': ((TelegramAccount,), None, _build_telegram),
+}
+
+
+def section_version(name, states=None):
+    models, extra, _ = SECTIONS[name]
+    return tables_version(*models, extra=extra() if extra else None, states=states)
+
+
+def get_section(name, version=None):
+    """Return the snapshot of a section, building and caching it on a miss."""
+    version = version or section_version(name)
+    key = f'bootstrap:{name}:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = SECTIONS[name][2]()
+        cache.set(key, data, SNAPSHOT_TIMEOUT)
+    return data
+
+
+def refresh_snapshots():
+    """Build the current snapshot of every section; called after imports."""
+    states = {}
+    for name in SECTIONS:
+        get_section(name, section_version(name, states))
+
+
+def parse_known_versions(raw):
+    """Parse `projects:<version>,sklads:<version>` into a dict."""
+    known = {}
+    for part in (raw or '').split(','):
+        name, sep, version = part.strip().partition(':')
+        if sep and name in SECTIONS and version:
+            known[name] = version
+    return known
+
+
+class BootstrapView(APIView):
+    """
+    Returns every reference section with its version.
+
+    Query params:
+    - known: comma separated `section:version` pairs the client already
+      has; those sections come back as `{"version": ..., "unchanged": true}`
+      without data
+    - sections: optional comma separated subset of sections to return
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        known = parse_known_versions(request.GET.get('known'))
+        requested = request.GET.get('sections')
+        names = [name for name in SECTIONS if name in requested.split(',')] if requested else list(SECTIONS)
+
+        sections = {}
+        states = {}
+        for name in names:
+            version = section_version(name, states)
+            if known.get(name) == version:
+                sections[name] = {'version': version, 'unchanged': True}
+            else:
+                sections[name] = {'version': version, 'data': get_section(name, version)}
+
+        combined = hashlib.md5(
+            repr([(name, sections[name]['version']) for name in names]).encode()
+        ).hexdigest()
+        response = Response({'version': combined, 'sections': sections})
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,102 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read-only endpoints.
+
+Validators are derived from cheap per-table aggregates instead of the
+response body, so a `304 Not Modified` is answered before the view
+builds its queryset or runs the serializer:
+
+- small reference tables: max(updated_at) and row count (catches deletes)
+- Check / CheckDetail: max(updated_at) via the (updated_at, id) index and
+  the latest SyncTombstone for deletes (including rows moved to the
+  archive), avoiding a COUNT(*) over the whole table
+"""
+
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import Check, CheckDetail, SyncTombstone
+
+TOMBSTONE_MODELS = {
+    Check: SyncTombstone.MODEL_CHECK,
+    CheckDetail: SyncTombstone.MODEL_CHECK_DETAIL,
+}
+
+
+def table_state(model):
+    """Return (last_modified, change_marker) for a model's table."""
+    if model in TOMBSTONE_MODELS:
+        last_modified = model.objects.aggregate(m=Max('updated_at'))['m']
+        last_deleted = SyncTombstone.objects.filter(
+            model_name=TOMBSTONE_MODELS[model]
+        ).aggregate(id=Max('id'), at=Max('deleted_at'))
+        # A delete is a modification too, for clients that only send If-Modified-Since
+        if last_deleted['at'] and (last_modified is None or last_deleted['at'] > last_modified):
+            last_modified = last_deleted['at']
+        return last_modified, last_deleted['id'] or 0
+    state = model.objects.aggregate(m=Max('updated_at'), n=Count('id'))
+    return state['m'], state['n']
+
+
+def tables_version(*models, extra=None, states=None):
+    """Short, stable version string for the combined state of the tables.
+
+    `states` is an optional dict used to share table_state results between
+    several calls that involve the same tables.
+    """
+    if states is None:
+        states = {}
+    parts = []
+    for model in models:
+        if model not in states:
+            states[model] = table_state(model)
+        parts.append((model._meta.label, states[model]))
+    if extra is not None:
+        parts.append(extra)
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def conditional_on(*models, extra=None):
+    """Decorate a view so it answers conditional GETs from table state.
+
+    `extra` is an optional callable (request -> value) mixed into the ETag
+    for responses that also depend on something other than the tables,
+    e.g. the current date. Such views get no Last-Modified header, since
+    the table timestamps alone would not describe them.
+    """
+    def _state(request):
+        cached = getattr(request, '_conditional_state', None)
+        if cached is None:
+            states = [table_state(model) for model in models]
+            extra_value = extra(request) if extra else None
+            cached = (states, extra_value)
+            request._conditional_state = cached
+        return cached
+
+    def etag_func(request, *args, **kwargs):
+        states, extra_value = _state(request)
+        labels = [model._meta.label for model in models]
+        return hashlib.md5(repr((labels, states, extra_value)).encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        if extra is not None:
+            return None
+        states, _ = _state(request)
+        timestamps = [last_modified for last_modified, _ in states if last_modified]
+        return max(timestamps) if timestamps else None
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Let browsers keep the body but revalidate on every use.
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+
+    return decorator
@@ -0,0 +1,106 @@
+"""
+Read-replica routing for the analytics views.
+
+When a `replica` database is configured (DB_REPLICA_HOST), views that opt
+in with ReplicaReadMixin run their ORM reads against it, so long
+statistics, report and violation queries do not compete with import
+transactions on the primary. Everything else, all writes, and reads of
+the auth/session tables (a fresh login may not have replicated yet) stay
+on `default`.
+
+Replication lag is checked at most every LAG_CHECK_INTERVAL seconds;
+while it exceeds DB_REPLICA_MAX_LAG_SECONDS, or the replica cannot be
+reached, opted-in views read from the primary as well.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+LAG_CACHE_KEY = 'db_router:replica_ok'
+LAG_CHECK_INTERVAL = 15
+
+# Apps whose reads always go to the primary
+PRIMARY_ONLY_APPS = {'auth', 'sessions', 'authtoken', 'admin', 'contenttypes'}
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+class ReplicaRouter:
+    """Send reads to the alias chosen by read_from_replica, writes to default."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so objects loaded from the replica are saved to the primary
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def replica_lag():
+    """Replication lag of the replica in seconds."""
+    connection = connections[REPLICA_ALIAS]
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def replica_available():
+    """Whether the replica is configured, reachable and close enough behind."""
+    if REPLICA_ALIAS not in settings.DATABASES:
+        return False
+    available = cache.get(LAG_CACHE_KEY)
+    if available is None:
+        try:
+            lag = replica_lag()
+            available = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            if not available:
+                logger.warning(f'Replica is {lag:.1f}s behind; reading from the primary')
+        except DatabaseError as e:
+            logger.error(f'Replica lag check failed: {e}')
+            available = False
+        cache.set(LAG_CACHE_KEY, available, LAG_CHECK_INTERVAL)
+    return available
+
+
+@contextmanager
+def read_from_replica():
+    """Route ORM reads in this context to the replica when it is usable."""
+    token = _read_alias.set(REPLICA_ALIAS if replica_available() else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaReadMixin:
+    """Opt-in for read-only APIViews: run the request's reads on the replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
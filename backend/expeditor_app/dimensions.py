@@ -0,0 +1,51 @@
+"""
+Dimension foreign keys on Check.
+
+Check keeps the free-text project / sklad / city / ekispiditor columns it
+receives from the SOAP service, plus nullable foreign keys to the
+matching dimension rows. Queries filter and group on the integer keys,
+which are served by the (<dimension>_ref, yetkazilgan_vaqti) indexes,
+instead of matching strings over the whole table.
+"""
+
+from django.db.models import Exists, OuterRef, Subquery
+
+from .models import Check, Projects, Sklad, City, Ekispiditor
+
+# dimension -> (Check name column, Check foreign key, model, model name field)
+DIMENSIONS = {
+    'project': ('project', 'project_ref', Projects, 'project_name'),
+    'sklad': ('sklad', 'sklad_ref', Sklad, 'sklad_name'),
+    'city': ('city', 'city_ref', City, 'city_name'),
+    'ekispiditor': ('ekispiditor', 'ekispiditor_ref', Ekispiditor, 'ekispiditor_name'),
+}
+
+
+def filter_by_dimension_name(queryset, dimension, value, lookup='icontains'):
+    """Filter checks by dimension name through the foreign key.
+
+    The name lookup runs against the small dimension table; the check
+    table is then restricted by id.
+    """
+    _, ref, model, name_field = DIMENSIONS[dimension]
+    ids = model.objects.filter(**{f'{name_field}__{lookup}': value}).values('id')
+    return queryset.filter(**{f'{ref}_id__in': ids})
+
+
+def dimension_names(dimension, ids):
+    """Map dimension ids to names."""
+    _, _, model, name_field = DIMENSIONS[dimension]
+    return dict(model.objects.filter(id__in=[i for i in ids if i is not None]).values_list('id', name_field))
+
+
+def backfill_dimension(dimension, start_id, end_id):
+    """Resolve the foreign key of checks with start_id <= id < end_id
+    from their name column. Returns the number of rows updated."""
+    column, ref, model, name_field = DIMENSIONS[dimension]
+    matching = model.objects.filter(**{name_field: OuterRef(column)})
+    return (
+        Check.objects
+        .filter(id__gte=start_id, id__lt=end_id, **{f'{ref}__isnull': True})
+        .filter(Exists(matching))
+        .update(**{ref: Subquery(matching.values('id')[:1])})
+    )
@@ -0,0 +1,112 @@
+"""
+Server-Sent Events stream of import batches and task progress.
+
+Replaces polling of /api/task-status/ and /api/task-runs/running/ and
+page reloads for new checks. Browsers connect with EventSource, which
+cannot set headers, so the auth token may be passed as ?token=.
+"""
+
+import json
+import queue
+import time
+
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .events import broker, CHANNELS, CHANNEL_TASKS
+
+HEARTBEAT_SECONDS = 15
+
+# Streams are closed after this long so a worker thread is never held
+# indefinitely; EventSource reconnects and resumes via Last-Event-ID.
+MAX_STREAM_SECONDS = 600
+
+# Clients turned away while the worker is at EVENT_STREAMS_PER_WORKER get
+# a `fallback` event telling them to poll every POLL_FALLBACK_SECONDS and
+# to try the stream again after BUSY_RETRY_MILLISECONDS. EventSource gives
+# up on an error status, so this is a normal (short) stream.
+POLL_FALLBACK_SECONDS = 30
+BUSY_RETRY_MILLISECONDS = 120000
+
+
+class QueryTokenAuthentication(TokenAuthentication):
+    """Token authentication that also accepts ?token=<key>."""
+
+    def authenticate(self, request):
+        key = request.query_params.get('token')
+        if not key:
+            return None
+        return self.authenticate_credentials(key)
+
+
+def _format_event(event):
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps({'channel': event['channel'], **event['data']}, default=str)}\n\n"
+    )
+
+
+class EventStreamView(APIView):
+    """
+    Streams events as text/event-stream.
+
+    Query params:
+    - channels: comma separated subset of `checks,tasks` (default: all
+      channels the user may see). `tasks` requires a staff user, matching
+      the task endpoints.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [QueryTokenAuthentication, TokenAuthentication, SessionAuthentication]
+
+    def get(self, request):
+        requested = request.GET.get('channels')
+        channels = set(requested.split(',')) & set(CHANNELS) if requested else set(CHANNELS)
+
+        if not (request.user and request.user.is_authenticated and request.user.is_staff):
+            channels.discard(CHANNEL_TASKS)
+        if not channels:
+            return Response({'error': 'No accessible channels requested'}, status=status.HTTP_403_FORBIDDEN)
+
+        last_event_id = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('last_event_id')
+        subscriber = broker.subscribe(last_event_id=last_event_id)
+        if subscriber is None:
+            fallback = {'mode': 'poll', 'poll_seconds': POLL_FALLBACK_SECONDS,
+                        'retry_seconds': BUSY_RETRY_MILLISECONDS // 1000}
+            response = HttpResponse(
+                f'retry: {BUSY_RETRY_MILLISECONDS}\nevent: fallback\ndata: {json.dumps(fallback)}\n\n',
+                content_type='text/event-stream',
+            )
+            response['Cache-Control'] = 'no-cache'
+            return response
+
+        def stream():
+            started = time.monotonic()
+            # The stream never touches the database; give back the
+            # connection authentication opened instead of holding it
+            # until the stream ends
+            connections.close_all()
+            try:
+                yield 'retry: 5000\n\n'
+                # A subscriber the broker dropped gets no more events; ending
+                # the stream makes EventSource reconnect with Last-Event-ID
+                while not subscriber.closed and time.monotonic() - started < MAX_STREAM_SECONDS:
+                    try:
+                        event = subscriber.get(timeout=HEARTBEAT_SECONDS)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    if event['channel'] in channels:
+                        yield _format_event(event)
+            finally:
+                broker.unsubscribe(subscriber)
+
+        response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,192 @@
+"""
+Push events for dashboards and the tasks page.
+
+A small in-process broker hands events to Server-Sent Events streams.
+On PostgreSQL, events are published with NOTIFY and every worker process
+LISTENs on the same channel, so a batch committed by one gunicorn worker
+reaches streams held by all the others. Events are sent after the
+publishing transaction commits (transaction.on_commit), outside it: an
+event of an import batch is delivered only once the batch commits, one
+of rolled-back work is dropped, and a failing NOTIFY is logged without
+breaking the caller's transaction. Other databases fall back to delivery
+inside the publishing process.
+
+Every open stream holds a gunicorn worker thread, so a worker accepts at
+most EVENT_STREAMS_PER_WORKER streams (its threads less
+EVENT_API_THREADS) and leaves its other threads to the API.
+"""
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_CHECKS = 'checks'
+CHANNEL_TASKS = 'tasks'
+CHANNELS = (CHANNEL_CHECKS, CHANNEL_TASKS)
+
+PG_NOTIFY_CHANNEL = 'expeditor_events'
+
+# NOTIFY payloads are capped at 8000 bytes; keep check id lists well under it.
+MAX_IDS_PER_EVENT = 200
+
+
+class Subscriber(queue.Queue):
+    """Event queue of one stream; closed once the broker drops it."""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize=maxsize)
+        self.closed = False
+
+
+class EventBroker:
+    """Fans published events out to subscriber queues in this process."""
+
+    def __init__(self, history_size=500, queue_size=1000):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._queue_size = queue_size
+        self._listener = None
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber queue, pre-filled with events missed since
+        last_event_id; None when this process already serves
+        EVENT_STREAMS_PER_WORKER streams."""
+        self._ensure_listener()
+        subscriber = Subscriber(maxsize=self._queue_size)
+        with self._lock:
+            if len(self._subscribers) >= settings.EVENT_STREAMS_PER_WORKER:
+                return None
+            if last_event_id:
+                ids = [event['id'] for event in self._history]
+                if last_event_id in ids:
+                    for event in list(self._history)[ids.index(last_event_id) + 1:]:
+                        subscriber.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.closed = True
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, channel, event_type, data):
+        """Publish an event once the current transaction commits (at once
+        outside a transaction)."""
+        event = {
+            'id': uuid.uuid4().hex,
+            'channel': channel,
+            'type': event_type,
+            'data': data,
+        }
+        transaction.on_commit(lambda: self._send(event))
+
+    def _send(self, event):
+        """NOTIFY all worker processes of an event, or dispatch it here."""
+        try:
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_notify(%s, %s)', [PG_NOTIFY_CHANNEL, json.dumps(event, default=str)])
+            else:
+                self.dispatch(event)
+        except Exception as e:
+            # Push is best effort; the committed work stands
+            logger.error(f"Failed to publish {event['type']} event: {e}")
+
+    def dispatch(self, event):
+        """Deliver an event to every local subscriber."""
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A stalled client; drop it. Its stream ends on the closed
+                # queue and EventSource reconnects with Last-Event-ID to
+                # replay from history.
+                self.unsubscribe(subscriber)
+
+    def _ensure_listener(self):
+        if connection.vendor != 'postgresql' or self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen_forever, name='expeditor-events-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen_forever(self):
+        """LISTEN on a dedicated connection and dispatch notifications."""
+        backoff = 1
+        while True:
+            pg_conn = None
+            try:
+                pg_conn = connection.get_new_connection(connection.get_connection_params())
+                pg_conn.autocommit = True
+                with pg_conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {PG_NOTIFY_CHANNEL}')
+                backoff = 1
+                while True:
+                    if select.select([pg_conn], [], [], 30) == ([], [], []):
+                        continue
+                    pg_conn.poll()
+                    while pg_conn.notifies:
+                        notify = pg_conn.notifies.pop(0)
+                        try:
+                            self.dispatch(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed event payload: {notify.payload[:200]}")
+            except Exception as e:
+                logger.error(f"Event listener error, reconnecting in {backoff}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+            finally:
+                if pg_conn is not None:
+                    try:
+                        pg_conn.close()
+                    except Exception:
+                        pass
+
+
+broker = EventBroker()
+
+
+def publish_checks_batch(created_by_expeditor, updated_by_expeditor):
+    """Publish new/updated check ids of an import batch, grouped by expeditor."""
+    expeditors = set(created_by_expeditor) | set(updated_by_expeditor)
+    for expeditor in expeditors:
+        created = created_by_expeditor.get(expeditor, [])
+        updated = updated_by_expeditor.get(expeditor, [])
+        for i in range(0, max(len(created), len(updated)), MAX_IDS_PER_EVENT):
+            broker.publish(CHANNEL_CHECKS, 'checks.batch', {
+                'expeditor': expeditor,
+                'created': created[i:i + MAX_IDS_PER_EVENT],
+                'updated': updated[i:i + MAX_IDS_PER_EVENT],
+            })
+
+
+def publish_task_run(task_run):
+    """Publish the current progress of a TaskRun."""
+    broker.publish(CHANNEL_TASKS, 'task_run.progress', {
+        'id': task_run.id,
+        'task_type': task_run.task_type,
+        'status': task_run.status,
+        'is_running': task_run.is_running,
+        'processed': task_run.processed,
+        'total': task_run.total,
+        'status_message': task_run.status_message,
+        'started_at': task_run.started_at,
+        'finished_at': task_run.finished_at,
+    })
@@ -0,0 +1,112 @@
+"""
+Uniform grid index for radius queries over check coordinates.
+
+Points are bucketed into square cells of `radius_meters` (in degrees of
+latitude), so a radius query only looks at the few cells around the
+point instead of every other point: building the index is O(n) and a
+query costs O(points nearby). Candidates from the cells are filtered with
+the exact distance (geo kernels, vectorized when a query has many
+candidates), so the results are the same as a full pair scan. Used by
+the violation detectors (pattern analysis task, manager report) to turn
+their O(n²) clustering into near-linear passes.
+"""
+
+import math
+from collections import defaultdict
+
+from .geo import distance_function, distances_within
+
+METERS_PER_DEGREE_LAT = 111320
+
+# Cells are never smaller than this, so a zero radius still gets a usable grid
+MIN_CELL_METERS = 1.0
+
+# Queries with at least this many candidates use the NumPy kernels
+VECTORIZE_MIN_CANDIDATES = 32
+
+
+class GridIndex:
+    """
+    Points (key, lat, lon) bucketed by grid cell. Keys must be sortable
+    (the callers use list positions) and are returned in ascending order,
+    so "first match" semantics of the scans this replaces are kept.
+    """
+
+    def __init__(self, radius_meters, points=()):
+        self.radius_meters = radius_meters
+        self.cell_degrees = max(radius_meters, MIN_CELL_METERS) / METERS_PER_DEGREE_LAT
+        self.cells = defaultdict(list)
+        for key, lat, lon in points:
+            self.add(key, lat, lon)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def add(self, key, lat, lon):
+        self.cells[self._cell(lat, lon)].append((key, lat, lon))
+
+    def remove(self, key, lat, lon):
+        cell = self._cell(lat, lon)
+        bucket = self.cells[cell]
+        bucket[:] = [point for point in bucket if point[0] != key]
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, key, lat, lon, new_lat, new_lon):
+        """Re-bucket a point whose coordinates changed (e.g. a cluster centroid)."""
+        if self._cell(lat, lon) != self._cell(new_lat, new_lon):
+            self.remove(key, lat, lon)
+            self.add(key, new_lat, new_lon)
+        else:
+            bucket = self.cells[self._cell(lat, lon)]
+            bucket[:] = [(k, new_lat, new_lon) if k == key else (k, a, b) for k, a, b in bucket]
+
+    def near(self, lat, lon, radius_meters=None):
+        """(key, distance) of the points within radius_meters (default: the
+        index radius) of the point, in ascending key order."""
+        radius = self.radius_meters if radius_meters is None else radius_meters
+        lat_span = radius / METERS_PER_DEGREE_LAT
+        # A degree of longitude shrinks with cos(latitude)
+        lon_span = lat_span / max(math.cos(math.radians(lat)), 1e-6)
+        row, column = self._cell(lat, lon)
+        rows = math.ceil(lat_span / self.cell_degrees)
+        columns = math.ceil(lon_span / self.cell_degrees)
+
+        candidates = []
+        for i in range(row - rows, row + rows + 1):
+            for j in range(column - columns, column + columns + 1):
+                candidates.extend(self.cells.get((i, j), ()))
+
+        if len(candidates) >= VECTORIZE_MIN_CANDIDATES:
+            keys, lats, lons = zip(*candidates)
+            distances = distances_within(lat, lon, lats, lons, radius)
+            found = [(key, float(d)) for key, d in zip(keys, distances) if d <= radius]
+        else:
+            distance = distance_function(radius)
+            found = []
+            for key, other_lat, other_lon in candidates:
+                d = distance(lat, lon, other_lat, other_lon)
+                if d <= radius:
+                    found.append((key, d))
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+def seed_clusters(coordinates, radius_meters, min_size=1):
+    """
+    Greedy clustering of a list of (lat, lon): in list order, every point
+    not yet clustered seeds a cluster with all other unclustered points
+    within radius_meters of it. Returns the clusters of at least min_size
+    points, as lists of positions in `coordinates`.
+    """
+    index = GridIndex(radius_meters, ((i, lat, lon) for i, (lat, lon) in enumerate(coordinates)))
+    clustered = set()
+    clusters = []
+    for seed, (lat, lon) in enumerate(coordinates):
+        if seed in clustered:
+            continue
+        members = [seed] + [i for i, _ in index.near(lat, lon) if i != seed and i not in clustered]
+        clustered.update(members)
+        if len(members) >= min_size:
+            clusters.append(members)
+    return clusters
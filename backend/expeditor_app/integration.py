@@ -10,6 +10,11 @@ from zeep import Client
 from zeep.cache import InMemoryCache
 from zeep.transports import Transport
 from expeditor_app.utils import get_last_update_date, save_last_update_date
+from expeditor_app.events import publish_checks_batch
+from expeditor_app.bootstrap_views import refresh_snapshots
+from expeditor_app.kpi import kpi_day, refresh_expeditor_days
+from expeditor_app.pattern_analysis import dirty_partitions, mark_dirty
+from expeditor_app.archive import drop_archived_copies
 import os
 from expeditor_app.models import Check, CheckDetail, Sklad, City, Ekispiditor, Projects, ProblemCheck, IntegrationEndpoint
 
@@ -46,16 +51,81 @@ class UpdateChecksView(APIView):
                     cls._client = Client(wsdl=url, transport=transport)
         return cls._client
 
+    def _ensure_dimensions(self, batch, existing_projects, existing_cities,
+                           existing_expeditors, existing_sklads, counters: dict):
+        """Create missing projects/cities/expeditors/sklads of a batch and
+        make sure the existing_* maps hold saved rows (with ids) for them."""
+        projects_to_create = {}
+        cities_to_create = {}
+        expeditors_to_create = {}
+        sklads_to_create = {}
+
+        for row in batch:
+            if hasattr(row, 'project') and row.project and row.project not in existing_projects:
+                projects_to_create.setdefault(row.project, Projects(
+                    project_name=row.project,
+                    project_description=getattr(row, 'projectDescription', ''),
+                    updated_at=timezone.now()
+                ))
+
+            if hasattr(row, 'city') and row.city and row.city not in existing_cities:
+                cities_to_create.setdefault(row.city, City(
+                    city_name=row.city,
+                    city_code=getattr(row, 'cityCode', ''),
+                    description=getattr(row, 'cityDescription', ''),
+                    updated_at=timezone.now()
+                ))
+
+            if hasattr(row, 'curier') and row.curier and row.curier not in existing_expeditors:
+                expeditors_to_create.setdefault(row.curier, Ekispiditor(
+                    ekispiditor_name=row.curier,
+                    transport_number=getattr(row, 'auto', ''),
+                    phone_number=getattr(row, 'phone', '+998999999999'),
+                    photo=getattr(row, 'photo', None),
+                    is_active=True,
+                    updated_at=timezone.now()
+                ))
+
+            if hasattr(row, 'warehouse') and row.warehouse and row.warehouse not in existing_sklads:
+                sklads_to_create.setdefault(row.warehouse, Sklad(
+                    sklad_name=row.warehouse,
+                    sklad_code=getattr(row, 'warehouseCode', ''),
+                    description=getattr(row, 'warehouseDescription', ''),
+                    updated_at=timezone.now()
+                ))
+
+        # ignore_conflicts does not return ids, so created rows are re-read
+        for model, name_field, to_create, existing, counter in (
+            (Projects, 'project_name', projects_to_create, existing_projects, 'projects_created'),
+            (City, 'city_name', cities_to_create, existing_cities, 'cities_created'),
+            (Ekispiditor, 'ekispiditor_name', expeditors_to_create, existing_expeditors, 'expeditors_created'),
+            (Sklad, 'sklad_name', sklads_to_create, existing_sklads, 'sklads_created'),
+        ):
+            if not to_create:
+                continue
+            model.objects.bulk_create(to_create.values(), ignore_conflicts=True)
+            counters[counter] += len(to_create)
+            for obj in model.objects.filter(**{f'{name_field}__in': list(to_create)}):
+                existing[getattr(obj, name_field)] = obj
+
     def _process_batch(self, batch, existing_check_ids, existing_projects, 
                       existing_cities, existing_expeditors, existing_sklads,
                       counters: dict):
         """Process a batch of rows efficiently"""
-        checks_to_create = []
-        check_details_to_create = []
-        projects_to_create = []
-        cities_to_create = []
-        expeditors_to_create = []
-        sklads_to_create = []
+        self._ensure_dimensions(batch, existing_projects, existing_cities,
+                                existing_expeditors, existing_sklads, counters)
+        created_by_expeditor = {}
+        updated_by_expeditor = {}
+        
+        # Expeditor-days whose KPIs change and analysis partitions to redo,
+        # including the day/expeditor/place an updated check is moving away from
+        kpi_days = set()
+        dirty = set()
+        for ekispiditor_id, ekispiditor, delivered_at, lat, lon in Check.objects.filter(
+            check_id__in=[getattr(row, 'receiptID', None) for row in batch]
+        ).values_list('ekispiditor_ref_id', 'ekispiditor', 'yetkazilgan_vaqti', 'check_lat', 'check_lon'):
+            kpi_days.add((ekispiditor_id, kpi_day(delivered_at)))
+            dirty |= dirty_partitions(ekispiditor, delivered_at, lat, lon)
         
         for row in batch:
             try:
@@ -95,50 +165,26 @@ class UpdateChecksView(APIView):
                     'status': 'delivered',
                     'updated_at': timezone.now()
                 }
-
-                # Collect bulk operations
-                if hasattr(row, 'project') and row.project and row.project not in existing_projects:
-                    projects_to_create.append(Projects(
-                        project_name=row.project,
-                        project_description=getattr(row, 'projectDescription', ''),
-                        updated_at=timezone.now()
-                    ))
-
-                if hasattr(row, 'city') and row.city and row.city not in existing_cities:
-                    cities_to_create.append(City(
-                        city_name=row.city,
-                        city_code=getattr(row, 'cityCode', ''),
-                        description=getattr(row, 'cityDescription', ''),
-                        updated_at=timezone.now()
-                    ))
-
-                if hasattr(row, 'curier') and row.curier and row.curier not in existing_expeditors:
-                    expeditors_to_create.append(Ekispiditor(
-                        ekispiditor_name=row.curier,
-                        transport_number=getattr(row, 'auto', ''),
-                        phone_number=getattr(row, 'phone', '+998999999999'),
-                        photo=getattr(row, 'photo', None),
-                        is_active=True,
-                        updated_at=timezone.now()
-                    ))
-
-                if hasattr(row, 'warehouse') and row.warehouse and row.warehouse not in existing_sklads:
-                    sklads_to_create.append(Sklad(
-                        sklad_name=row.warehouse,
-                        sklad_code=getattr(row, 'warehouseCode', ''),
-                        description=getattr(row, 'warehouseDescription', ''),
-                        updated_at=timezone.now()
-                    ))
+                check_data['project_ref'] = existing_projects.get(check_data['project'])
+                check_data['sklad_ref'] = existing_sklads.get(check_data['sklad'])
+                check_data['city_ref'] = existing_cities.get(check_data['city'])
+                check_data['ekispiditor_ref'] = existing_expeditors.get(check_data['ekispiditor'])
 
                 # Use update_or_create for checks (more complex logic needed)
                 check_obj, check_created = Check.objects.update_or_create(
                     check_id=check_id,
                     defaults={k: v for k, v in check_data.items() if k != 'check_id'}
                 )
+                kpi_days.add((check_obj.ekispiditor_ref_id, kpi_day(check_obj.yetkazilgan_vaqti)))
+                dirty |= dirty_partitions(
+                    check_obj.ekispiditor, check_obj.yetkazilgan_vaqti, check_obj.check_lat, check_obj.check_lon
+                )
                 if check_created:
                     counters['checks_created'] += 1
+                    created_by_expeditor.setdefault(check_obj.ekispiditor or '', []).append(check_id)
                 else:
                     counters['checks_updated'] += 1
+                    updated_by_expeditor.setdefault(check_obj.ekispiditor or '', []).append(check_id)
 
                 # Prepare receipt_date for CheckDetail
                 detail_receipt_date = receipt_date
@@ -190,27 +236,33 @@ class UpdateChecksView(APIView):
                 logger.error(f"[ROW ERROR] Check ID: {getattr(row, 'receiptID', 'unknown')}, Error: {inner_e}")
                 continue
 
-        # Bulk create new records
-        if projects_to_create:
-            Projects.objects.bulk_create(projects_to_create, ignore_conflicts=True)
-            counters['projects_created'] += len(projects_to_create)
-            for p in projects_to_create:
-                existing_projects[p.project_name] = p
-        if cities_to_create:
-            City.objects.bulk_create(cities_to_create, ignore_conflicts=True)
-            counters['cities_created'] += len(cities_to_create)
-            for c in cities_to_create:
-                existing_cities[c.city_name] = c
-        if expeditors_to_create:
-            Ekispiditor.objects.bulk_create(expeditors_to_create, ignore_conflicts=True)
-            counters['expeditors_created'] += len(expeditors_to_create)
-            for e in expeditors_to_create:
-                existing_expeditors[e.ekispiditor_name] = e
-        if sklads_to_create:
-            Sklad.objects.bulk_create(sklads_to_create, ignore_conflicts=True)
-            counters['sklads_created'] += len(sklads_to_create)
-            for s in sklads_to_create:
-                existing_sklads[s.sklad_name] = s
+        try:
+            with transaction.atomic():
+                refresh_expeditor_days(kpi_days)
+        except Exception as e:
+            logger.error(f"Failed to refresh expeditor KPIs: {e}")
+
+        try:
+            with transaction.atomic():
+                drop_archived_copies(
+                    [check_id for check_ids in created_by_expeditor.values() for check_id in check_ids]
+                )
+        except Exception as e:
+            logger.error(f"Failed to drop archived copies of re-imported checks: {e}")
+
+        try:
+            with transaction.atomic():
+                mark_dirty(dirty)
+        except Exception as e:
+            logger.error(f"Failed to mark analysis partitions dirty: {e}")
+
+        # Runs inside the batch transaction, so listeners hear about the
+        # batch only once it has committed.
+        try:
+            with transaction.atomic():
+                publish_checks_batch(created_by_expeditor, updated_by_expeditor)
+        except Exception as e:
+            logger.error(f"Failed to publish import batch event: {e}")
 
     def get(self, request):
         try:
@@ -294,6 +346,11 @@ class UpdateChecksView(APIView):
                     f.write(current_time)
                 logger.info(f"Saved last refresh time: {current_time}")
 
+            try:
+                refresh_snapshots()
+            except Exception as e:
+                logger.error(f"Failed to refresh bootstrap snapshots: {e}")
+
             return Response({
                 'updated': updated_count,
                 'created': counters['checks_created'] + counters['details_created'] + counters['projects_created'] + counters['cities_created'] + counters['expeditors_created'] + counters['sklads_created'],
@@ -0,0 +1,235 @@
+"""
+Per-expeditor daily KPIs (ExpeditorDailyKPI).
+
+Rows are recomputed for the (expeditor, day) pairs an import batch or an
+analysis run touched, so readers get per-expeditor totals from a few
+indexed rows instead of counting checks:
+
+- EkispiditorViewSet, the admin and the bootstrap expeditor section
+  (today's count and delivered total) via annotate_expeditor_kpis
+- the statistics top expeditors leaderboard via expeditor_leaderboard
+
+Rows only exist for the days imports touched since the table was added,
+until rebuild_expeditor_kpis has rebuilt the whole history and left the
+KPI_BACKFILL_KEY marker. Before that, readers count from Check as they
+did before (kpis_backfilled).
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .archive import check_models_for
+from .geo import path_length_meters
+from .models import AnalysisWatermark, Check, CheckAnalytics, Ekispiditor, ExpeditorDailyKPI
+from .utils import local_day_bounds
+
+# AnalysisWatermark left by a rebuild_expeditor_kpis run over the whole history
+KPI_BACKFILL_KEY = 'kpis:backfill'
+
+KPI_FIELDS = [
+    'checks_count', 'delivered_count', 'total_sum', 'nalichniy', 'uzcard', 'humo', 'click',
+    'first_check_at', 'last_check_at', 'violation_count', 'distance_km', 'updated_at',
+]
+
+
+def kpi_day(moment):
+    """Local date a check time counts towards, or None."""
+    if not moment:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return timezone.localtime(moment).date()
+
+
+def kpis_backfilled():
+    """Whether the KPI rows cover every day with checks (see KPI_BACKFILL_KEY)."""
+    return AnalysisWatermark.objects.filter(key=KPI_BACKFILL_KEY).exists()
+
+
+def expeditor_days_between(start, end):
+    """Distinct (ekispiditor_id, day) pairs of checks delivered in [start, end]."""
+    check_model, _ = check_models_for(start)
+    return set(
+        check_model.objects
+        .filter(yetkazilgan_vaqti__gte=start, yetkazilgan_vaqti__lte=end, ekispiditor_ref__isnull=False)
+        .annotate(day=TruncDate('yetkazilgan_vaqti'))
+        .values_list('ekispiditor_ref_id', 'day')
+        .distinct()
+    )
+
+
+def refresh_expeditor_days(pairs):
+    """Recompute and upsert the KPI rows of the given (ekispiditor_id, day) pairs.
+
+    Returns the number of rows written.
+    """
+    by_day = defaultdict(set)
+    for ekispiditor_id, day in pairs:
+        if ekispiditor_id and day:
+            by_day[day].add(ekispiditor_id)
+
+    rows = []
+    for day, ekispiditor_ids in sorted(by_day.items()):
+        rows.extend(_compute_day(day, ekispiditor_ids))
+
+    if rows:
+        ExpeditorDailyKPI.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['ekispiditor', 'date'],
+            update_fields=KPI_FIELDS,
+        )
+    return len(rows)
+
+
+def _compute_day(day, ekispiditor_ids):
+    start, end = local_day_bounds(day)
+    names = dict(Ekispiditor.objects.filter(id__in=ekispiditor_ids).values_list('id', 'ekispiditor_name'))
+    if not names:
+        return []
+
+    # Archived days are recomputed from the archive views
+    check_model, detail_model = check_models_for(start)
+    day_checks = check_model.objects.filter(
+        ekispiditor_ref_id__in=list(names),
+        yetkazilgan_vaqti__gte=start,
+        yetkazilgan_vaqti__lt=end,
+    )
+    checks = list(
+        day_checks.order_by('yetkazilgan_vaqti', 'id')
+        .values_list('check_id', 'ekispiditor_ref_id', 'status', 'yetkazilgan_vaqti', 'check_lat', 'check_lon')
+    )
+    details = {
+        row[0]: row[1:]
+        for row in detail_model.objects.filter(check_id__in=day_checks.values('check_id'))
+        .values_list('check_id', 'total_sum', 'nalichniy', 'uzcard', 'humo', 'click')
+    }
+    violations = dict(
+        CheckAnalytics.objects
+        .filter(window_start__gte=start, window_start__lt=end, most_active_expiditor__in=list(names.values()))
+        .values_list('most_active_expiditor')
+        .annotate(c=Count('id'))
+    )
+
+    now = timezone.now()
+    kpis = {
+        ekispiditor_id: ExpeditorDailyKPI(
+            ekispiditor_id=ekispiditor_id,
+            date=day,
+            violation_count=violations.get(name, 0),
+            updated_at=now,
+        )
+        for ekispiditor_id, name in names.items()
+    }
+    routes = defaultdict(lambda: ([], []))
+    for check_id, ekispiditor_id, status, delivered_at, lat, lon in checks:
+        kpi = kpis[ekispiditor_id]
+        kpi.checks_count += 1
+        if status == 'delivered':
+            kpi.delivered_count += 1
+        if kpi.first_check_at is None:
+            kpi.first_check_at = delivered_at
+        kpi.last_check_at = delivered_at
+
+        detail = details.get(check_id)
+        if detail:
+            total_sum, nalichniy, uzcard, humo, click = detail
+            kpi.total_sum += total_sum or 0
+            kpi.nalichniy += nalichniy or 0
+            kpi.uzcard += uzcard or 0
+            kpi.humo += humo or 0
+            kpi.click += click or 0
+
+        if lat is not None and lon is not None:
+            routes[ekispiditor_id][0].append(lat)
+            routes[ekispiditor_id][1].append(lon)
+
+    for ekispiditor_id, (lats, lons) in routes.items():
+        kpis[ekispiditor_id].distance_km = path_length_meters(lats, lons) / 1000
+
+    return list(kpis.values())
+
+
+def annotate_expeditor_kpis(queryset, day=None):
+    """Annotate expeditors with today's check count (read by
+    Ekispiditor.today_checks_count) and their delivered checks total.
+
+    The counts come from the KPI rows once they are backfilled
+    (kpis_backfilled), otherwise from Check subqueries.
+    """
+    day = day or timezone.localdate()
+    if not kpis_backfilled():
+        start, end = local_day_bounds(day)
+        today_checks = (
+            Check.objects
+            .filter(ekispiditor_ref=OuterRef('pk'), yetkazilgan_vaqti__gte=start, yetkazilgan_vaqti__lt=end)
+            .order_by()
+            .values('ekispiditor_ref')
+            .annotate(c=Count('id'))
+            .values('c')
+        )
+        delivered_total = (
+            Check.objects
+            .filter(ekispiditor_ref=OuterRef('pk'), yetkazilgan_vaqti__isnull=False, status='delivered')
+            .order_by()
+            .values('ekispiditor_ref')
+            .annotate(c=Count('id'))
+            .values('c')
+        )
+        return queryset.annotate(
+            kpi_today_checks=Subquery(today_checks, output_field=IntegerField()),
+            checks_count=Subquery(delivered_total, output_field=IntegerField()),
+        )
+    today_checks = (
+        ExpeditorDailyKPI.objects
+        .filter(ekispiditor=OuterRef('pk'), date=day)
+        .values('checks_count')[:1]
+    )
+    delivered_total = (
+        ExpeditorDailyKPI.objects
+        .filter(ekispiditor=OuterRef('pk'))
+        .values('ekispiditor')
+        .annotate(c=Sum('delivered_count'))
+        .values('c')
+    )
+    return queryset.annotate(
+        kpi_today_checks=Subquery(today_checks, output_field=IntegerField()),
+        checks_count=Subquery(delivered_total, output_field=IntegerField()),
+    )
+
+
+def expeditor_leaderboard(date_from=None, date_to=None, ekispiditor_id=None, limit=5):
+    """Top expeditors by check count over a range of days, from KPI rows.
+
+    Same shape as StatisticsView's top_expeditors. Only complete once the
+    KPI rows are backfilled (kpis_backfilled).
+    """
+    kpis = ExpeditorDailyKPI.objects.all()
+    if date_from:
+        kpis = kpis.filter(date__gte=date_from)
+    if date_to:
+        kpis = kpis.filter(date__lte=date_to)
+    if ekispiditor_id:
+        kpis = kpis.filter(ekispiditor_id=ekispiditor_id)
+    rows = (
+        kpis.values('ekispiditor_id', 'ekispiditor__ekispiditor_name')
+        .annotate(
+            check_count=Sum('checks_count'),
+            success_count=Sum('delivered_count'),
+            sum_total=Sum('total_sum'),
+        )
+        .filter(check_count__gt=0)
+        .order_by('-check_count')[:limit]
+    )
+    return [
+        {
+            'ekispiditor': row['ekispiditor__ekispiditor_name'],
+            'check_count': row['check_count'],
+            'success_count': row['success_count'],
+            'total_sum': row['sum_total'] or 0,
+        }
+        for row in rows
+    ]
@@ -2,15 +2,21 @@
 Management command to analyze check patterns and create analytics records.
 
 This command performs pattern analysis on check data to identify
-clusters of activity by time and geographic location.
+clusters of activity by time and geographic location. With
+--start-date/--end-date it runs a resumable backfill of those days in
+worker processes (see expeditor_app.parallel_analysis).
 """
 
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from datetime import datetime, timedelta
-from expeditor_app.models import Check, CheckAnalytics
+from expeditor_app.models import Check, CheckAnalytics, ScheduledTask
 from expeditor_app.task_executor import TaskExecutor
+from expeditor_app.pattern_analysis import WINDOW_MODES
+from expeditor_app.parallel_analysis import backfill_patterns
+from expeditor_app.utils import local_day_bounds
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +43,22 @@ class Command(BaseCommand):
             default=24,
             help='How many hours back to analyze (default: 24)',
         )
+        parser.add_argument(
+            '--rescan-hours',
+            type=int,
+            help='Hours before the last run to re-analyse for late imports (default: the lookback)',
+        )
+        parser.add_argument(
+            '--window-mode',
+            choices=WINDOW_MODES,
+            default='fixed',
+            help='fixed: back-to-back windows; anchored: a window starts at each unclustered check (default: fixed)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-analyse the whole lookback instead of starting at the last run',
+        )
         parser.add_argument(
             '--start-date',
             type=str,
@@ -47,6 +69,16 @@ class Command(BaseCommand):
             type=str,
             help='End date for analysis (YYYY-MM-DD format)',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes for a --start-date/--end-date backfill (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Start a --start-date/--end-date backfill over instead of resuming it',
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -57,6 +89,8 @@ class Command(BaseCommand):
         time_window_minutes = options['time_window_minutes']
         distance_meters = options['distance_meters']
         lookback_hours = options['lookback_hours']
+        window_mode = options['window_mode']
+        full = options['full']
         start_date = options.get('start_date')
         end_date = options.get('end_date')
         dry_run = options.get('dry_run', False)
@@ -68,18 +102,26 @@ class Command(BaseCommand):
         # Determine time range
         if start_date and end_date:
             try:
-                start_time = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-                end_time = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-                end_time = end_time.replace(hour=23, minute=59, second=59)
+                first_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+                last_day = datetime.strptime(end_date, '%Y-%m-%d').date()
             except ValueError:
                 raise CommandError('Invalid date format. Use YYYY-MM-DD')
+            if last_day < first_day:
+                raise CommandError('--end-date is before --start-date')
+            if window_mode != 'fixed':
+                raise CommandError('Date range analysis supports fixed windows only')
+            if options['workers'] is not None and options['workers'] < 1:
+                raise CommandError('--workers must be at least 1')
+            # Local days, as the analysis partitions them
+            start_time = local_day_bounds(first_day)[0]
+            end_time = local_day_bounds(last_day)[1] - timedelta(microseconds=1)
         else:
             now = timezone.now()
             end_time = now
             start_time = now - timedelta(hours=lookback_hours)
         
         self.stdout.write(f'Analyzing period: {start_time} to {end_time}')
-        self.stdout.write(f'Time window: {time_window_minutes} minutes')
+        self.stdout.write(f'Time window: {time_window_minutes} minutes ({window_mode})')
         self.stdout.write(f'Distance radius: {distance_meters} meters')
         
         # Get checks in the time range
@@ -102,6 +144,10 @@ class Command(BaseCommand):
             self._show_analysis_preview(checks, time_window_minutes, distance_meters)
             return
         
+        if start_date and end_date:
+            self._backfill(first_day, last_day, time_window_minutes, distance_meters, options['workers'], options['restart'])
+            return
+        
         # Create a mock scheduled task for the executor
         class MockScheduledTask:
             def __init__(self):
@@ -110,8 +156,12 @@ class Command(BaseCommand):
                 self.params = {
                     'time_window_minutes': time_window_minutes,
                     'distance_meters': distance_meters,
-                    'lookback_hours': lookback_hours
+                    'lookback_hours': lookback_hours,
+                    'window_mode': window_mode,
+                    'full': full
                 }
+                if options['rescan_hours'] is not None:
+                    self.params['rescan_hours'] = options['rescan_hours']
         
         # Execute analysis
         executor = TaskExecutor()
@@ -151,6 +201,49 @@ class Command(BaseCommand):
             logger.error(f'Pattern analysis failed: {str(e)}')
             raise CommandError(f'Analysis failed: {str(e)}')
     
+    def _backfill(self, first_day, last_day, time_window_minutes, distance_meters, workers, restart):
+        """Backfill the days in worker processes, committing and
+        checkpointing day by day; a re-run resumes after the last committed day."""
+        from expeditor_app.models import TaskRun
+        task_run = TaskRun.objects.create(
+            task_type=ScheduledTask.TASK_BACKFILL_PATTERNS,
+            is_running=True,
+            status_message=f'Backfilling {first_day} to {last_day}...',
+            total=0,
+            processed=0
+        )
+        self.stdout.write(f'Backfilling with {workers or os.cpu_count()} worker processes (task run {task_run.id})')
+        
+        def progress(day, time_distance, same_location):
+            self.stdout.write(f'  {day}: {time_distance} time-distance, {same_location} same-location records')
+        
+        try:
+            result = backfill_patterns(
+                first_day, last_day, time_window_minutes, distance_meters,
+                workers=workers, task_run=task_run, restart=restart, on_day=progress
+            )
+        except Exception as e:
+            task_run.mark_failed(error_message=f'Failed: {str(e)}')
+            self.stdout.write(
+                self.style.ERROR(f'✗ Analysis failed: {str(e)}')
+            )
+            logger.error(f'Pattern analysis failed: {str(e)}')
+            raise CommandError(f'Analysis failed: {str(e)}')
+        
+        message = (
+            f"{result['done']}/{result['days']} days backfilled, saved {result['time_distance']} time-distance "
+            f"analytics records and {result['same_location']} same-location violation records"
+        )
+        task_run.total = result['days']
+        task_run.processed = result['done']
+        if result['cancelled']:
+            task_run.mark_cancelled(cancel_message=f'Cancelled. {message}')
+            self.stdout.write(self.style.WARNING(f'Backfill cancelled: {message}; re-run to resume'))
+            return
+        task_run.status_message = f'Completed successfully. {message}'
+        task_run.mark_completed()
+        self.stdout.write(self.style.SUCCESS(f'✓ Analysis completed: {message}'))
+    
     def _show_analysis_preview(self, checks, time_window_minutes, distance_meters):
         """Show preview of what would be analyzed."""
         from collections import defaultdict
@@ -0,0 +1,60 @@
+"""
+Management command to move old checks to the archive schema.
+
+Moves checks and check details older than CHECK_ARCHIVE_AFTER_MONTHS
+(or --months) to the archive tables one month per transaction and
+rebuilds the monthly rollups; see expeditor_app.archive. The
+ARCHIVE_CHECKS scheduled task does the same.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from expeditor_app.archive import archive_horizon, archive_month, ensure_archive_tables, months_to_archive
+from expeditor_app.partitioning import add_months, month_start
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Archive checks older than the configured horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            help='Keep this many months in the hot tables (default: CHECK_ARCHIVE_AFTER_MONTHS)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the months that would be archived',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The check archive requires PostgreSQL')
+
+        if options.get('months') is not None:
+            horizon = add_months(month_start(timezone.localdate()), -options['months'])
+        else:
+            horizon = archive_horizon()
+
+        months = months_to_archive(horizon)
+        self.stdout.write(self.style.SUCCESS(f'Archiving checks before {horizon:%Y-%m}: {len(months)} months'))
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f'  {month:%Y-%m}')
+            return
+
+        ensure_archive_tables()
+        checks_total = details_total = 0
+        for month in months:
+            checks_moved, details_moved = archive_month(month)
+            checks_total += checks_moved
+            details_total += details_moved
+            self.stdout.write(f'  {month:%Y-%m}: {checks_moved} checks, {details_moved} details')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Archived {checks_total} checks and {details_total} check details'))
+        logger.info(f'Archived checks before {horizon}: {checks_total} checks, {details_total} details')
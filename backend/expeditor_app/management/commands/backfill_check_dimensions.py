@@ -0,0 +1,60 @@
+"""
+Management command to backfill the dimension foreign keys on Check.
+
+Fills project_ref, sklad_ref, city_ref and ekispiditor_ref from the name
+columns for checks imported before those keys existed. Works through the
+table in id ranges, one short transaction per range, so it can run
+while imports continue and can be interrupted and re-run safely.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from expeditor_app.dimensions import DIMENSIONS, backfill_dimension
+from expeditor_app.models import Check
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Backfill project/sklad/city/ekispiditor foreign keys on checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dimension',
+            type=str,
+            choices=list(DIMENSIONS),
+            help='Backfill only this dimension (default: all)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of check ids per update (default: 10000)',
+        )
+
+    def handle(self, *args, **options):
+        dimensions = [options['dimension']] if options.get('dimension') else list(DIMENSIONS)
+        batch_size = options['batch_size']
+
+        bounds = Check.objects.aggregate(lo=Min('id'), hi=Max('id'))
+        if bounds['lo'] is None:
+            self.stdout.write(self.style.WARNING('No checks to backfill'))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilling {', '.join(dimensions)} for check ids {bounds['lo']}..{bounds['hi']}")
+        )
+
+        totals = dict.fromkeys(dimensions, 0)
+        for start_id in range(bounds['lo'], bounds['hi'] + 1, batch_size):
+            end_id = start_id + batch_size
+            with transaction.atomic():
+                for dimension in dimensions:
+                    totals[dimension] += backfill_dimension(dimension, start_id, end_id)
+            self.stdout.write(f'  ids {start_id}..{end_id - 1} done')
+
+        for dimension, count in totals.items():
+            self.stdout.write(self.style.SUCCESS(f'✓ {dimension}: {count} checks updated'))
+        logger.info(f'Check dimension backfill finished: {totals}')
@@ -0,0 +1,124 @@
+"""
+Management command to benchmark the major API endpoints.
+
+Times statistics, analytics summary, the violation dashboard/detail/
+insights views, the manager report and the check list (see
+expeditor_app.benchmark) and writes a JSON report. With --sizes and
+--generate the dataset is topped up with synthetic checks to each size
+in turn (e.g. 100k, 1M, 10M) and benchmarked at every step; --compare
+prints the change against an earlier report.
+"""
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from expeditor_app.benchmark import BENCHMARK_ENDPOINTS, compare, environment, run_benchmark
+from expeditor_app.models import Check
+from expeditor_app.synthetic import parse_count
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the major API endpoints and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            help='Comma-separated dataset sizes to benchmark at, e.g. 100k,1M,10M (default: current data)',
+        )
+        parser.add_argument(
+            '--generate',
+            action='store_true',
+            help='Top up the data with synthetic checks to reach each size',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed requests per endpoint, after one warm-up (default: 5)',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=list(BENCHMARK_ENDPOINTS),
+            help='Only benchmark this endpoint (repeatable)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Report path (default: benchmark-<timestamp>.json)',
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            help='Earlier report to compare the medians with',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed for generated data (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        try:
+            sizes = sorted(parse_count(size) for size in options['sizes'].split(',')) if options['sizes'] else [None]
+        except ValueError:
+            raise CommandError(f"Invalid --sizes value: {options['sizes']}")
+
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'environment': environment(),
+            'repeat': options['repeat'],
+            'sizes': {},
+        }
+        for size in sizes:
+            current = Check.objects.count()
+            if size is not None and current < size:
+                if not options['generate']:
+                    raise CommandError(f'Only {current} checks for size {size}; use --generate to top up')
+                call_command(
+                    'generate_synthetic_checks', checks=str(size - current), seed=options['seed'] + len(report['sizes']),
+                    stdout=self.stdout,
+                )
+            elif size is not None and current > size:
+                self.stdout.write(self.style.WARNING(f'{current} checks already, more than {size}'))
+
+            label = str(size if size is not None else Check.objects.count())
+            self.stdout.write(self.style.SUCCESS(f'Benchmarking at {label} checks'))
+
+            def progress(name, result):
+                self.stdout.write(
+                    f"  {name}: median {result['median_ms']}ms, p95 {result['p95_ms']}ms, "
+                    f"{result['queries']} queries, HTTP {result['status']}"
+                )
+
+            report['sizes'][label] = run_benchmark(options['repeat'], options['endpoint'], progress)
+
+        output = options['output'] or f"benchmark-{timezone.now():%Y%m%d-%H%M%S}.json"
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        self.stdout.write(self.style.SUCCESS(f'✓ Report written to {output}'))
+
+        if previous:
+            rows = compare(previous, report)
+            if not rows:
+                self.stdout.write(self.style.WARNING('No sizes in common with the earlier report'))
+            for label, name, old, new, ratio in rows:
+                style = self.style.ERROR if ratio > 1.2 else self.style.SUCCESS if ratio < 0.8 else str
+                self.stdout.write(style(f'  {label} {name}: {old}ms -> {new}ms ({ratio:.2f}x)'))
+        logger.info(f'API benchmark written to {output}')
@@ -0,0 +1,132 @@
+"""
+Management command to verify the stated accuracy of the distance kernels.
+
+Samples random point pairs up to EQUIRECTANGULAR_MAX_METERS apart at
+latitudes within ±60° (plus the worst corners: ±60° latitude, the full
+distance, east-west) and exits with an error when the equirectangular
+kernels differ from haversine by more than EQUIRECTANGULAR_ERROR_METERS,
+or when GridIndex radius queries return other points than a full
+haversine scan. Needs no database; intended for CI next to
+check_query_plans and check_query_budgets.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from expeditor_app.geo import (
+    EARTH_RADIUS_METERS, EQUIRECTANGULAR_ERROR_METERS, EQUIRECTANGULAR_MAX_METERS,
+    equirectangular, equirectangular_to_many, haversine, haversine_to_many,
+)
+from expeditor_app.geo_index import GridIndex
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAX_LATITUDE = 60
+
+
+def destinations(lats, lons, bearings, distances):
+    """Points at the given bearings (radians) and distances (meters) from
+    the points, on the haversine sphere."""
+    lat1, lon1 = np.radians(lats), np.radians(lons)
+    angle = np.asarray(distances) / EARTH_RADIUS_METERS
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(angle) + np.cos(lat1) * np.sin(angle) * np.cos(bearings))
+    lon2 = lon1 + np.arctan2(
+        np.sin(bearings) * np.sin(angle) * np.cos(lat1),
+        np.cos(angle) - np.sin(lat1) * np.sin(lat2),
+    )
+    return np.degrees(lat2), np.degrees(lon2)
+
+
+class Command(BaseCommand):
+    help = 'Fail if the equirectangular distance kernels exceed their stated error bound'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=2000000,
+            help='Random point pairs to compare (default: 2000000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        samples = options['samples']
+        if samples < 1:
+            raise CommandError('--samples must be at least 1')
+        rng = np.random.default_rng(options['seed'])
+        failures = []
+
+        # Random pairs, then the corners where the approximation is worst
+        lats = np.concatenate([rng.uniform(-MAX_LATITUDE, MAX_LATITUDE, samples), [MAX_LATITUDE, -MAX_LATITUDE] * 2])
+        lons = np.concatenate([rng.uniform(-180, 180, samples), [0.0] * 4])
+        bearings = np.concatenate([rng.uniform(0, 2 * np.pi, samples), [np.pi / 2, np.pi / 2, 0.0, 0.0]])
+        distances = np.concatenate([
+            rng.uniform(0, EQUIRECTANGULAR_MAX_METERS, samples), [EQUIRECTANGULAR_MAX_METERS] * 4
+        ])
+        other_lats, other_lons = destinations(lats, lons, bearings, distances)
+
+        # Pairs whose second point went past ±60° are outside the stated range
+        inside = np.abs(other_lats) <= MAX_LATITUDE
+        lats, lons, other_lats, other_lons = lats[inside], lons[inside], other_lats[inside], other_lons[inside]
+
+        # The vector kernels broadcast, so arrays of origins give pairwise distances
+        exact = haversine_to_many(lats, lons, other_lats, other_lons)
+        approximate = equirectangular_to_many(lats, lons, other_lats, other_lons)
+        errors = np.abs(approximate - exact)
+        worst = int(np.argmax(errors))
+        if errors[worst] > EQUIRECTANGULAR_ERROR_METERS:
+            failures.append('equirectangular_to_many')
+            self.stdout.write(self.style.ERROR(
+                f'✗ equirectangular_to_many: {errors[worst]:.6f} m off at '
+                f'({lats[worst]:.5f}, {lons[worst]:.5f}) -> ({other_lats[worst]:.5f}, {other_lons[worst]:.5f})'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ equirectangular_to_many: max error {errors[worst] * 1e6:.1f} µm over {len(errors)} pairs '
+                f'(bound {EQUIRECTANGULAR_ERROR_METERS * 1000:g} mm)'
+            ))
+
+        # The scalar kernels on a subset
+        scalar_errors = [
+            abs(equirectangular(*pair) - haversine(*pair))
+            for pair in zip(lats[:10000], lons[:10000], other_lats[:10000], other_lons[:10000])
+        ]
+        if max(scalar_errors) > EQUIRECTANGULAR_ERROR_METERS:
+            failures.append('equirectangular')
+            self.stdout.write(self.style.ERROR(f'✗ equirectangular: {max(scalar_errors):.6f} m off'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ equirectangular: max error {max(scalar_errors) * 1e6:.1f} µm'))
+
+        if not self._grid_matches_scan(rng):
+            failures.append('GridIndex')
+            self.stdout.write(self.style.ERROR('✗ GridIndex: radius queries differ from a full haversine scan'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ GridIndex: radius queries match a full haversine scan'))
+
+        if failures:
+            logger.warning(f'Geo kernel check failed for: {failures}')
+            raise CommandError(f'{len(failures)} geo kernel checks failed')
+        self.stdout.write(self.style.SUCCESS('✓ Distance kernels are within their stated error bound'))
+
+    def _grid_matches_scan(self, rng, points=2000):
+        """GridIndex.near against a full scan, for radii on both kernels;
+        pairs within the error bound of the radius may go either way."""
+        for radius in (15, 300, EQUIRECTANGULAR_MAX_METERS, 1500):
+            for center_lat in (41.3, -MAX_LATITUDE + 1, MAX_LATITUDE - 1):
+                spread = 3 * radius / 111320
+                lats = center_lat + rng.uniform(-spread, spread, points)
+                lons = 69.2 + rng.uniform(-spread, spread, points) / np.cos(np.radians(center_lat))
+                index = GridIndex(radius, zip(range(points), lats, lons))
+                for query in range(0, points, 50):
+                    found = {key for key, _ in index.near(lats[query], lons[query])}
+                    distances = haversine_to_many(lats[query], lons[query], lats, lons)
+                    inside = set(np.flatnonzero(distances < radius - EQUIRECTANGULAR_ERROR_METERS).tolist())
+                    outside = set(np.flatnonzero(distances > radius + EQUIRECTANGULAR_ERROR_METERS).tolist())
+                    if not inside <= found or found & outside:
+                        return False
+        return True
@@ -0,0 +1,110 @@
+"""
+Management command to enforce per-endpoint SQL query budgets.
+
+Seeds the synthetic dataset from expeditor_app.query_budgets at a small
+and a large scale (inside transactions that are rolled back), requests
+every budgeted URL as a superuser at both, and exits with an error when
+a request runs more queries than its budget, when the count grows with
+the dataset (an N+1 loop), or when a route in urls.py has no budget.
+The cache is disabled while measuring, so the counts are cold-cache.
+Intended for CI against a migrated database.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from contextlib import ExitStack
+from expeditor_app.query_budgets import DETAIL_MODELS, ENDPOINT_BUDGETS, missing_budgets, seed
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Fail if an API endpoint goes over its query budget or its query count grows with the data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--large-scale',
+            type=int,
+            default=4,
+            help='Size of the large dataset relative to the small one (default: 4)',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            help='Only check this URL name (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        large_scale = options['large_scale']
+        if large_scale < 2:
+            raise CommandError('--large-scale must be at least 2')
+
+        names = options['endpoint'] or list(ENDPOINT_BUDGETS)
+        unknown = [name for name in names if name not in ENDPOINT_BUDGETS]
+        if unknown:
+            raise CommandError(f"No budget for: {', '.join(unknown)}")
+
+        failures = []
+        for name in missing_budgets():
+            failures.append(name)
+            self.stdout.write(self.style.ERROR(f'✗ {name}: no query budget in expeditor_app/query_budgets.py'))
+
+        # Seeded rows are uncommitted, so reads must not go to a replica
+        with override_settings(CACHES=DUMMY_CACHES, DATABASE_ROUTERS=[], ALLOWED_HOSTS=['testserver']):
+            small = self._measure(names, 1)
+            large = self._measure(names, large_scale)
+
+        for name in names:
+            budget = ENDPOINT_BUDGETS[name][1]
+            (small_count, small_status), (large_count, large_status) = small[name], large[name]
+            line = f'{name}: {small_count} -> {large_count} queries (budget {budget})'
+            problems = []
+            if large_status >= 400 or small_status >= 400:
+                problems.append(f'HTTP {small_status}/{large_status}')
+            if max(small_count, large_count) > budget:
+                problems.append('over budget')
+            if large_count > small_count:
+                problems.append('grows with the data')
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {line}: {', '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {line}'))
+
+        if failures:
+            logger.warning(f'Query budget check failed for: {failures}')
+            raise CommandError(f'{len(failures)} endpoints failed their query budget')
+        self.stdout.write(self.style.SUCCESS(f'✓ All {len(names)} endpoints are within their query budgets'))
+
+    def _measure(self, names, scale):
+        """{url name: (query count, status code)} against a dataset of the given scale."""
+        results = {}
+        with transaction.atomic():
+            values = seed(scale)
+            user = get_user_model().objects.create_superuser(
+                username='query-budget', email='query-budget@example.com', password=None,
+            )
+            client = Client()
+            client.force_login(user)
+
+            for name in names:
+                params, _ = ENDPOINT_BUDGETS[name]
+                params = {key: value.format(**values) for key, value in params.items()}
+                kwargs = {}
+                if name in DETAIL_MODELS:
+                    kwargs['pk'] = DETAIL_MODELS[name].objects.order_by('pk').values_list('pk', flat=True).first()
+                url = reverse(name, kwargs=kwargs)
+
+                with ExitStack() as stack:
+                    captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                    response = client.get(url, params)
+                results[name] = (sum(len(c.captured_queries) for c in captured), response.status_code)
+            transaction.set_rollback(True)
+        return results
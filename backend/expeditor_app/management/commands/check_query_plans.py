@@ -0,0 +1,139 @@
+"""
+Management command to verify that the hot endpoints are served by indexes.
+
+Seeds synthetic checks (see expeditor_app.query_plans; inside a
+transaction that is rolled back), requests every endpoint in
+PLANNED_ENDPOINTS as a superuser, captures the SQL it runs and EXPLAINs
+each statement without planner overrides. Exits with an error when an
+endpoint fails, when a plan reads a large app table without an index
+condition (a sequential scan or a full index walk) to keep only a few of
+its rows, or when a one-month query on a partitioned table is not pruned
+to one partition. Intended for CI against a migrated PostgreSQL
+database, and after schema changes.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from expeditor_app.benchmark import DUMMY_CACHES, benchmark_context
+from expeditor_app.partitioning import PARTITION_KEYS, is_partitioned
+from expeditor_app.query_plans import (
+    MIN_TABLE_ROWS, PLANNED_ENDPOINTS, SEED_CHECKS, capture_selects, describe, explain, fallback_scans, month_query,
+    scanned_partitions,
+)
+from expeditor_app.synthetic import generate_checks, parse_count
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Fail if a hot endpoint runs a query that scans a large table for a few rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checks',
+            type=str,
+            default=str(SEED_CHECKS),
+            help=f'Synthetic checks to seed before planning, 0 to plan against the current data (default: {SEED_CHECKS})',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=MIN_TABLE_ROWS,
+            help=f'Smallest table that must not be scanned in full for a few rows (default: {MIN_TABLE_ROWS})',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=list(PLANNED_ENDPOINTS),
+            help='Only check this endpoint (repeatable)',
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the plan tree of every query',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans can only be checked on PostgreSQL')
+        try:
+            checks = parse_count(options['checks'])
+        except ValueError:
+            raise CommandError(f"Invalid --checks value: {options['checks']}")
+
+        names = options['endpoint'] or list(PLANNED_ENDPOINTS)
+        # Seeded rows are uncommitted, so reads must not go to a replica
+        with override_settings(CACHES=DUMMY_CACHES, DATABASE_ROUTERS=[], ALLOWED_HOSTS=['testserver']), \
+                transaction.atomic():
+            if checks:
+                # As many days as the hot tables keep, so a date range is as selective as in production
+                days = settings.CHECK_ARCHIVE_AFTER_MONTHS * 30
+                self.stdout.write(f'Seeding {checks} synthetic checks over {days} days...')
+                generate_checks(checks, days=days, seed=1)
+            failures = self._check_endpoints(names, options['min_rows'], options['verbose_plans'])
+            failures += self._check_pruning(options['verbose_plans'])
+            transaction.set_rollback(True)
+
+        if failures:
+            logger.warning(f'Query plan check failed for: {failures}')
+            raise CommandError(f'{len(failures)} query plan checks failed')
+        self.stdout.write(self.style.SUCCESS(f'✓ All {len(names)} endpoints use indexes and partitions are pruned'))
+
+    def _check_endpoints(self, names, min_rows, verbose):
+        failures = []
+        context = benchmark_context()
+        user = get_user_model().objects.create_superuser(
+            username='query-plans', email='query-plans@example.com', password=None,
+        )
+        client = Client()
+        client.force_login(user)
+
+        for name in names:
+            url_name, params = PLANNED_ENDPOINTS[name]
+            params = {key: value.format(**context) for key, value in params.items()}
+            response, statements = capture_selects(client, reverse(url_name), params)
+            if response.status_code >= 400:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: HTTP {response.status_code}'))
+                continue
+
+            plans = [
+                (sql, plan, fallback_scans(plan, min_rows))
+                for sql, plan in ((sql, explain(sql, sql_params)) for sql, sql_params in statements)
+            ]
+            scanned = sorted({rel for _, _, relations in plans for rel in relations})
+            if scanned:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name}: full scan of {', '.join(scanned)} for a few rows"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}: {len(plans)} queries'))
+
+            for sql, plan, relations in plans:
+                if relations or verbose:
+                    self.stdout.write(f'    {sql[:200]}')
+                    for line in describe(plan):
+                        self.stdout.write(f'      {line}')
+        return failures
+
+    def _check_pruning(self, verbose):
+        failures = []
+        for model in PARTITION_KEYS:
+            if not is_partitioned(model):
+                continue
+            name = f'{model._meta.db_table} partition pruning'
+            plan = explain(*month_query(model).query.sql_with_params())
+            partitions = scanned_partitions(plan, model)
+            if len(partitions) > 1:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name}: one month reads {', '.join(partitions)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+            if len(partitions) > 1 or verbose:
+                for line in describe(plan):
+                    self.stdout.write(f'    {line}')
+        return failures
@@ -0,0 +1,125 @@
+"""
+Management command to load synthetic checks for load testing.
+
+Generates N Check / CheckDetail rows with realistic distributions (see
+expeditor_app.synthetic) and inserts them with COPY. Afterwards the
+expeditor KPIs of the generated days are rebuilt; run
+analyze_check_patterns to turn the planted violation clusters into
+CheckAnalytics rows. Never run this against production data.
+"""
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from expeditor_app.synthetic import delete_synthetic, generate_checks, parse_count, synthetic_count
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic checks and check details (COPY on PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checks',
+            type=str,
+            help='Number of checks to generate, e.g. 100000, 100k, 1M',
+        )
+        parser.add_argument(
+            '--filials',
+            type=int,
+            default=5,
+            help='Number of synthetic filials (default: 5)',
+        )
+        parser.add_argument(
+            '--expeditors-per-filial',
+            type=int,
+            default=20,
+            help='Expeditors per filial (default: 20)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Spread the checks over the last N days (default: 90)',
+        )
+        parser.add_argument(
+            '--violation-rate',
+            type=float,
+            default=0.03,
+            help='Share of expeditor-days with a planted violation cluster (default: 0.03)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed, for reproducible datasets',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Rows per COPY batch and transaction (default: 50000)',
+        )
+        parser.add_argument(
+            '--skip-kpis',
+            action='store_true',
+            help='Do not rebuild the expeditor KPIs of the generated days',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Delete all synthetic rows instead of generating',
+        )
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            deleted = delete_synthetic()
+            self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} synthetic checks'))
+            return
+
+        if not options['checks']:
+            raise CommandError('--checks is required')
+        try:
+            total = parse_count(options['checks'])
+        except ValueError:
+            raise CommandError(f"Invalid --checks value: {options['checks']}")
+        if options['days'] < 1 or options['filials'] < 1 or options['expeditors_per_filial'] < 1:
+            raise CommandError('--days, --filials and --expeditors-per-filial must be positive')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generating {total} checks for {options['filials'] * options['expeditors_per_filial']} "
+            f"expeditors over {options['days']} days"
+        ))
+        started = time.monotonic()
+
+        def progress(written, target):
+            rate = written / max(time.monotonic() - started, 0.001)
+            self.stdout.write(f'  {written}/{target} checks ({rate:.0f}/s)')
+
+        written, first_day, last_day = generate_checks(
+            total,
+            filials=options['filials'],
+            expeditors_per_filial=options['expeditors_per_filial'],
+            days=options['days'],
+            violation_rate=options['violation_rate'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generated {written} checks in {time.monotonic() - started:.1f}s '
+            f'({synthetic_count()} synthetic checks in total)'
+        ))
+
+        if not options['skip_kpis']:
+            call_command(
+                'rebuild_expeditor_kpis',
+                start_date=first_day.isoformat(),
+                end_date=last_day.isoformat(),
+                stdout=self.stdout,
+            )
+        self.stdout.write(
+            f'Run "python manage.py analyze_check_patterns --start-date {first_day} --end-date {last_day}" '
+            f'to create analytics for the planted violations'
+        )
@@ -0,0 +1,104 @@
+"""
+Management command for the monthly partitions of Check and CheckDetail.
+
+  --convert            replace the tables with partitioned copies (once,
+                       in a maintenance window)
+  --months-ahead N     create partitions up to N months ahead (this is
+                       also what the MAINTAIN_PARTITIONS task does)
+  --detach-before M    detach the partitions of months before YYYY-MM
+  --list               show the partitions
+
+Only works on PostgreSQL.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from datetime import datetime
+from expeditor_app.partitioning import (
+    DEFAULT_MONTHS_AHEAD, PARTITION_KEYS, convert_to_partitioned, detach_partitions_before,
+    ensure_partitions, is_partitioned, list_partitions,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLES = {model.__name__.lower(): model for model in PARTITION_KEYS}
+
+
+class Command(BaseCommand):
+    help = 'Create, convert, list and detach monthly Check/CheckDetail partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            type=str,
+            choices=list(TABLES),
+            help='Only this table (default: check and checkdetail)',
+        )
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert the tables to partitioned tables (locks out writes while copying)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=DEFAULT_MONTHS_AHEAD,
+            help=f'Create partitions this many months ahead (default: {DEFAULT_MONTHS_AHEAD})',
+        )
+        parser.add_argument(
+            '--detach-before',
+            type=str,
+            help='Detach partitions of months before this one (YYYY-MM)',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List partitions and exit',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL')
+
+        models = [TABLES[options['table']]] if options.get('table') else list(PARTITION_KEYS)
+        detach_before = None
+        if options.get('detach_before'):
+            try:
+                detach_before = datetime.strptime(options['detach_before'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('Invalid month format. Use YYYY-MM')
+
+        for model in models:
+            table = model._meta.db_table
+
+            if options['list']:
+                self.stdout.write(self.style.SUCCESS(f'{table}:'))
+                for name, bound in list_partitions(model):
+                    self.stdout.write(f'  {name}: {bound}')
+                continue
+
+            if options['convert']:
+                if is_partitioned(model):
+                    self.stdout.write(self.style.WARNING(f'{table} is already partitioned'))
+                else:
+                    self.stdout.write(f'Converting {table}...')
+                    copied = convert_to_partitioned(model, months_ahead=options['months_ahead'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✓ {table}: {copied} rows copied; old table kept as {table}_unpartitioned'
+                    ))
+
+            if not is_partitioned(model):
+                self.stdout.write(self.style.WARNING(f'{table} is not partitioned; run with --convert first'))
+                continue
+
+            created = ensure_partitions(model, months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'✓ {table}: {created} partitions created'))
+
+            if detach_before:
+                detached = detach_partitions_before(model, detach_before)
+                self.stdout.write(self.style.SUCCESS(f'✓ {table}: detached {len(detached)} partitions'))
+                for name in detached:
+                    self.stdout.write(f'  {name}')
+
+        logger.info(f'Partition maintenance finished for {[m._meta.db_table for m in models]}')
@@ -0,0 +1,87 @@
+"""
+Management command to rebuild the per-expeditor daily KPI table.
+
+The importer and the pattern analysis task keep ExpeditorDailyKPI up to
+date incrementally; this command recomputes a date range from scratch,
+e.g. after the first deploy or after backfill_check_dimensions.
+
+A run from the first check (no --start-date, or one on or before the
+first check's day) leaves the kpi.KPI_BACKFILL_KEY marker; until it
+exists, expeditor counts and the statistics leaderboard are counted from
+Check instead of the KPI rows. Run it once after deploying the KPI table.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from datetime import datetime, timedelta
+from expeditor_app.kpi import KPI_BACKFILL_KEY, expeditor_days_between, refresh_expeditor_days
+from expeditor_app.models import AnalysisWatermark, Check, ExpeditorDailyKPI
+from expeditor_app.utils import local_day_bounds
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-expeditor daily KPIs for a date range'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            help='First day to rebuild (YYYY-MM-DD, default: first check)',
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            help='Last day to rebuild (YYYY-MM-DD, default: today)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date = self._parse_date(options.get('start_date'))
+            end_date = self._parse_date(options.get('end_date'))
+        except ValueError:
+            raise CommandError('Invalid date format. Use YYYY-MM-DD')
+
+        bounds = Check.objects.aggregate(first=Min('yetkazilgan_vaqti'), last=Max('yetkazilgan_vaqti'))
+        if start_date is None or end_date is None:
+            if bounds['first'] is None:
+                self.stdout.write(self.style.WARNING('No checks found'))
+                return
+            start_date = start_date or timezone.localtime(bounds['first']).date()
+            end_date = end_date or max(timezone.localtime(bounds['last']).date(), timezone.localdate())
+        # The whole history up to today: readers may use the KPI rows from now on
+        full_history = (
+            (bounds['first'] is None or start_date <= timezone.localtime(bounds['first']).date())
+            and end_date >= timezone.localdate()
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilding expeditor KPIs from {start_date} to {end_date}'))
+
+        total_rows = 0
+        day = start_date
+        while day <= end_date:
+            start, end = local_day_bounds(day)
+            with transaction.atomic():
+                # Drop rows of expeditors that no longer have checks that day
+                ExpeditorDailyKPI.objects.filter(date=day).delete()
+                rows = refresh_expeditor_days(expeditor_days_between(start, end - timedelta(microseconds=1)))
+            total_rows += rows
+            if rows:
+                self.stdout.write(f'  {day}: {rows} expeditors')
+            day += timedelta(days=1)
+
+        if full_history:
+            AnalysisWatermark.objects.update_or_create(
+                key=KPI_BACKFILL_KEY, defaults={'processed_until': local_day_bounds(end_date)[1]}
+            )
+            self.stdout.write(self.style.SUCCESS('✓ KPI rows cover the whole history; readers now use them'))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {total_rows} expeditor-day rows'))
+        logger.info(f'Expeditor KPI rebuild {start_date}..{end_date}: {total_rows} rows')
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
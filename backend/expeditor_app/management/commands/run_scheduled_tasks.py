@@ -27,6 +27,10 @@ class Command(BaseCommand):
                 ScheduledTask.TASK_SCAN_PROBLEM_CHECKS,
                 ScheduledTask.TASK_SEND_ANALYTICS,
                 ScheduledTask.TASK_ANALYZE_PATTERNS,
+                ScheduledTask.TASK_MAINTAIN_PARTITIONS,
+                ScheduledTask.TASK_ARCHIVE_CHECKS,
+                ScheduledTask.TASK_ANALYZE_DIRTY,
+                ScheduledTask.TASK_BACKFILL_PATTERNS,
             ]
         )
         parser.add_argument(
@@ -1,7 +1,6 @@
 """
 Manager Report Views - Xatoliklarni aniqlash va statistika
 """
-import math
 import io
 from collections import defaultdict
 from django.db.models import Q, Count, Sum, F, FloatField, IntegerField
@@ -14,6 +13,10 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from datetime import datetime, timedelta
 from .models import Check, CheckDetail, Sklad, Ekispiditor, EmailRecipient, EmailConfig
+from .dimensions import filter_by_dimension_name
+from .db_router import ReplicaReadMixin
+from .geo import haversine
+from .geo_index import GridIndex
 from django.core.mail import send_mail, EmailMessage
 from django.conf import settings
 
@@ -25,22 +28,10 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     """Haversine formula bilan masofani metrlarda hisoblash"""
     if not all([lat1, lon1, lat2, lon2]):
         return float('inf')
-    
-    # Radianlarga o'tkazish
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    # Yer radiusi metrlarda
-    r = 6371000
-    return c * r
+    return haversine(lat1, lon1, lat2, lon2)
 
 
-class ManagerReportView(APIView):
+class ManagerReportView(ReplicaReadMixin, APIView):
     """
     Managerlar uchun umumiy xisobot API
     Xatoliklar turlari:
@@ -88,12 +79,11 @@ class ManagerReportView(APIView):
         
         # Filial filter
         if filial_id:
-            expeditors = Ekispiditor.objects.filter(filial_id=filial_id).values_list('ekispiditor_name', flat=True)
-            checks_query = checks_query.filter(ekispiditor__in=expeditors)
+            checks_query = checks_query.filter(ekispiditor_ref__filial_id=filial_id)
         
         # Project filter
         if project:
-            checks_query = checks_query.filter(project=project)
+            checks_query = filter_by_dimension_name(checks_query, 'project', project, lookup='exact')
         
         # Faqat koordinatalari bor checklarni olish
         checks = checks_query.filter(
@@ -108,18 +98,22 @@ class ManagerReportView(APIView):
         for e in filials:
             expeditor_filial_map[e.ekispiditor_name] = e.filial.filial_name if e.filial else "Biriktirilmagan"
         
-        # CheckDetail bilan birga olish
+        # CheckDetail bilan birga olish (bitta so'rovda)
+        details = {
+            detail.check_id: detail
+            for detail in CheckDetail.objects.filter(check_id__in=checks.values('check_id'))
+        }
         checks_with_details = []
         for check in checks:
-            try:
-                detail = CheckDetail.objects.get(check_id=check.check_id)
+            detail = details.get(check.check_id)
+            if detail is not None:
                 checks_with_details.append({
                     'check': check,
                     'lat': detail.check_lat or check.check_lat,
                     'lon': detail.check_lon or check.check_lon,
                     'detail': detail
                 })
-            except CheckDetail.DoesNotExist:
+            else:
                 if check.check_lat and check.check_lon:
                     checks_with_details.append({
                         'check': check,
@@ -188,34 +182,39 @@ class ManagerReportView(APIView):
             if len(expeditor_checks) < 2:
                 continue
             
-            # Koordinatalar bo'yicha guruhlash
+            # Koordinatalar bo'yicha guruhlash: guruh markazlari grid indexda,
+            # check markazi radius ichidagi birinchi guruhga qo'shiladi
             location_groups = []
+            group_sums = []
+            centers = GridIndex(radius_meters)
             for check_item in expeditor_checks:
                 lat = check_item['lat']
                 lon = check_item['lon']
+                if not lat or not lon:
+                    # Koordinatasiz check hech qaysi guruhga tushmaydi
+                    continue
                 
                 # Mavjud guruhga qo'shish yoki yangi guruh yaratish
-                added = False
-                for group in location_groups:
-                    # Guruh markaziga masofani hisoblash
-                    center_lat = sum(c['lat'] for c in group) / len(group)
-                    center_lon = sum(c['lon'] for c in group) / len(group)
-                    distance = calculate_distance(lat, lon, center_lat, center_lon)
-                    
-                    if distance <= radius_meters:
-                        group.append(check_item)
-                        added = True
-                        break
-                
-                if not added:
+                nearby = centers.near(lat, lon)
+                if nearby:
+                    g = nearby[0][0]
+                    group_sums[g][0] += lat
+                    group_sums[g][1] += lon
+                    group = location_groups[g]
+                    old_lat, old_lon = group_sums[g][2], group_sums[g][3]
+                    group.append(check_item)
+                    group_sums[g][2] = group_sums[g][0] / len(group)
+                    group_sums[g][3] = group_sums[g][1] / len(group)
+                    centers.move(g, old_lat, old_lon, group_sums[g][2], group_sums[g][3])
+                else:
+                    centers.add(len(location_groups), lat, lon)
                     location_groups.append([check_item])
+                    # [lat yig'indisi, lon yig'indisi, markaz lat, markaz lon]
+                    group_sums.append([lat, lon, lat, lon])
             
             # 2 yoki ko'p checklari bo'lgan guruhlarni violations sifatida qo'shish
-            for group in location_groups:
+            for group, (_, _, center_lat, center_lon) in zip(location_groups, group_sums):
                 if len(group) >= 2:
-                    center_lat = sum(c['lat'] for c in group) / len(group)
-                    center_lon = sum(c['lon'] for c in group) / len(group)
-                    
                     violations.append({
                         'type': 'same_location',
                         'expeditor': expeditor,
@@ -248,25 +247,26 @@ class ManagerReportView(APIView):
         # Barcha skladlarni olish
         sklads = Sklad.objects.filter(lat__isnull=False, lon__isnull=False).exclude(lat=0, lon=0)
         
+        # Checklar grid indexda: har bir sklad uchun faqat atrofidagi kataklar tekshiriladi
+        index = GridIndex(radius_meters, (
+            (i, item['lat'], item['lon'])
+            for i, item in enumerate(checks_with_details)
+            if item['lat'] and item['lon']
+        ))
+        
         for sklad in sklads:
-            sklad_checks = []
-            
-            for item in checks_with_details:
-                distance = calculate_distance(
-                    sklad.lat, sklad.lon,
-                    item['lat'], item['lon']
-                )
-                
-                if distance <= radius_meters:
-                    sklad_checks.append(item)
+            sklad_checks = [
+                (checks_with_details[i], distance)
+                for i, distance in index.near(sklad.lat, sklad.lon)
+            ]
             
             if len(sklad_checks) >= 2:
                 # Expeditorlar bo'yicha guruhlash
                 expeditor_groups = defaultdict(list)
-                for check_item in sklad_checks:
+                for check_item, distance in sklad_checks:
                     expeditor = check_item['check'].ekispiditor
                     if expeditor:
-                        expeditor_groups[expeditor].append(check_item)
+                        expeditor_groups[expeditor].append((check_item, distance))
                 
                 # Har bir expeditor uchun violation yaratish
                 for expeditor, checks in expeditor_groups.items():
@@ -288,12 +288,9 @@ class ManagerReportView(APIView):
                                     'time': item['check'].yetkazilgan_vaqti.isoformat() if item['check'].yetkazilgan_vaqti else None,
                                     'project': item['check'].project,
                                     'total_sum': item['detail'].total_sum if item['detail'] else 0,
-                                    'distance_from_sklad': calculate_distance(
-                                        sklad.lat, sklad.lon,
-                                        item['lat'], item['lon']
-                                    ),
+                                    'distance_from_sklad': distance,
                                 }
-                                for item in checks
+                                for item, distance in checks
                             ]
                         })
         
@@ -469,7 +466,7 @@ class ManagerReportView(APIView):
         }
 
 
-class ManagerReportPDFView(APIView):
+class ManagerReportPDFView(ReplicaReadMixin, APIView):
     """PDF export uchun endpoint"""
     permission_classes = [IsAuthenticated]
     
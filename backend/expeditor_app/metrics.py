@@ -0,0 +1,237 @@
+"""
+Request metrics in Prometheus text format.
+
+MetricsMiddleware records, per resolved URL name: request counts and a
+latency histogram, DB query count and time, cache hits and misses, and
+response bytes. Counters are process-local and lock-free on the hot
+path: every thread writes only its own dict, and readers sum them.
+
+Gunicorn runs several worker processes, so each process also writes a
+snapshot of its counters to METRICS_DIR/<pid>.json (at most every
+FLUSH_INTERVAL seconds); /api/metrics/ adds up the snapshots of the
+live workers.
+
+Requests slower than SLOW_REQUEST_SECONDS are logged with their most
+expensive SQL statements.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+FLUSH_INTERVAL = 10
+SLOW_QUERY_LOG_LIMIT = 5
+
+_local = threading.local()
+_thread_counters = []
+_register_lock = threading.Lock()
+_last_flush = 0.0
+
+# Per-request tally, set by the middleware (see RequestMetrics)
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+def _counters():
+    """This thread's counters dict, registered on first use."""
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = defaultdict(float)
+        # Only thread registration takes the lock, not the increments
+        with _register_lock:
+            _thread_counters.append(counters)
+    return counters
+
+
+class RequestMetrics:
+    """What one request did: DB queries and cache lookups."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.queries = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.query_time += duration
+            self.queries.append((duration, sql))
+
+
+def record_request(view, method, status, duration, response_bytes, request_metrics):
+    counters = _counters()
+    counters[('requests', view, method, f'{status // 100}xx')] += 1
+    for le in LATENCY_BUCKETS:
+        if duration <= le:
+            counters[('latency_bucket', view, le)] += 1
+    counters[('latency_sum', view)] += duration
+    counters[('latency_count', view)] += 1
+    counters[('response_bytes', view)] += response_bytes
+    counters[('db_queries', view)] += request_metrics.query_count
+    counters[('db_seconds', view)] += request_metrics.query_time
+    counters[('cache', view, 'hit')] += request_metrics.cache_hits
+    counters[('cache', view, 'miss')] += request_metrics.cache_misses
+
+    if duration >= settings.SLOW_REQUEST_SECONDS:
+        top = sorted(request_metrics.queries, reverse=True)[:SLOW_QUERY_LOG_LIMIT]
+        statements = ''.join(f'\n  {seconds * 1000:.1f}ms {sql[:500]}' for seconds, sql in top)
+        logger.warning(
+            f'Slow request {method} {view}: {duration:.2f}s, '
+            f'{request_metrics.query_count} queries in {request_metrics.query_time:.2f}s{statements}'
+        )
+
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def process_snapshot():
+    """Sum of this process's thread counters."""
+    totals = defaultdict(float)
+    for counters in list(_thread_counters):
+        for key, value in list(counters.items()):
+            totals[key] += value
+    return totals
+
+
+def _snapshot_path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def flush():
+    """Write this process's counters where the other workers can read them."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    try:
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = _snapshot_path(os.getpid())
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump([[list(key), value] for key, value in process_snapshot().items()], f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f'Failed to write metrics snapshot: {e}')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Counters of all live worker processes."""
+    flush()
+    totals = defaultdict(float)
+    try:
+        names = os.listdir(settings.METRICS_DIR)
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        pid = int(name[:-5]) if name[:-5].isdigit() else None
+        path = os.path.join(settings.METRICS_DIR, name)
+        if pid is None or not _pid_alive(pid):
+            # Counters of exited workers are dropped, like a counter reset
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                for key, value in json.load(f):
+                    if key[0] == 'latency_bucket':
+                        key[2] = float(key[2])
+                    totals[tuple(key)] += value
+        except (OSError, ValueError):
+            continue
+    return totals
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{str(value).replace(chr(34), "")}"' for name, value in labels.items())
+
+
+def _le(value):
+    return '+Inf' if value == float('inf') else repr(value)
+
+
+METRIC_HELP = [
+    ('expeditor_http_requests_total', 'counter', 'Requests by URL name, method and status class'),
+    ('expeditor_http_request_duration_seconds', 'histogram', 'Request latency by URL name'),
+    ('expeditor_http_response_bytes_total', 'counter', 'Response body bytes by URL name'),
+    ('expeditor_db_queries_total', 'counter', 'Database queries by URL name'),
+    ('expeditor_db_query_seconds_total', 'counter', 'Time spent in database queries by URL name'),
+    ('expeditor_cache_requests_total', 'counter', 'Cache lookups by URL name and result'),
+]
+
+
+def render(totals):
+    """Prometheus text exposition of collected counters."""
+    lines = {name: [f'# HELP {name} {text}', f'# TYPE {name} {kind}'] for name, kind, text in METRIC_HELP}
+    # Numbers (histogram bounds) sort numerically, labels alphabetically
+    for key in sorted(totals, key=lambda k: tuple((0, p, '') if isinstance(p, float) else (1, 0, p) for p in k)):
+        value = totals[key]
+        kind, view = key[0], key[1]
+        if kind == 'requests':
+            lines['expeditor_http_requests_total'].append(
+                f'expeditor_http_requests_total{{{_labels(view=view, method=key[2], status=key[3])}}} {value:g}')
+        elif kind == 'latency_bucket':
+            lines['expeditor_http_request_duration_seconds'].append(
+                f'expeditor_http_request_duration_seconds_bucket{{{_labels(view=view, le=_le(key[2]))}}} {value:g}')
+        elif kind == 'latency_sum':
+            lines['expeditor_http_request_duration_seconds'].append(
+                f'expeditor_http_request_duration_seconds_sum{{{_labels(view=view)}}} {value:.6f}')
+        elif kind == 'latency_count':
+            lines['expeditor_http_request_duration_seconds'].append(
+                f'expeditor_http_request_duration_seconds_count{{{_labels(view=view)}}} {value:g}')
+        elif kind == 'response_bytes':
+            lines['expeditor_http_response_bytes_total'].append(
+                f'expeditor_http_response_bytes_total{{{_labels(view=view)}}} {value:g}')
+        elif kind == 'db_queries':
+            lines['expeditor_db_queries_total'].append(
+                f'expeditor_db_queries_total{{{_labels(view=view)}}} {value:g}')
+        elif kind == 'db_seconds':
+            lines['expeditor_db_query_seconds_total'].append(
+                f'expeditor_db_query_seconds_total{{{_labels(view=view)}}} {value:.6f}')
+        elif kind == 'cache':
+            lines['expeditor_cache_requests_total'].append(
+                f'expeditor_cache_requests_total{{{_labels(view=view, result=key[2])}}} {value:g}')
+    return '\n'.join(line for group in lines.values() for line in group) + '\n'
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache that counts hits and misses against the current request."""
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        request_metrics = current_request.get()
+        if request_metrics is not None:
+            if value is self._missing:
+                request_metrics.cache_misses += 1
+            else:
+                request_metrics.cache_hits += 1
+        return default if value is self._missing else value
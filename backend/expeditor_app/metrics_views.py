@@ -0,0 +1,31 @@
+"""
+Prometheus scrape endpoint for the request metrics (see expeditor_app.metrics).
+"""
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .metrics import collect, render
+
+
+def _authorized(request):
+    """`Authorization: Bearer <METRICS_TOKEN>`, or a logged-in staff user."""
+    token = settings.METRICS_TOKEN
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ').strip()
+        if hmac.compare_digest(supplied, token):
+            return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+@require_GET
+def metrics_view(request):
+    """Serve the metrics of all workers to the METRICS_TOKEN bearer or a
+    staff user; to anyone only when METRICS_PUBLIC is set."""
+    if not (settings.METRICS_PUBLIC or _authorized(request)):
+        return HttpResponse(status=401)
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
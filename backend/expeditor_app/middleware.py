@@ -1,8 +1,20 @@
 import uuid
 import json
+import time
+import cProfile
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
 from .models import UserSession, UserActivity
+from .metrics import RequestMetrics, current_request, record_request
+from .profiling import (
+    StatementCapture, _profile_lock, build_report, claim_profile, profile_requested, store_report,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -171,3 +183,127 @@ class MapInteractionMiddleware(MiddlewareMixin):
 
 
 
+
+
+class MetricsMiddleware:
+    """Record per-view latency, DB queries, cache lookups and response size.
+
+    Goes first in MIDDLEWARE so the timing covers the other middleware;
+    see expeditor_app.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+        duration = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else 'unmatched'
+        response_bytes = 0 if response.streaming else len(response.content)
+        try:
+            record_request(view, request.method, response.status_code, duration, response_bytes, request_metrics)
+        except Exception as e:
+            logger.error(f"Metrics middleware error: {e}")
+        return response
+
+
+class ProfilerMiddleware:
+    """Profile a request when a superuser asks for it with ?_profile=1.
+
+    Goes after AuthenticationMiddleware; see expeditor_app.profiling for
+    the report and the safeguards.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILER_ENABLED or not profile_requested(request):
+            return self.get_response(request)
+        user = self._superuser(request)
+        if user is None:
+            return self.get_response(request)
+        if not _profile_lock.acquire(blocking=False):
+            return self._skipped(request, 'another request is being profiled')
+
+        try:
+            claimed = claim_profile(user)
+        except Exception as e:
+            logger.error(f"Profiler middleware error: {e}")
+            claimed = False
+        if not claimed:
+            _profile_lock.release()
+            return self._skipped(request, 'rate limit')
+
+        try:
+            statements = []
+            captures = [StatementCapture(connection.alias, statements) for connection in connections.all()]
+            request._profile_render = [0.0, 0.0]
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            with ExitStack() as stack:
+                for capture in captures:
+                    stack.enter_context(connections[capture.alias].execute_wrapper(capture))
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            total_seconds = time.perf_counter() - start
+
+            try:
+                render_start, render_end = request._profile_render
+                report = build_report(
+                    request, response, profiler, statements, sum(capture.dropped for capture in captures),
+                    total_seconds, max(render_end - render_start, 0.0),
+                )
+                report_id = store_report(report, user)
+                response['X-Profile-Id'] = report_id
+                response['X-Profile-Url'] = reverse('profile-detail', args=[report_id])
+            except Exception as e:
+                logger.error(f"Profiler middleware error: {e}")
+            return response
+        finally:
+            _profile_lock.release()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to JSON) after the view
+        timings = getattr(request, '_profile_render', None)
+        if timings is not None:
+            timings[0] = time.perf_counter()
+
+            def rendered(response):
+                timings[1] = time.perf_counter()
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _skipped(self, request, reason):
+        response = self.get_response(request)
+        response['X-Profile-Skipped'] = reason
+        return response
+
+    @staticmethod
+    def _superuser(request):
+        """The superuser behind the session or API token, if any."""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            header = request.META.get('HTTP_AUTHORIZATION', '')
+            if not header.startswith('Token '):
+                return None
+            try:
+                user, _ = TokenAuthentication().authenticate_credentials(header[len('Token '):].strip())
+            except AuthenticationFailed:
+                return None
+        return user if user.is_superuser else None
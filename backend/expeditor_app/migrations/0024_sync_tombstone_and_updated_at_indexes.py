@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0023_add_sklad_lat_lon'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(choices=[('check', 'Check'), ('check_detail', 'Check Detail')], db_index=True, max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('check_id', models.CharField(max_length=100)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Sync Tombstones',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='check',
+            index=models.Index(fields=['updated_at', 'id'], name='expeditor_a_updated_4886a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checkdetail',
+            index=models.Index(fields=['updated_at', 'id'], name='expeditor_a_updated_e9b5d7_idx'),
+        ),
+    ]
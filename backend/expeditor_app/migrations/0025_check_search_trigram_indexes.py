@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:14
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the check table against imports
+    atomic = False
+
+    dependencies = [
+        ('expeditor_app', '0024_sync_tombstone_and_updated_at_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='check',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('check_id'), name='gin_trgm_ops'), name='check_check_id_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('client_name'), name='gin_trgm_ops'), name='check_client_name_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('client_address'), name='gin_trgm_ops'), name='check_client_address_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('ekispiditor'), name='gin_trgm_ops'), name='check_ekispiditor_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('project'), name='gin_trgm_ops'), name='check_project_trgm'),
+        ),
+    ]
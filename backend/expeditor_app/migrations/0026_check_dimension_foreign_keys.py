@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('expeditor_app', '0025_check_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='check',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checks', to='expeditor_app.city'),
+        ),
+        migrations.AddField(
+            model_name='check',
+            name='ekispiditor_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checks', to='expeditor_app.ekispiditor'),
+        ),
+        migrations.AddField(
+            model_name='check',
+            name='project_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checks', to='expeditor_app.projects'),
+        ),
+        migrations.AddField(
+            model_name='check',
+            name='sklad_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checks', to='expeditor_app.sklad'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=models.Index(fields=['ekispiditor_ref', 'yetkazilgan_vaqti'], name='expeditor_a_ekispid_ae1530_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=models.Index(fields=['project_ref', 'yetkazilgan_vaqti'], name='expeditor_a_project_31afe9_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=models.Index(fields=['sklad_ref', 'yetkazilgan_vaqti'], name='expeditor_a_sklad_r_40bea5_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=models.Index(fields=['city_ref', 'yetkazilgan_vaqti'], name='expeditor_a_city_re_74414d_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0026_check_dimension_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpeditorDailyKPI',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('checks_count', models.PositiveIntegerField(default=0)),
+                ('delivered_count', models.PositiveIntegerField(default=0)),
+                ('total_sum', models.FloatField(default=0)),
+                ('nalichniy', models.FloatField(default=0)),
+                ('uzcard', models.FloatField(default=0)),
+                ('humo', models.FloatField(default=0)),
+                ('click', models.FloatField(default=0)),
+                ('first_check_at', models.DateTimeField(blank=True, null=True)),
+                ('last_check_at', models.DateTimeField(blank=True, null=True)),
+                ('violation_count', models.PositiveIntegerField(default=0)),
+                ('distance_km', models.FloatField(default=0, help_text='Distance between consecutive checks of the day')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ekispiditor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_kpis', to='expeditor_app.ekispiditor')),
+            ],
+            options={
+                'verbose_name_plural': 'Expeditor Daily KPIs',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'ekispiditor'], name='expeditor_a_date_14120b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='expeditordailykpi',
+            constraint=models.UniqueConstraint(fields=('ekispiditor', 'date'), name='unique_expeditor_daily_kpi'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:23
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('expeditor_app', '0027_expeditor_daily_kpi'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='check',
+            index=models.Index(fields=['ekispiditor', 'yetkazilgan_vaqti'], include=('status',), name='check_expeditor_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='check',
+            index=models.Index(condition=models.Q(('check_lat__isnull', False), ('check_lon__isnull', False)), fields=['yetkazilgan_vaqti'], include=('ekispiditor', 'check_lat', 'check_lon', 'check_id'), name='check_located_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='checkanalytics',
+            index=models.Index(fields=['most_active_expiditor', 'window_start'], name='expeditor_a_most_ac_50bb20_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='checkdetail',
+            index=models.Index(fields=['check_id'], include=('total_sum', 'nalichniy', 'uzcard', 'humo', 'click'), name='checkdetail_sums_cover'),
+        ),
+    ]
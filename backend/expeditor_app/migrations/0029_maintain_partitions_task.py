@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0028_composite_and_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledtask',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions')], db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='taskrun',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions')], db_index=True, max_length=50),
+        ),
+    ]
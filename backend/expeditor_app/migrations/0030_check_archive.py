@@ -0,0 +1,100 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0029_maintain_partitions_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckAll',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_id', models.CharField(db_index=True, max_length=100, unique=True)),
+                ('project', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('sklad', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('city', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('sborshik', models.CharField(blank=True, max_length=100, null=True)),
+                ('agent', models.CharField(blank=True, max_length=100, null=True)),
+                ('ekispiditor', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('yetkazilgan_vaqti', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('receiptIdDate', models.DateTimeField(blank=True, null=True)),
+                ('transport_number', models.CharField(blank=True, max_length=50, null=True)),
+                ('kkm_number', models.CharField(blank=True, max_length=50, null=True)),
+                ('client_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('client_address', models.TextField(blank=True, null=True)),
+                ('check_lat', models.FloatField(blank=True, null=True)),
+                ('check_lon', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('delivered', 'Yetkazilgan'), ('failed', 'Muvaffaqiyatsiz'), ('pending', 'Kutilmoqda')], db_index=True, default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'expeditor_app_check_all',
+                'ordering': ['-yetkazilgan_vaqti'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CheckDetailAll',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_id', models.CharField(db_index=True, max_length=100, unique=True)),
+                ('checkURL', models.URLField(unique=True)),
+                ('check_date', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('receiptIdDate', models.DateTimeField(blank=True, null=True)),
+                ('check_lat', models.FloatField(blank=True, null=True)),
+                ('check_lon', models.FloatField(blank=True, null=True)),
+                ('total_sum', models.FloatField(blank=True, db_index=True, null=True)),
+                ('nalichniy', models.FloatField(blank=True, null=True)),
+                ('uzcard', models.FloatField(blank=True, null=True)),
+                ('humo', models.FloatField(blank=True, null=True)),
+                ('click', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'expeditor_app_checkdetail_all',
+                'managed': False,
+            },
+        ),
+        migrations.AlterField(
+            model_name='scheduledtask',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions'), ('ARCHIVE_CHECKS', 'Archive Old Checks')], db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='taskrun',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions'), ('ARCHIVE_CHECKS', 'Archive Old Checks')], db_index=True, max_length=50),
+        ),
+        migrations.CreateModel(
+            name='CheckMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the local month')),
+                ('status', models.CharField(max_length=20)),
+                ('checks_count', models.PositiveIntegerField(default=0)),
+                ('total_sum', models.FloatField(default=0)),
+                ('nalichniy', models.FloatField(default=0)),
+                ('uzcard', models.FloatField(default=0)),
+                ('humo', models.FloatField(default=0)),
+                ('click', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monthly_rollups', to='expeditor_app.city')),
+                ('ekispiditor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monthly_rollups', to='expeditor_app.ekispiditor')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monthly_rollups', to='expeditor_app.projects')),
+                ('sklad', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monthly_rollups', to='expeditor_app.sklad')),
+            ],
+            options={
+                'verbose_name_plural': 'Check Monthly Rollups',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['month', 'ekispiditor'], name='expeditor_a_month_62ad47_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:53, duplicate cleanup added manually
+
+from django.db import migrations, models
+import hashlib
+
+
+def fingerprint_existing_analytics(apps, schema_editor):
+    """Fingerprint existing analytics by their check set and drop the
+    duplicates repeated runs inserted, keeping the newest row of each."""
+    CheckAnalytics = apps.get_model('expeditor_app', 'CheckAnalytics')
+    
+    seen = set()
+    duplicates = []
+    batch = []
+    rows = CheckAnalytics.objects.order_by('-id').only('id', 'violation_type', 'check_ids')
+    for record in rows.iterator(chunk_size=2000):
+        if not record.check_ids:
+            continue
+        key = '|'.join(['legacy', record.violation_type] + sorted(str(check_id) for check_id in record.check_ids))
+        fingerprint = hashlib.sha1(key.encode()).hexdigest()
+        if fingerprint in seen:
+            duplicates.append(record.id)
+            continue
+        seen.add(fingerprint)
+        record.fingerprint = fingerprint
+        batch.append(record)
+        if len(batch) >= 2000:
+            CheckAnalytics.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        CheckAnalytics.objects.bulk_update(batch, ['fingerprint'])
+    
+    for start in range(0, len(duplicates), 2000):
+        CheckAnalytics.objects.filter(id__in=duplicates[start:start + 2000]).delete()
+    
+    print(f"✅ Fingerprinted {len(seen)} analytics records, deleted {len(duplicates)} duplicates")
+
+
+def clear_fingerprints(apps, schema_editor):
+    """Deleted duplicates are not restored."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0030_check_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Analysis and parameters, e.g. patterns:fixed:10m:15m', max_length=100, unique=True)),
+                ('processed_until', models.DateTimeField(help_text='Checks before this time are fully analysed')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Analysis Watermarks',
+                'ordering': ['key'],
+            },
+        ),
+        migrations.AddField(
+            model_name='checkanalytics',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of the violation type, analysis parameters, window and seed check (see pattern_analysis)', max_length=40, null=True),
+        ),
+        migrations.RunPython(fingerprint_existing_analytics, clear_fingerprints),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0031_check_analytics_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checkanalytics',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of the violation type, analysis parameters, window and seed check (see pattern_analysis)', max_length=40, null=True, unique=True),
+        ),
+    ]
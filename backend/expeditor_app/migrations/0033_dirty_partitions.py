@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0032_check_analytics_fingerprint_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('EXPEDITOR_DAY', 'Expeditor and day'), ('CELL_DAY', 'Spatial cell and day')], max_length=20)),
+                ('date', models.DateField(help_text='Local date of the checks')),
+                ('ekispiditor', models.CharField(blank=True, default='', help_text='Expeditor name (EXPEDITOR_DAY)', max_length=100)),
+                ('cell_lat', models.IntegerField(default=0, help_text='Cell row (CELL_DAY)')),
+                ('cell_lon', models.IntegerField(default=0, help_text='Cell column (CELL_DAY)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Dirty Partitions',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='scheduledtask',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions'), ('ARCHIVE_CHECKS', 'Archive Old Checks'), ('ANALYZE_DIRTY', 'Re-analyze Imported Partitions')], db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='taskrun',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions'), ('ARCHIVE_CHECKS', 'Archive Old Checks'), ('ANALYZE_DIRTY', 'Re-analyze Imported Partitions')], db_index=True, max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='dirtypartition',
+            constraint=models.UniqueConstraint(fields=('kind', 'date', 'ekispiditor', 'cell_lat', 'cell_lon'), name='unique_dirty_partition'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0033_dirty_partitions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledtask',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions'), ('ARCHIVE_CHECKS', 'Archive Old Checks'), ('ANALYZE_DIRTY', 'Re-analyze Imported Partitions'), ('BACKFILL_PATTERNS', 'Backfill Pattern Analysis')], db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='taskrun',
+            name='task_type',
+            field=models.CharField(choices=[('UPDATE_CHECKS', 'Update Checks from Integrations'), ('SCAN_PROBLEMS', 'Scan Problem Checks'), ('SEND_ANALYTICS', 'Send Analytics Report'), ('ANALYZE_PATTERNS', 'Analyze Check Patterns'), ('MAINTAIN_PARTITIONS', 'Create Upcoming Check Partitions'), ('ARCHIVE_CHECKS', 'Archive Old Checks'), ('ANALYZE_DIRTY', 'Re-analyze Imported Partitions'), ('BACKFILL_PATTERNS', 'Backfill Pattern Analysis')], db_index=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:12, membership backfill added manually
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_members(apps, schema_editor):
+    """Membership rows of the existing analytics, from their check_ids."""
+    Check = apps.get_model('expeditor_app', 'Check')
+    CheckAnalytics = apps.get_model('expeditor_app', 'CheckAnalytics')
+    CheckAnalyticsMember = apps.get_model('expeditor_app', 'CheckAnalyticsMember')
+    
+    created = 0
+    records = CheckAnalytics.objects.order_by('id').only('id', 'check_ids')
+    batch = []
+    for record in records.iterator(chunk_size=2000):
+        if record.check_ids:
+            batch.append(record)
+        if len(batch) >= 2000:
+            created += _create_members(Check, CheckAnalyticsMember, batch)
+            batch = []
+    if batch:
+        created += _create_members(Check, CheckAnalyticsMember, batch)
+    
+    print(f"✅ Created {created} analytics membership rows")
+
+
+def _create_members(Check, CheckAnalyticsMember, records):
+    check_ids = {check_id for record in records for check_id in record.check_ids}
+    ids = dict(Check.objects.filter(check_id__in=check_ids).values_list('check_id', 'id'))
+    members = []
+    for record in records:
+        seen = set()
+        for check_id in record.check_ids:
+            # Checks deleted or archived since the analysis have no row to point to
+            if check_id in ids and check_id not in seen:
+                seen.add(check_id)
+                members.append(CheckAnalyticsMember(
+                    analytics_id=record.id,
+                    check_ref_id=ids[check_id],
+                    position=len(seen) - 1,
+                    role='seed' if len(seen) == 1 else 'member',
+                ))
+    CheckAnalyticsMember.objects.bulk_create(members, batch_size=5000)
+    return len(members)
+
+
+def clear_members(apps, schema_editor):
+    """The rows go with the table."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0034_backfill_patterns_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckAnalyticsMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(default=0, help_text='Order of the check in the cluster (0 = seed)')),
+                ('role', models.CharField(choices=[('seed', 'Seed check'), ('member', 'Member check')], default='member', max_length=10)),
+                ('analytics', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='expeditor_app.checkanalytics')),
+                ('check_ref', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='violation_memberships', to='expeditor_app.check')),
+            ],
+            options={
+                'verbose_name_plural': 'Check Analytics Members',
+                'ordering': ['analytics', 'position'],
+                'indexes': [models.Index(fields=['check_ref', 'analytics'], name='expeditor_a_check_r_747fde_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='checkanalyticsmember',
+            constraint=models.UniqueConstraint(fields=('analytics', 'check_ref'), name='unique_analytics_member'),
+        ),
+        migrations.RunPython(fill_members, clear_members),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:25, window mode backfill added manually
+
+from datetime import datetime, timedelta, timezone
+
+from django.db import migrations, models
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def label_window_modes(apps, schema_editor):
+    """Window mode of the existing time-distance records: fixed windows
+    start on a multiple of the window length since the epoch
+    (pattern_analysis.align_to_window), anchored ones at their seed check."""
+    CheckAnalytics = apps.get_model('expeditor_app', 'CheckAnalytics')
+
+    modes = {'fixed': [], 'anchored': []}
+    records = (
+        CheckAnalytics.objects
+        .filter(violation_type='TIME_DISTANCE')
+        .order_by('id')
+        .values_list('id', 'window_start', 'window_duration_minutes')
+    )
+    for record_id, window_start, minutes in records.iterator(chunk_size=5000):
+        aligned = minutes and (window_start - EPOCH) % timedelta(minutes=minutes) == timedelta(0)
+        modes['fixed' if aligned else 'anchored'].append(record_id)
+
+    for mode, ids in modes.items():
+        for start in range(0, len(ids), 5000):
+            CheckAnalytics.objects.filter(id__in=ids[start:start + 5000]).update(window_mode=mode)
+
+    print(f"✅ Labelled {len(modes['fixed'])} fixed and {len(modes['anchored'])} anchored time-distance records")
+
+
+def clear_window_modes(apps, schema_editor):
+    """The column goes with the field."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditor_app', '0035_check_analytics_members'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkanalytics',
+            name='window_mode',
+            field=models.CharField(blank=True, default='', help_text='Window mode of the time-distance analysis (fixed or anchored); empty for same-location records', max_length=10),
+        ),
+        migrations.RunPython(label_window_modes, clear_window_modes),
+    ]
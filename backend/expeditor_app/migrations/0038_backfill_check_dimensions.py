@@ -0,0 +1,57 @@
+# Backfill of the Check dimension foreign keys added in 0026
+
+from django.db import migrations, transaction
+from django.db.models import Exists, Max, Min, OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+# Check name column -> (Check foreign key, model, model name field)
+DIMENSIONS = {
+    'project': ('project_ref', 'Projects', 'project_name'),
+    'sklad': ('sklad_ref', 'Sklad', 'sklad_name'),
+    'city': ('city_ref', 'City', 'city_name'),
+    'ekispiditor': ('ekispiditor_ref', 'Ekispiditor', 'ekispiditor_name'),
+}
+
+
+def backfill_check_dimensions(apps, schema_editor):
+    """Resolve the foreign keys of checks imported before 0026 from their
+    name columns, as backfill_check_dimensions does: in id ranges, one
+    short transaction per range, so imports are not blocked for long."""
+    Check = apps.get_model('expeditor_app', 'Check')
+    bounds = Check.objects.aggregate(lo=Min('id'), hi=Max('id'))
+    if bounds['lo'] is None:
+        return
+
+    totals = dict.fromkeys(DIMENSIONS, 0)
+    for start_id in range(bounds['lo'], bounds['hi'] + 1, BATCH_SIZE):
+        with transaction.atomic():
+            for column, (ref, model_name, name_field) in DIMENSIONS.items():
+                matching = apps.get_model('expeditor_app', model_name).objects.filter(
+                    **{name_field: OuterRef(column)}
+                )
+                totals[column] += (
+                    Check.objects
+                    .filter(id__gte=start_id, id__lt=start_id + BATCH_SIZE, **{f'{ref}__isnull': True})
+                    .filter(Exists(matching))
+                    .update(**{ref: Subquery(matching.values('id')[:1])})
+                )
+
+    print(f"✅ Backfilled check dimension keys: {totals}")
+
+
+def keep_check_dimensions(apps, schema_editor):
+    """The keys go with the columns when 0026 is reversed."""
+    pass
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('expeditor_app', '0037_profile_run'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_check_dimensions, keep_check_dimensions),
+    ]
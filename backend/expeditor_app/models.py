@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth.models import AbstractUser
-import math
+from .geo import haversine
 
 class Projects(models.Model):
     project_name = models.CharField(max_length=100, unique=True)
@@ -15,7 +19,8 @@ class Projects(models.Model):
     def __str__(self):
         return self.project_name
 
-class CheckDetail(models.Model):
+class AbstractCheckDetail(models.Model):
+    """Columns of CheckDetail, shared with the archive view model CheckDetailAll."""
     check_id = models.CharField(max_length=100, unique=True, db_index=True)
     checkURL = models.URLField(max_length=200, unique=True)
     check_date = models.DateTimeField(blank=True, null=True, db_index=True)
@@ -29,9 +34,24 @@ class CheckDetail(models.Model):
     click = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        abstract = True
+
+
+class CheckDetail(AbstractCheckDetail):
     class Meta:
         verbose_name_plural = "Check Details"
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),
+            # Covering index for the per-check payment sums, so joins from
+            # Check read them without touching the heap
+            models.Index(
+                fields=["check_id"],
+                include=["total_sum", "nalichniy", "uzcard", "humo", "click"],
+                name="checkdetail_sums_cover",
+            ),
+        ]
     
     def __str__(self):
         return self.check_id
@@ -82,13 +102,16 @@ class Ekispiditor(models.Model):
     
     @property
     def today_checks_count(self):
-        today = timezone.now().date()
-        return Check.objects.filter(
-            ekispiditor=self.ekispiditor_name,
-            yetkazilgan_vaqti__date=today
-        ).count()
+        # Lists annotate this (see kpi.annotate_expeditor_kpis); otherwise
+        # read today's KPI row
+        if hasattr(self, 'kpi_today_checks'):
+            return self.kpi_today_checks or 0
+        kpi = self.daily_kpis.filter(date=timezone.localdate()).only('checks_count').first()
+        return kpi.checks_count if kpi else 0
 
-class Check(models.Model):
+class AbstractCheck(models.Model):
+    """Columns of Check except the dimension keys, shared with the archive
+    view model CheckAll."""
     check_id = models.CharField(max_length=100, unique=True, db_index=True)
     project = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     sklad = models.CharField(max_length=100, blank=True, null=True, db_index=True)
@@ -111,10 +134,50 @@ class Check(models.Model):
     ], default='pending', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class Check(AbstractCheck):
+    # Dimension keys resolved from the name columns above by the importer
+    # (and backfill_check_dimensions); filters and group-bys use these.
+    # Indexed through the composite indexes below.
+    project_ref = models.ForeignKey('Projects', on_delete=models.SET_NULL, blank=True, null=True,
+                                    db_index=False, related_name='checks')
+    sklad_ref = models.ForeignKey('Sklad', on_delete=models.SET_NULL, blank=True, null=True,
+                                  db_index=False, related_name='checks')
+    city_ref = models.ForeignKey('City', on_delete=models.SET_NULL, blank=True, null=True,
+                                 db_index=False, related_name='checks')
+    ekispiditor_ref = models.ForeignKey('Ekispiditor', on_delete=models.SET_NULL, blank=True, null=True,
+                                        db_index=False, related_name='checks')
     
     class Meta:
         verbose_name_plural = "Checklar"
         ordering = ['-yetkazilgan_vaqti']
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),
+            models.Index(fields=["ekispiditor_ref", "yetkazilgan_vaqti"]),
+            models.Index(fields=["project_ref", "yetkazilgan_vaqti"]),
+            models.Index(fields=["sklad_ref", "yetkazilgan_vaqti"]),
+            models.Index(fields=["city_ref", "yetkazilgan_vaqti"]),
+            # Expeditor + time filters that still go through the name column
+            models.Index(fields=["ekispiditor", "yetkazilgan_vaqti"], include=["status"], name="check_expeditor_time_idx"),
+            # Map and pattern analysis queries only want located checks
+            models.Index(
+                fields=["yetkazilgan_vaqti"],
+                include=["ekispiditor", "check_lat", "check_lon", "check_id"],
+                condition=models.Q(check_lat__isnull=False, check_lon__isnull=False),
+                name="check_located_time_idx",
+            ),
+            # Trigram indexes for search; UPPER() matches the expression
+            # Django generates for icontains on PostgreSQL.
+            GinIndex(OpClass(Upper("check_id"), name="gin_trgm_ops"), name="check_check_id_trgm"),
+            GinIndex(OpClass(Upper("client_name"), name="gin_trgm_ops"), name="check_client_name_trgm"),
+            GinIndex(OpClass(Upper("client_address"), name="gin_trgm_ops"), name="check_client_address_trgm"),
+            GinIndex(OpClass(Upper("ekispiditor"), name="gin_trgm_ops"), name="check_ekispiditor_trgm"),
+            GinIndex(OpClass(Upper("project"), name="gin_trgm_ops"), name="check_project_trgm"),
+        ]
     
     def __str__(self):
         return f"Check {self.check_id} by {self.ekispiditor} on {self.kkm_number}"
@@ -164,6 +227,132 @@ class ProblemCheck(models.Model):
         return f"{self.check_id} - {self.issue_code}"
 
 
+class SyncTombstone(models.Model):
+    """Deletion marker for delta-sync clients.
+
+    Written whenever a Check or CheckDetail row is deleted so that polling
+    clients can drop it from their local copy. Ordered by id, which the
+    sync cursor uses as its tombstone position.
+    """
+    MODEL_CHECK = 'check'
+    MODEL_CHECK_DETAIL = 'check_detail'
+
+    MODEL_CHOICES = [
+        (MODEL_CHECK, 'Check'),
+        (MODEL_CHECK_DETAIL, 'Check Detail'),
+    ]
+
+    model_name = models.CharField(max_length=20, choices=MODEL_CHOICES, db_index=True)
+    object_id = models.BigIntegerField()
+    check_id = models.CharField(max_length=100)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Sync Tombstones"
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.model_name} {self.check_id} deleted at {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class ExpeditorDailyKPI(models.Model):
+    """Per-expeditor, per-day totals kept up to date by the importer and
+    the pattern analysis task (see expeditor_app.kpi).
+
+    Days are local (TIME_ZONE) dates of Check.yetkazilgan_vaqti. Lists,
+    leaderboards and today's counters read these rows instead of counting
+    checks.
+    """
+    ekispiditor = models.ForeignKey('Ekispiditor', on_delete=models.CASCADE, related_name='daily_kpis')
+    date = models.DateField()
+    checks_count = models.PositiveIntegerField(default=0)
+    delivered_count = models.PositiveIntegerField(default=0)
+    total_sum = models.FloatField(default=0)
+    nalichniy = models.FloatField(default=0)
+    uzcard = models.FloatField(default=0)
+    humo = models.FloatField(default=0)
+    click = models.FloatField(default=0)
+    first_check_at = models.DateTimeField(blank=True, null=True)
+    last_check_at = models.DateTimeField(blank=True, null=True)
+    violation_count = models.PositiveIntegerField(default=0)
+    distance_km = models.FloatField(default=0, help_text="Distance between consecutive checks of the day")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Expeditor Daily KPIs"
+        constraints = [
+            models.UniqueConstraint(fields=["ekispiditor", "date"], name="unique_expeditor_daily_kpi"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "ekispiditor"]),
+        ]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.ekispiditor_id} {self.date}: {self.checks_count} checks"
+
+
+class CheckAll(AbstractCheck):
+    """Read-only view over hot and archived checks (see expeditor_app.archive)."""
+    project_ref = models.ForeignKey('Projects', on_delete=models.DO_NOTHING, blank=True, null=True,
+                                    db_constraint=False, related_name='+')
+    sklad_ref = models.ForeignKey('Sklad', on_delete=models.DO_NOTHING, blank=True, null=True,
+                                  db_constraint=False, related_name='+')
+    city_ref = models.ForeignKey('City', on_delete=models.DO_NOTHING, blank=True, null=True,
+                                 db_constraint=False, related_name='+')
+    ekispiditor_ref = models.ForeignKey('Ekispiditor', on_delete=models.DO_NOTHING, blank=True, null=True,
+                                        db_constraint=False, related_name='+')
+
+    class Meta:
+        managed = False
+        db_table = 'expeditor_app_check_all'
+        ordering = ['-yetkazilgan_vaqti']
+
+
+class CheckDetailAll(AbstractCheckDetail):
+    """Read-only view over hot and archived check details."""
+
+    class Meta:
+        managed = False
+        db_table = 'expeditor_app_checkdetail_all'
+
+
+class CheckMonthlyRollup(models.Model):
+    """Per-month check counts and payment sums of archived months, kept in
+    the hot database when the checks themselves move to the archive.
+
+    One row per month, dimension keys and status; the latest month with
+    rows marks how far back the archive reaches.
+    """
+    month = models.DateField(help_text="First day of the local month")
+    ekispiditor = models.ForeignKey('Ekispiditor', on_delete=models.SET_NULL, blank=True, null=True,
+                                    related_name='monthly_rollups')
+    project = models.ForeignKey('Projects', on_delete=models.SET_NULL, blank=True, null=True,
+                                related_name='monthly_rollups')
+    sklad = models.ForeignKey('Sklad', on_delete=models.SET_NULL, blank=True, null=True,
+                              related_name='monthly_rollups')
+    city = models.ForeignKey('City', on_delete=models.SET_NULL, blank=True, null=True,
+                             related_name='monthly_rollups')
+    status = models.CharField(max_length=20)
+    checks_count = models.PositiveIntegerField(default=0)
+    total_sum = models.FloatField(default=0)
+    nalichniy = models.FloatField(default=0)
+    uzcard = models.FloatField(default=0)
+    humo = models.FloatField(default=0)
+    click = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Check Monthly Rollups"
+        indexes = [
+            models.Index(fields=["month", "ekispiditor"]),
+        ]
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.status}: {self.checks_count} checks"
+
+
 class IntegrationEndpoint(models.Model):
     """Config for external integration endpoints per project.
 
@@ -188,12 +377,20 @@ class ScheduledTask(models.Model):
     TASK_SCAN_PROBLEM_CHECKS = 'SCAN_PROBLEMS'
     TASK_SEND_ANALYTICS = 'SEND_ANALYTICS'
     TASK_ANALYZE_PATTERNS = 'ANALYZE_PATTERNS'
+    TASK_MAINTAIN_PARTITIONS = 'MAINTAIN_PARTITIONS'
+    TASK_ARCHIVE_CHECKS = 'ARCHIVE_CHECKS'
+    TASK_ANALYZE_DIRTY = 'ANALYZE_DIRTY'
+    TASK_BACKFILL_PATTERNS = 'BACKFILL_PATTERNS'
 
     TASK_CHOICES = [
         (TASK_UPDATE_CHECKS, 'Update Checks from Integrations'),
         (TASK_SCAN_PROBLEM_CHECKS, 'Scan Problem Checks'),
         (TASK_SEND_ANALYTICS, 'Send Analytics Report'),
         (TASK_ANALYZE_PATTERNS, 'Analyze Check Patterns'),
+        (TASK_MAINTAIN_PARTITIONS, 'Create Upcoming Check Partitions'),
+        (TASK_ARCHIVE_CHECKS, 'Archive Old Checks'),
+        (TASK_ANALYZE_DIRTY, 'Re-analyze Imported Partitions'),
+        (TASK_BACKFILL_PATTERNS, 'Backfill Pattern Analysis'),
     ]
 
     name = models.CharField(max_length=120)
@@ -570,6 +767,18 @@ class CheckAnalytics(models.Model):
     # Store check details for easy access (optional, for performance)
     check_details = models.JSONField(default=dict, blank=True, help_text="Structured check details including locations and times")
     
+    # Deterministic identity of the cluster, so re-analysis updates the row instead of duplicating it
+    fingerprint = models.CharField(
+        max_length=40, unique=True, blank=True, null=True,
+        help_text="Hash of the violation type, analysis parameters, window and seed check (see pattern_analysis)"
+    )
+    
+    # Window mode of the time-distance analysis, so a run only replaces the records of its own mode
+    window_mode = models.CharField(
+        max_length=10, blank=True, default='',
+        help_text="Window mode of the time-distance analysis (fixed or anchored); empty for same-location records"
+    )
+    
     # Metadata
     analysis_date = models.DateTimeField(auto_now_add=True, db_index=True, help_text="When this analysis was performed")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -582,6 +791,7 @@ class CheckAnalytics(models.Model):
             models.Index(fields=["window_start", "window_end"]),
             models.Index(fields=["center_lat", "center_lon"]),
             models.Index(fields=["analysis_date"]),
+            models.Index(fields=["most_active_expiditor", "window_start"]),
         ]
         ordering = ['-analysis_date', '-window_start']
     
@@ -598,15 +808,40 @@ class CheckAnalytics(models.Model):
     
     def get_checks(self):
         """Get the actual Check objects that were part of this analysis."""
-        if not self.check_ids:
-            return Check.objects.none()
-        return Check.objects.filter(check_id__in=self.check_ids).order_by('yetkazilgan_vaqti')
+        return Check.objects.filter(violation_memberships__analytics=self).order_by('yetkazilgan_vaqti')
     
-    def get_check_locations(self):
-        """Get check locations for map visualization."""
+    @staticmethod
+    def checks_by_id(records):
+        """check_id -> Check for every check of the given analytics, in one query."""
+        analytics_ids = [record.pk for record in records]
+        if not analytics_ids:
+            return {}
+        checks = Check.objects.filter(
+            models.Exists(CheckAnalyticsMember.objects.filter(check_ref=models.OuterRef('pk'), analytics__in=analytics_ids))
+        )
+        return {check.check_id: check for check in checks}
+    
+    @staticmethod
+    def check_locations_for(records):
+        """analytics id -> get_check_locations() for many analytics, with the
+        checks of all of them loaded in one query."""
+        records = list(records)
+        checks_by_id = CheckAnalytics.checks_by_id(records)
+        return {record.pk: record.get_check_locations(checks_by_id) for record in records}
+    
+    def get_check_locations(self, checks_by_id=None):
+        """Get check locations for map visualization.
+
+        checks_by_id maps check_id to Check; callers rendering many
+        analytics use check_locations_for() instead of a query per record.
+        Checks no longer in Check (archived or deleted) are located from
+        the stored check_details['checks'] entries.
+        """
         locations = []
+        if checks_by_id is None:
+            checks_by_id = CheckAnalytics.checks_by_id([self])
         
-        # First try to get from check_details if available
+        # Legacy records store check_details as a list parallel to check_ids
         if self.check_details and isinstance(self.check_details, list) and self.check_ids:
             for i, detail in enumerate(self.check_details):
                 if isinstance(detail, dict) and detail.get('lat') and detail.get('lng'):
@@ -615,13 +850,9 @@ class CheckAnalytics(models.Model):
                     client_name = detail.get('client_name', 'Unknown')
                     
                     # Try to get additional info from Check object
-                    if check_id != 'Unknown':
-                        try:
-                            from .models import Check
-                            check_obj = Check.objects.get(check_id=check_id)
-                            client_name = check_obj.client_name or 'Unknown'
-                        except:
-                            pass
+                    check_obj = checks_by_id.get(check_id)
+                    if check_obj is not None:
+                        client_name = check_obj.client_name or 'Unknown'
                     
                     locations.append({
                         'id': detail.get('id', 0),
@@ -635,22 +866,47 @@ class CheckAnalytics(models.Model):
                         'address': detail.get('address', '')
                     })
         
-        # If no locations from check_details, try to get from actual Check objects
         if not locations:
-            checks = self.get_checks()
-            for check in checks:
-                if check.check_lat and check.check_lon:
-                    locations.append({
-                        'id': check.id,
-                        'check_id': check.check_id,
-                        'client_name': check.client_name or 'Unknown',
-                        'lat': float(check.check_lat),
-                        'lng': float(check.check_lon),
-                        'time': check.yetkazilgan_vaqti.isoformat() if check.yetkazilgan_vaqti else '',
-                        'expeditor': check.ekispiditor or 'Unknown',
-                        'status': check.status or 'Unknown',
-                        'address': getattr(check, 'address', '') or ''
-                    })
+            stored = {}
+            if isinstance(self.check_details, dict):
+                stored = {
+                    entry.get('id'): entry for entry in self.check_details.get('checks', [])
+                    if isinstance(entry, dict)
+                }
+            located = []
+            for check_id in dict.fromkeys(self.check_ids or []):
+                check = checks_by_id.get(check_id)
+                if check is not None:
+                    if check.check_lat and check.check_lon:
+                        located.append((check.yetkazilgan_vaqti, {
+                            'id': check.id,
+                            'check_id': check.check_id,
+                            'client_name': check.client_name or 'Unknown',
+                            'lat': float(check.check_lat),
+                            'lng': float(check.check_lon),
+                            'time': check.yetkazilgan_vaqti.isoformat() if check.yetkazilgan_vaqti else '',
+                            'expeditor': check.ekispiditor or 'Unknown',
+                            'status': check.status or 'Unknown',
+                            'address': getattr(check, 'address', '') or ''
+                        }))
+                    continue
+                entry = stored.get(check_id)
+                if entry and entry.get('lat') and entry.get('lon'):
+                    # Only entries written with a timestamp have the full time
+                    timestamp = entry.get('timestamp', '')
+                    located.append((parse_datetime(timestamp) if timestamp else None, {
+                        'id': 0,
+                        'check_id': check_id,
+                        'client_name': entry.get('client_name', 'Unknown'),
+                        'lat': float(entry['lat']),
+                        'lng': float(entry['lon']),
+                        'time': timestamp,
+                        'expeditor': entry.get('expeditor', 'Unknown'),
+                        'status': entry.get('status', 'Unknown'),
+                        'address': ''
+                    }))
+            located.sort(key=lambda item: (item[0] is None, item[0] or 0))
+            locations = [location for _, location in located]
         
         return locations
     
@@ -659,19 +915,122 @@ class CheckAnalytics(models.Model):
         """Calculate distance between two points in meters using Haversine formula."""
         if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
             return float('inf')
-        
-        # Convert decimal degrees to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of earth in meters
-        r = 6371000
-        return c * r
+        return haversine(lat1, lon1, lat2, lon2)
+
+
+class CheckAnalyticsMember(models.Model):
+    """A check of a violation (CheckAnalytics), one row per check.
+
+    Written by the pattern analysis together with the record (check_ids
+    keeps the same list for the API payloads), so checks of violations and
+    violations of a check are indexed joins. check_ref has no database
+    constraint: Check is partitioned and archived, so its id is not unique
+    on its own.
+    """
+    ROLE_SEED = 'seed'
+    ROLE_MEMBER = 'member'
+
+    ROLE_CHOICES = [
+        (ROLE_SEED, 'Seed check'),
+        (ROLE_MEMBER, 'Member check'),
+    ]
+
+    analytics = models.ForeignKey(CheckAnalytics, on_delete=models.CASCADE, related_name='members')
+    check_ref = models.ForeignKey(Check, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                                  related_name='violation_memberships')
+    position = models.PositiveIntegerField(default=0, help_text="Order of the check in the cluster (0 = seed)")
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=ROLE_MEMBER)
+
+    class Meta:
+        verbose_name_plural = "Check Analytics Members"
+        constraints = [
+            models.UniqueConstraint(fields=["analytics", "check_ref"], name="unique_analytics_member"),
+        ]
+        indexes = [
+            models.Index(fields=["check_ref", "analytics"]),
+        ]
+        ordering = ['analytics', 'position']
+
+    def __str__(self):
+        return f"{self.analytics_id}: check {self.check_ref_id} ({self.role})"
+
+
+class AnalysisWatermark(models.Model):
+    """How far a periodic analysis has processed checks.
+
+    The pattern analysis task keeps one row per parameter set and, on the
+    next run, only re-analyses checks from processed_until on instead of
+    the whole lookback.
+    """
+    key = models.CharField(max_length=100, unique=True, help_text="Analysis and parameters, e.g. patterns:fixed:10m:15m")
+    processed_until = models.DateTimeField(help_text="Checks before this time are fully analysed")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Analysis Watermarks"
+        ordering = ['key']
+
+    def __str__(self):
+        return f"{self.key} until {self.processed_until:%Y-%m-%d %H:%M}"
+
+
+class DirtyPartition(models.Model):
+    """An analysis partition an import touched, waiting for re-analysis.
+
+    EXPEDITOR_DAY rows (ekispiditor name, local date) cover same-location
+    groups, CELL_DAY rows (local date, spatial cell; see
+    pattern_analysis.partition_cell) time-distance clusters. The
+    ANALYZE_DIRTY task recomputes and deletes them.
+    """
+    KIND_EXPEDITOR_DAY = 'EXPEDITOR_DAY'
+    KIND_CELL_DAY = 'CELL_DAY'
+
+    KIND_CHOICES = [
+        (KIND_EXPEDITOR_DAY, 'Expeditor and day'),
+        (KIND_CELL_DAY, 'Spatial cell and day'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField(help_text="Local date of the checks")
+    ekispiditor = models.CharField(max_length=100, blank=True, default='', help_text="Expeditor name (EXPEDITOR_DAY)")
+    cell_lat = models.IntegerField(default=0, help_text="Cell row (CELL_DAY)")
+    cell_lon = models.IntegerField(default=0, help_text="Cell column (CELL_DAY)")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Dirty Partitions"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "date", "ekispiditor", "cell_lat", "cell_lon"],
+                name="unique_dirty_partition",
+            ),
+        ]
+        ordering = ['created_at']
+
+    def __str__(self):
+        if self.kind == self.KIND_EXPEDITOR_DAY:
+            return f"{self.ekispiditor} {self.date}"
+        return f"cell {self.cell_lat},{self.cell_lon} {self.date}"
+
+
+class ProfileRun(models.Model):
+    """A request profiled by ProfilerMiddleware, for its per-user rate limit.
+
+    Kept apart from the report files, which are pruned to PROFILE_KEEP,
+    and shared by all workers (the cache is per process).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile_runs')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Profile Runs"
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='profile_run_user_created'),
+        ]
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user_id} at {self.created_at:%Y-%m-%d %H:%M:%S}"
 
 
 # CustomUser model temporarily disabled for migration
@@ -690,3 +1049,4 @@ class CheckAnalytics(models.Model):
 #     
 #     def __str__(self):
 #         return f"{self.username} ({'Approved' if self.is_approved else 'Pending'})"
+
@@ -0,0 +1,226 @@
+"""
+Process-pool pattern analysis of a historical range of days.
+
+The range is split into local days. A day with more than
+BUSY_DAY_CHECKS checks is split further into the spatial cells of the
+dirty partitions (pattern_analysis.partition_cell); a cell is clustered
+with the checks of its neighbouring cells and keeps the clusters seeded
+in it, the same approximation the ANALYZE_DIRTY task uses.
+
+The parent process loads each day's checks once and sends the partitions
+to a ProcessPoolExecutor as NumPy time/coordinate arrays; the workers only
+cluster (pattern_analysis.cluster_partition) and never touch the
+database. The parent merges the clusters of a day, upserts them in bulk
+with the day's same-location groups and deletes the day's stale records,
+one transaction per day and in day order, while the pool works on the
+following days.
+
+Fixed windows only: anchored windows depend on the clusters before them.
+
+backfill_patterns runs a range as a resumable background job: each
+committed day moves a checkpoint (an AnalysisWatermark) in the same
+transaction, so an interrupted or cancelled backfill resumes at the first
+day it did not commit.
+"""
+
+import logging
+import multiprocessing
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .kpi import expeditor_days_between, refresh_expeditor_days
+from .models import AnalysisWatermark, TaskRun
+from .pattern_analysis import (
+    align_to_window, cluster_partition, from_microseconds, load_check_points, partition_cell,
+    point_arrays, points_from, to_microseconds,
+)
+from .task_executor import TaskExecutor
+from .utils import local_day_bounds
+
+logger = logging.getLogger(__name__)
+
+# Days with more checks than this are split into spatial cells
+BUSY_DAY_CHECKS = 20000
+
+
+def day_partitions(points, busy_day_checks=BUSY_DAY_CHECKS):
+    """(cell, positions) of the partitions of a day's time-sorted points:
+    the whole day (cell None) or, for a busy day, every occupied cell with
+    the positions of the points in it and its neighbouring cells."""
+    if len(points) <= busy_day_checks:
+        return [(None, np.arange(len(points)))]
+    by_cell = defaultdict(list)
+    for i, point in enumerate(points):
+        by_cell[partition_cell(point.lat, point.lon)].append(i)
+    partitions = []
+    for row, column in sorted(by_cell):
+        positions = [
+            i
+            for neighbour in ((r, c) for r in (row - 1, row, row + 1) for c in (column - 1, column, column + 1))
+            for i in by_cell.get(neighbour, ())
+        ]
+        # Sorted positions keep the points in time order
+        partitions.append(((row, column), np.array(sorted(positions))))
+    return partitions
+
+
+def analyze_days(days, time_window_minutes, distance_meters, workers=None,
+                 busy_day_checks=BUSY_DAY_CHECKS, on_day=None, checkpoint=None, stop=None):
+    """
+    Re-analyse the local days (fixed windows), clustering in `workers`
+    processes (default: one per CPU). Calls on_day(day, time-distance
+    records, same-location records) after each day is committed and
+    returns the two record totals. With a checkpoint key, the
+    AnalysisWatermark of that key is moved to the end of each day in the
+    day's transaction; when stop() returns true after a day, the remaining
+    days are dropped.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = timedelta(minutes=time_window_minutes)
+    executor = TaskExecutor()
+    totals = [0, 0]
+
+    def submit(pool, day):
+        day_start, day_end = local_day_bounds(day)
+        # The fixed windows starting on that day; the next day starts where they end
+        range_start, range_end = align_to_window(day_start, window), align_to_window(day_end, window)
+        points = load_check_points(range_start, day_end - timedelta(microseconds=1))
+        window_points = [point for point in points if point.time < range_end]
+        times, lats, lons = point_arrays(window_points)
+        jobs = [
+            (positions, pool.submit(
+                cluster_partition, times[positions], lats[positions], lons[positions],
+                to_microseconds(range_start), window // timedelta(microseconds=1), distance_meters, cell,
+            ))
+            for cell, positions in (day_partitions(window_points, busy_day_checks) if window_points else [])
+        ]
+        return day, points, window_points, jobs
+
+    def save(day, points, window_points, jobs):
+        day_start, day_end = local_day_bounds(day)
+        clusters = []
+        for positions, future in jobs:
+            for window_start, window_end, members in future.result():
+                clusters.append((
+                    from_microseconds(window_start), from_microseconds(window_end),
+                    [window_points[positions[member]] for member in members],
+                ))
+        clusters.sort(key=lambda cluster: (cluster[0], cluster[2][0].time, cluster[2][0].id))
+
+        with transaction.atomic():
+            time_distance = executor._save_time_distance_clusters(
+                clusters, align_to_window(day_start, window), 'fixed', time_window_minutes, distance_meters,
+                end_time=align_to_window(day_end, window)
+            )
+            same_location = executor._analyze_same_location_violations(
+                day_start, day_end - timedelta(microseconds=1), points_from(points, day_start)
+            )
+            if checkpoint:
+                AnalysisWatermark.objects.update_or_create(key=checkpoint, defaults={'processed_until': day_end})
+        totals[0] += time_distance
+        totals[1] += same_location
+
+        # Violation counts in the expeditor daily KPIs
+        try:
+            refresh_expeditor_days(expeditor_days_between(day_start, day_end))
+        except Exception as e:
+            logger.error(f"Failed to refresh expeditor KPIs for {day}: {e}")
+        if on_day:
+            on_day(day, time_distance, same_location)
+
+    # Spawned workers set Django up themselves instead of inheriting the
+    # parent's state and database connections
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+    )
+    with pool:
+        pending = deque()
+        days = iter(days)
+        while True:
+            # Keep about one day per worker clustering ahead of the writes
+            while len(pending) <= workers:
+                day = next(days, None)
+                if day is None:
+                    break
+                pending.append(submit(pool, day))
+            if not pending:
+                break
+            save(*pending.popleft())
+            if stop and stop():
+                pool.shutdown(cancel_futures=True)
+                break
+
+    return totals[0], totals[1]
+
+
+def backfill_key(first_day, last_day, time_window_minutes, distance_meters):
+    """AnalysisWatermark key of the checkpoint of a backfill."""
+    return f'backfill:fixed:{time_window_minutes}m:{distance_meters}m:{first_day}:{last_day}'
+
+
+def backfill_patterns(first_day, last_day, time_window_minutes, distance_meters, workers=None,
+                      task_run=None, restart=False, on_day=None):
+    """
+    Analyse the local days first_day..last_day, resuming after the last
+    day an earlier backfill of the same range and parameters committed
+    (unless restart). The task_run's total/processed count days; setting
+    it to cancelled (the task run cancel API) stops the backfill after the
+    current day. Returns the days, the days done (including earlier runs),
+    the record totals and whether it was cancelled.
+    """
+    key = backfill_key(first_day, last_day, time_window_minutes, distance_meters)
+    days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+    checkpoint = None if restart else AnalysisWatermark.objects.filter(key=key).first()
+    if checkpoint:
+        # processed_until is the end of the last committed day
+        resume_day = timezone.localtime(checkpoint.processed_until).date()
+        days_left = [day for day in days if day >= resume_day]
+    else:
+        days_left = days
+
+    result = {
+        'days': len(days),
+        'done': len(days) - len(days_left),
+        'time_distance': 0,
+        'same_location': 0,
+        'cancelled': False,
+    }
+    if task_run:
+        # Only the progress fields, so a concurrent cancellation is not
+        # overwritten; the save publishes the progress event (signals)
+        task_run.total = result['days']
+        task_run.processed = result['done']
+        task_run.save(update_fields=['total', 'processed'])
+
+    def day_done(day, time_distance, same_location):
+        result['done'] += 1
+        result['time_distance'] += time_distance
+        result['same_location'] += same_location
+        if task_run:
+            # The published event carries the current status, e.g. a cancellation
+            task_run.refresh_from_db(fields=['status', 'is_running'])
+            task_run.processed = result['done']
+            task_run.status_message = f"Backfilled {day} ({result['done']}/{result['days']} days)"
+            task_run.save(update_fields=['processed', 'status_message'])
+        if on_day:
+            on_day(day, time_distance, same_location)
+
+    def cancelled():
+        result['cancelled'] = bool(task_run) and TaskRun.objects.filter(
+            pk=task_run.pk, status=TaskRun.STATUS_CANCELLED
+        ).exists()
+        return result['cancelled']
+
+    if days_left and not cancelled():
+        analyze_days(
+            days_left, time_window_minutes, distance_meters, workers=workers,
+            on_day=day_done, checkpoint=key, stop=cancelled
+        )
+    return result
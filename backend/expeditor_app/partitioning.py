@@ -0,0 +1,406 @@
+"""
+Monthly range partitioning of the Check and CheckDetail tables (PostgreSQL).
+
+Check is partitioned by yetkazilgan_vaqti and CheckDetail by check_date,
+one partition per local calendar month plus a DEFAULT partition for
+rows without a date. Queries bounded on those columns (every dashboard
+and analytics query) only scan the months they touch, and old months
+can be detached from the parent without rewriting anything.
+
+Existing installs are converted with `manage_partitions --convert`
+(convert_to_partitioned): the table is copied into a partitioned
+replacement under a write lock and the two are swapped, keeping the old
+heap as `<table>_unpartitioned` until it is dropped by hand. PostgreSQL
+requires unique indexes on a partitioned table to include the partition
+key, so the primary key and the unique check_id / checkURL indexes
+become (column, partition key) unique indexes. The columns the models
+declare unique stay unique across partitions through a guard table
+(ensure_unique_guard): a trigger on the partitioned table keeps one row
+per value in UNIQUE_GUARD_TABLE, whose primary key rejects a duplicate
+in any month with the usual unique violation (IntegrityError), so the
+importer's update_or_create behaves as before.
+
+Future months are created ahead of time by the MAINTAIN_PARTITIONS
+scheduled task (ensure_partitions).
+"""
+
+import logging
+from datetime import date, datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Check, CheckDetail
+
+logger = logging.getLogger(__name__)
+
+# model -> partition key column
+PARTITION_KEYS = {
+    Check: 'yetkazilgan_vaqti',
+    CheckDetail: 'check_date',
+}
+
+DEFAULT_MONTHS_AHEAD = 3
+
+# (table, column, value) -> row id of the unique values of partitioned tables
+UNIQUE_GUARD_TABLE = 'expeditor_app_partition_unique_value'
+UNIQUE_GUARD_FUNCTION = 'expeditor_app_partition_unique_sync'
+
+# Arguments: table name, then the guarded columns. AFTER row triggers see
+# a row moved to another partition as a delete followed by an insert.
+UNIQUE_GUARD_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {UNIQUE_GUARD_FUNCTION}() RETURNS trigger AS $$
+DECLARE
+    col text;
+    old_value text;
+    new_value text;
+BEGIN
+    FOR i IN 1 .. TG_NARGS - 1 LOOP
+        col := TG_ARGV[i];
+        old_value := NULL;
+        new_value := NULL;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            old_value := to_jsonb(OLD) ->> col;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'INSERT') THEN
+            new_value := to_jsonb(NEW) ->> col;
+        END IF;
+        IF TG_OP = 'UPDATE' AND old_value IS NOT DISTINCT FROM new_value AND OLD.id = NEW.id THEN
+            CONTINUE;
+        END IF;
+        IF old_value IS NOT NULL THEN
+            DELETE FROM {UNIQUE_GUARD_TABLE}
+            WHERE table_name = TG_ARGV[0] AND column_name = col AND value = old_value AND row_id = OLD.id;
+        END IF;
+        IF new_value IS NOT NULL THEN
+            INSERT INTO {UNIQUE_GUARD_TABLE} (table_name, column_name, value, row_id)
+            VALUES (TG_ARGV[0], col, new_value, NEW.id);
+        END IF;
+    END LOOP;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _q(name):
+    return connection.ops.quote_name(name)
+
+
+def month_start(value):
+    """First day of the local month of a date or datetime."""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_boundary(month):
+    """Aware local midnight of the first day of a month."""
+    return timezone.make_aware(datetime(month.year, month.month, 1))
+
+
+def partition_name(model, month):
+    return f'{model._meta.db_table}_p{month:%Y%m}'
+
+
+def default_partition_name(model):
+    return f'{model._meta.db_table}_pdefault'
+
+
+def _table_exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(model):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))',
+            [model._meta.db_table],
+        )
+        return cursor.fetchone()[0]
+
+
+def list_partitions(model):
+    """(name, bound expression) of every partition, oldest month first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY c.relname
+            """,
+            [model._meta.db_table],
+        )
+        return cursor.fetchall()
+
+
+def partition_month(model, name):
+    """Month a partition covers, parsed from its name; None for DEFAULT."""
+    suffix = name[len(model._meta.db_table) + 2:]
+    if not name.startswith(f'{model._meta.db_table}_p') or not suffix.isdigit():
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+def create_month_partition(model, month):
+    """Create and attach the partition of one month. Returns True if created.
+
+    Rows of that month that landed in the DEFAULT partition (e.g. late
+    imports for a month that had no partition yet) are moved into it. The
+    guard trigger only sees them leave the DEFAULT partition, so their
+    unique guard rows are written again.
+    """
+    table = model._meta.db_table
+    name = partition_name(model, month)
+    key = PARTITION_KEYS[model]
+    start, end = month_boundary(month), month_boundary(add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if _table_exists(cursor, name):
+            return False
+        cursor.execute(f'CREATE TABLE {_q(name)} (LIKE {_q(table)} INCLUDING DEFAULTS)')
+        default = default_partition_name(model)
+        if _table_exists(cursor, default):
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {_q(default)} WHERE {_q(key)} >= %s AND {_q(key)} < %s RETURNING *) '
+                f'INSERT INTO {_q(name)} SELECT * FROM moved',
+                [start, end],
+            )
+            if cursor.rowcount:
+                logger.info(f'Moved {cursor.rowcount} rows from {default} into {name}')
+                if _guard_installed(cursor, model):
+                    _fill_unique_guard(cursor, model, name)
+        cursor.execute(
+            f'ALTER TABLE {_q(table)} ATTACH PARTITION {_q(name)} FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+    logger.info(f'Created partition {name}')
+    return True
+
+
+def unique_columns(model):
+    """Columns the model declares unique, other than the primary key."""
+    return [field.column for field in model._meta.concrete_fields if field.unique and not field.primary_key]
+
+
+def unique_guard_trigger(model):
+    return f'{model._meta.db_table}_unique_guard'
+
+
+def _guard_installed(cursor, model):
+    cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = %s)', [unique_guard_trigger(model)])
+    return cursor.fetchone()[0]
+
+
+def _fill_unique_guard(cursor, model, source):
+    """Guard rows of the model's unique values in `source` (the table or
+    one of its partitions); values another row holds already are skipped."""
+    table = model._meta.db_table
+    for column in unique_columns(model):
+        cursor.execute(
+            f'INSERT INTO {_q(UNIQUE_GUARD_TABLE)} (table_name, column_name, value, row_id) '
+            f'SELECT %s, %s, {_q(column)}::text, id FROM {_q(source)} WHERE {_q(column)} IS NOT NULL '
+            f'ON CONFLICT DO NOTHING',
+            [table, column],
+        )
+
+
+def ensure_unique_guard(model):
+    """Install the guard table and trigger that keep the model's unique
+    columns unique across partitions, filling the table from the existing
+    rows. Returns True if the trigger was created."""
+    table = model._meta.db_table
+    trigger = unique_guard_trigger(model)
+    columns = unique_columns(model)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not columns or _guard_installed(cursor, model):
+            return False
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {_q(UNIQUE_GUARD_TABLE)} ('
+            f'table_name text NOT NULL, column_name text NOT NULL, value text NOT NULL, row_id bigint NOT NULL, '
+            f'PRIMARY KEY (table_name, column_name, value))'
+        )
+        cursor.execute(UNIQUE_GUARD_FUNCTION_SQL)
+        # Writes wait until the guard covers every existing row
+        cursor.execute(f'LOCK TABLE {_q(table)} IN EXCLUSIVE MODE')
+        _fill_unique_guard(cursor, model, table)
+        for column in columns:
+            cursor.execute(
+                f'SELECT count(*) - count(DISTINCT {_q(column)}) FROM {_q(table)} WHERE {_q(column)} IS NOT NULL'
+            )
+            duplicates = cursor.fetchone()[0]
+            if duplicates:
+                logger.warning(f'{table}.{column} already has {duplicates} duplicate values across partitions')
+        arguments = ', '.join(f"'{name}'" for name in [table] + columns)
+        cursor.execute(
+            f'CREATE TRIGGER {_q(trigger)} AFTER INSERT OR UPDATE OR DELETE ON {_q(table)} '
+            f'FOR EACH ROW EXECUTE FUNCTION {UNIQUE_GUARD_FUNCTION}({arguments})'
+        )
+    logger.info(f'Installed the unique guard of {table} ({", ".join(columns)})')
+    return True
+
+
+def ensure_partitions(model, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Make sure partitions exist from the current month to months_ahead
+    months later, and that the unique guard is installed. Returns the
+    number of partitions created."""
+    if not is_partitioned(model):
+        return 0
+    ensure_unique_guard(model)
+    current = month_start(timezone.localdate())
+    return sum(
+        create_month_partition(model, add_months(current, offset))
+        for offset in range(months_ahead + 1)
+    )
+
+
+def detach_partitions_before(model, month):
+    """Detach the partitions of months before `month`. The detached tables
+    keep their data and names; returns the detached table names."""
+    table = model._meta.db_table
+    detached = []
+    for name, _ in list_partitions(model):
+        covered = partition_month(model, name)
+        if covered is None or covered >= month:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {_q(table)} DETACH PARTITION {_q(name)}')
+        detached.append(name)
+        logger.info(f'Detached partition {name}')
+    return detached
+
+
+def _unique_indexes(cursor, table):
+    """(index name, column names) of the unique indexes of a table."""
+    cursor.execute(
+        """
+        SELECT ic.relname, array_agg(a.attname::text ORDER BY k.ord)
+        FROM pg_index x
+        JOIN pg_class ic ON ic.oid = x.indexrelid
+        CROSS JOIN LATERAL unnest(x.indkey) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+        WHERE x.indrelid = to_regclass(%s) AND x.indisunique
+        GROUP BY ic.relname
+        """,
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _other_indexes(cursor, table):
+    """(index name, definition) of the non-unique indexes of a table."""
+    cursor.execute(
+        """
+        SELECT ic.relname, pg_get_indexdef(x.indexrelid)
+        FROM pg_index x JOIN pg_class ic ON ic.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(%s) AND NOT x.indisunique
+        """,
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _foreign_keys(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def convert_to_partitioned(model, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Replace a table with a monthly partitioned copy.
+
+    Runs in one transaction holding an EXCLUSIVE lock on the table, so
+    reads continue but imports wait until the swap is done; run it in a
+    maintenance window. Returns the number of rows copied.
+    """
+    table = model._meta.db_table
+    key = PARTITION_KEYS[model]
+    new_table = f'{table}_partitioned'
+    old_table = f'{table}_unpartitioned'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {_q(table)} IN EXCLUSIVE MODE')
+        unique_indexes = _unique_indexes(cursor, table)
+        other_indexes = _other_indexes(cursor, table)
+        foreign_keys = _foreign_keys(cursor, table)
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id'), attidentity <> '' FROM pg_attribute "
+            "WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+            [table, table],
+        )
+        sequence, identity = cursor.fetchone()
+
+        cursor.execute(
+            f'CREATE TABLE {_q(new_table)} (LIKE {_q(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({_q(key)})'
+        )
+        # The id default moves over after the swap
+        cursor.execute(f'ALTER TABLE {_q(new_table)} ALTER COLUMN id DROP DEFAULT')
+
+        cursor.execute(f'SELECT min({_q(key)}), max({_q(key)}), max(id) FROM {_q(table)}')
+        first, last, max_id = cursor.fetchone()
+        current = month_start(timezone.localdate())
+        month = month_start(first) if first else current
+        final = add_months(max(month_start(last) if last else current, current), months_ahead)
+        cursor.execute(
+            f'CREATE TABLE {_q(default_partition_name(model))} PARTITION OF {_q(new_table)} DEFAULT'
+        )
+        while month <= final:
+            cursor.execute(
+                f'CREATE TABLE {_q(partition_name(model, month))} PARTITION OF {_q(new_table)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [month_boundary(month), month_boundary(add_months(month, 1))],
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {_q(new_table)} SELECT * FROM {_q(table)}')
+        copied = cursor.rowcount
+
+        # Free the index names for the new table
+        for name, _ in unique_indexes + other_indexes:
+            cursor.execute(f'ALTER INDEX {_q(name)} RENAME TO {_q(f"{name[:50]}_unpart")}')
+        for name, columns in unique_indexes:
+            if key not in columns:
+                columns = columns + [key]
+            cursor.execute(
+                f'CREATE UNIQUE INDEX {_q(name)} ON {_q(new_table)} ({", ".join(_q(c) for c in columns)})'
+            )
+        for name, definition in other_indexes:
+            cursor.execute(definition.replace(f' ON public.{table} ', f' ON public.{new_table} ', 1)
+                           .replace(f' ON {table} ', f' ON {new_table} ', 1))
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {_q(new_table)} ADD CONSTRAINT {_q(name)} {definition}')
+
+        cursor.execute(f'ALTER TABLE {_q(table)} RENAME TO {_q(old_table)}')
+        cursor.execute(f'ALTER TABLE {_q(new_table)} RENAME TO {_q(table)}')
+        # Partitioned tables cannot have identity columns before PostgreSQL
+        # 17, so id keeps a sequence default: the serial sequence moves to
+        # the new table, an identity (whose sequence stays with the old
+        # table) is replaced by a plain sequence. The old table itself is
+        # not altered, it may have pending deferred constraint checks.
+        if identity:
+            cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {_q(f"{old_table}_id_seq")}')
+            sequence = _q(f'{table}_id_seq')
+            cursor.execute(f'CREATE SEQUENCE {sequence} START WITH {(max_id or 0) + 1}')
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {_q(table)}.id')
+        cursor.execute(f'ALTER TABLE {_q(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)', [sequence])
+        ensure_unique_guard(model)
+
+        # The union views followed the renamed old table
+        from .archive import ensure_archive_tables
+        ensure_archive_tables()
+
+    logger.info(f'Converted {table} to monthly partitions ({copied} rows copied, old table kept as {old_table})')
+    return copied
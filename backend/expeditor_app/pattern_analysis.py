@@ -0,0 +1,263 @@
+"""
+Single-pass sliding-window sweep for the pattern analysis task.
+
+The checks of the analysed range are loaded once, time-sorted, as compact
+CheckPoint tuples and swept with two pointers; each window's checks are a
+slice of that list, so the number of queries no longer grows with the
+number of windows. Two window modes:
+
+- 'fixed': back-to-back windows (the original behaviour); empty windows
+  cost nothing.
+- 'anchored': every check not yet in a cluster opens a window
+  [its time, its time + window), so a cluster is not split by a fixed
+  boundary running through it.
+
+In both modes clustering is greedy, seeds in time order (see
+geo_index.seed_clusters). Only the checks of a found cluster are loaded
+as model instances.
+
+Runs are incremental and idempotent: fixed windows are aligned to
+multiples of the window length (align_to_window), every cluster gets a fingerprint from
+its parameters, window and seed check (stable when later checks join
+it), and the task upserts by fingerprint and keeps an AnalysisWatermark
+per parameter set, so the next run starts from there instead of
+re-inserting the whole lookback.
+
+Imports mark the partitions they touch (DirtyPartition): (expeditor,
+local day) for same-location groups and (local day, spatial cell) for
+time-distance clusters, which belong to the cell of their seed check.
+The ANALYZE_DIRTY task re-analyses just those partitions.
+"""
+
+import hashlib
+import math
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+
+from .geo_index import GridIndex, seed_clusters
+from .kpi import kpi_day
+from .models import Check, CheckDetail, DirtyPartition
+from .utils import local_day_bounds
+
+WINDOW_MODES = ('fixed', 'anchored')
+
+# Smallest cluster that counts as a violation
+MIN_CLUSTER_SIZE = 3
+
+CheckPoint = namedtuple('CheckPoint', ['id', 'check_id', 'time', 'lat', 'lon', 'expeditor'])
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Side of the spatial cells of the time-distance partitions (~5.5 km of latitude)
+PARTITION_CELL_DEGREES = 0.05
+
+
+def watermark_key(mode, window_minutes, radius_meters):
+    return f'patterns:{mode}:{window_minutes}m:{radius_meters}m'
+
+
+def align_to_window(moment, window):
+    """Start of the fixed window containing moment; windows are multiples
+    of the window length since the epoch, so every run uses the same ones."""
+    return moment - (moment - EPOCH) % window
+
+
+def local_day_start(moment):
+    """Start of the local day of moment, the day same-location groups use."""
+    return local_day_bounds(kpi_day(moment))[0]
+
+
+def partition_cell(lat, lon):
+    """Spatial cell of a point, as (row, column) of PARTITION_CELL_DEGREES."""
+    return math.floor(lat / PARTITION_CELL_DEGREES), math.floor(lon / PARTITION_CELL_DEGREES)
+
+
+def cell_bounds(cell, margin=1):
+    """(min lat, max lat, min lon, max lon) of the cell and `margin` cells
+    around it, enough for every cluster seeded in the cell."""
+    row, column = cell
+    return (
+        (row - margin) * PARTITION_CELL_DEGREES,
+        (row + margin + 1) * PARTITION_CELL_DEGREES,
+        (column - margin) * PARTITION_CELL_DEGREES,
+        (column + margin + 1) * PARTITION_CELL_DEGREES,
+    )
+
+
+def dirty_partitions(expeditor, moment, lat, lon):
+    """(kind, date, expeditor, cell row, cell column) of the partitions
+    whose analysis a check with these values affects.
+
+    A check near a cell border can join clusters seeded in the next cell,
+    so the cell and its neighbours (the cells cell_bounds() loads) are all
+    dirty.
+    """
+    day = kpi_day(moment)
+    if day is None or lat is None or lon is None:
+        return set()
+    row, column = partition_cell(lat, lon)
+    partitions = {
+        (DirtyPartition.KIND_CELL_DAY, day, '', row + row_offset, column + column_offset)
+        for row_offset in (-1, 0, 1)
+        for column_offset in (-1, 0, 1)
+    }
+    if expeditor is not None:
+        partitions.add((DirtyPartition.KIND_EXPEDITOR_DAY, day, expeditor, 0, 0))
+    return partitions
+
+
+def mark_dirty(partitions):
+    """Record partitions for the ANALYZE_DIRTY task; already pending ones are kept."""
+    DirtyPartition.objects.bulk_create(
+        [
+            DirtyPartition(kind=kind, date=day, ekispiditor=expeditor, cell_lat=row, cell_lon=column)
+            for kind, day, expeditor, row, column in partitions
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def points_from(points, moment):
+    """The sorted points at or after moment."""
+    return points[bisect_left([point.time for point in points], moment):]
+
+
+def fingerprint(*parts):
+    """Deterministic CheckAnalytics.fingerprint of a cluster identity;
+    datetimes count as the same instant whatever their time zone."""
+    text = '|'.join(
+        part.astimezone(dt_timezone.utc).isoformat() if isinstance(part, datetime) else str(part)
+        for part in parts
+    )
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def load_check_points(start_time, end_time, expeditor=None, bounds=None):
+    """Checks with coordinates in [start_time, end_time], sorted by time;
+    optionally only one expeditor's or those inside bounds (cell_bounds())."""
+    checks = Check.objects.filter(
+        yetkazilgan_vaqti__gte=start_time,
+        yetkazilgan_vaqti__lte=end_time,
+        check_lat__isnull=False,
+        check_lon__isnull=False,
+    )
+    if expeditor is not None:
+        checks = checks.filter(ekispiditor=expeditor)
+    if bounds is not None:
+        min_lat, max_lat, min_lon, max_lon = bounds
+        checks = checks.filter(
+            check_lat__gte=min_lat, check_lat__lt=max_lat,
+            check_lon__gte=min_lon, check_lon__lt=max_lon,
+        )
+    rows = (
+        checks
+        .order_by('yetkazilgan_vaqti', 'id')
+        .values_list('id', 'check_id', 'yetkazilgan_vaqti', 'check_lat', 'check_lon', 'ekispiditor')
+    )
+    return [CheckPoint(*row) for row in rows.iterator(chunk_size=5000)]
+
+
+def fixed_windows(points, start_time, window):
+    """(window start, window end, points) of every non-empty window
+    start_time + k * window, in one pass over the sorted points."""
+    lo = 0
+    while lo < len(points):
+        window_start = start_time + (points[lo].time - start_time) // window * window
+        window_end = window_start + window
+        hi = lo
+        while hi < len(points) and points[hi].time < window_end:
+            hi += 1
+        yield window_start, window_end, points[lo:hi]
+        lo = hi
+
+
+def fixed_window_clusters(points, start_time, window, radius_meters, min_size=MIN_CLUSTER_SIZE):
+    """(window start, window end, cluster points) per cluster, fixed windows."""
+    for window_start, window_end, window_points in fixed_windows(points, start_time, window):
+        if len(window_points) < min_size:
+            continue
+        coordinates = [(point.lat, point.lon) for point in window_points]
+        for cluster in seed_clusters(coordinates, radius_meters, min_size):
+            yield window_start, window_end, [window_points[i] for i in cluster]
+
+
+def anchored_clusters(points, window, radius_meters, min_size=MIN_CLUSTER_SIZE, claimed=()):
+    """(window start, window end, cluster points) per cluster, windows
+    anchored at the seed check. The grid index holds the unclustered
+    points of the current window [seed time, seed time + window).
+    Checks whose check_id is in `claimed` already belong to a cluster of
+    an earlier run."""
+    index = GridIndex(radius_meters)
+    clustered = {i for i, point in enumerate(points) if point.check_id in claimed}
+    hi = 0
+    for i, seed in enumerate(points):
+        window_end = seed.time + window
+        while hi < len(points) and points[hi].time < window_end:
+            if hi not in clustered:
+                index.add(hi, points[hi].lat, points[hi].lon)
+            hi += 1
+        if i in clustered:
+            continue
+        index.remove(i, seed.lat, seed.lon)
+        members = [i] + [j for j, _ in index.near(seed.lat, seed.lon)]
+        if len(members) < min_size:
+            continue
+        for j in members[1:]:
+            index.remove(j, points[j].lat, points[j].lon)
+            clustered.add(j)
+        yield seed.time, window_end, [points[j] for j in members]
+
+
+def window_clusters(points, start_time, window, radius_meters, mode='fixed', claimed=()):
+    if mode == 'anchored':
+        return anchored_clusters(points, window, radius_meters, claimed=claimed)
+    return fixed_window_clusters(points, start_time, window, radius_meters)
+
+
+def to_microseconds(moment):
+    """Integer microseconds since the epoch, the time unit of point arrays."""
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def from_microseconds(value):
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def point_arrays(points):
+    """(times, lats, lons) NumPy arrays of the points, the compact form
+    partitions are sent to worker processes in."""
+    return (
+        np.fromiter((to_microseconds(point.time) for point in points), dtype=np.int64, count=len(points)),
+        np.fromiter((point.lat for point in points), dtype=float, count=len(points)),
+        np.fromiter((point.lon for point in points), dtype=float, count=len(points)),
+    )
+
+
+def cluster_partition(times, lats, lons, start_time, window, radius_meters, cell=None):
+    """Fixed-window clusters of point arrays, run in a worker process: no
+    database access, times and start_time/window in microseconds. Returns
+    (window start, window end, positions in the arrays) per cluster, only
+    those seeded in cell when one is given."""
+    points = [
+        CheckPoint(i, None, time, lat, lon, None)
+        for i, (time, lat, lon) in enumerate(zip(times.tolist(), lats.tolist(), lons.tolist()))
+    ]
+    clusters = []
+    for window_start, window_end, cluster in fixed_window_clusters(points, start_time, window, radius_meters):
+        if cell is None or partition_cell(cluster[0].lat, cluster[0].lon) == cell:
+            clusters.append((window_start, window_end, [point.id for point in cluster]))
+    return clusters
+
+
+def load_cluster_checks(cluster):
+    """Check instances of the cluster points, in cluster order."""
+    checks = Check.objects.in_bulk([point.id for point in cluster])
+    return [checks[point.id] for point in cluster if point.id in checks]
+
+
+def load_detail_sums(check_ids):
+    """{check_id: CheckDetail.total_sum} of the checks that have a detail, in one query."""
+    return dict(CheckDetail.objects.filter(check_id__in=set(check_ids)).values_list('check_id', 'total_sum'))
@@ -0,0 +1,33 @@
+"""
+Stored request profiles (see expeditor_app.profiling). Super user only.
+"""
+
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .profiling import list_reports, load_report
+
+
+class ProfileListView(APIView):
+    """Summaries of the stored profiles, newest first."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Access denied. Super user required.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'results': list_reports()})
+
+
+class ProfileDetailView(APIView):
+    """One profile: SQL statements with plans, top functions and timings."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, report_id):
+        if not request.user.is_superuser:
+            return Response({'error': 'Access denied. Super user required.'}, status=status.HTTP_403_FORBIDDEN)
+        report = load_report(report_id)
+        if report is None:
+            return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(report)
@@ -0,0 +1,263 @@
+"""
+On-demand request profiling for superusers.
+
+A superuser adds `?_profile=1` (or the header `X-Profile: 1`) to any
+request; ProfilerMiddleware then runs it under cProfile with every SQL
+statement captured, EXPLAINs the slowest SELECTs afterwards, and writes a
+report to PROFILE_DIR. The response carries X-Profile-Id / X-Profile-Url
+headers; /api/admin/profiles/<id>/ serves the report. Files are shared by
+all gunicorn workers, like the metrics snapshots.
+
+Safeguards: only superusers (session or token) can trigger it, each user
+gets PROFILE_RATE_LIMIT profiles per PROFILE_RATE_WINDOW seconds (counted
+in ProfileRun rows), a worker profiles one request at a time (others are
+served normally), the number of captured statements and EXPLAINs is
+capped, EXPLAIN never ANALYZEs (the statement is planned, not run again),
+and only the newest PROFILE_KEEP reports are kept. It is off unless
+PROFILER_ENABLED=True.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .models import ProfileRun
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_RATE_LIMIT = 10
+PROFILE_RATE_WINDOW = 600
+PROFILE_KEEP = 100
+MAX_STATEMENTS = 1000
+EXPLAIN_LIMIT = 10
+TOP_FUNCTIONS = 40
+
+REPORT_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# One profiled request per worker process at a time
+_profile_lock = threading.Lock()
+
+
+def profile_requested(request):
+    value = request.GET.get(PROFILE_PARAM) or request.META.get(PROFILE_HEADER)
+    return value not in (None, '', '0', 'false')
+
+
+def _report_path(report_id, user_id):
+    return os.path.join(settings.PROFILE_DIR, f'{user_id}-{report_id}.json')
+
+
+def _report_files():
+    """(mtime, user id, report id, path) of the stored reports, newest first."""
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except OSError:
+        return []
+    files = []
+    for name in names:
+        user_id, _, rest = name.partition('-')
+        report_id = rest[:-5]
+        if not name.endswith('.json') or not REPORT_ID_RE.match(report_id):
+            continue
+        path = os.path.join(settings.PROFILE_DIR, name)
+        try:
+            files.append((os.path.getmtime(path), user_id, report_id, path))
+        except OSError:
+            continue
+    return sorted(files, reverse=True)
+
+
+def claim_profile(user):
+    """Record a profile run for the user, or return False when they used
+    up their profiles for the current window.
+
+    Runs are ProfileRun rows rather than the report files, which
+    PROFILE_KEEP pruning deletes; the user row is locked so concurrent
+    workers cannot both take the last profile.
+    """
+    since = timezone.now() - timedelta(seconds=PROFILE_RATE_WINDOW)
+    with transaction.atomic():
+        get_user_model().objects.select_for_update().only('pk').get(pk=user.pk)
+        runs = ProfileRun.objects.filter(user=user)
+        runs.filter(created_at__lt=since).delete()
+        if runs.count() >= PROFILE_RATE_LIMIT:
+            return False
+        ProfileRun.objects.create(user=user)
+    return True
+
+
+class StatementCapture:
+    """execute_wrapper recording every statement run on one connection."""
+
+    def __init__(self, alias, statements):
+        self.alias = alias
+        self.statements = statements
+        # Statements past MAX_STATEMENTS, counted but not kept
+        self.dropped = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if len(self.statements) < MAX_STATEMENTS:
+                self.statements.append({
+                    'alias': self.alias,
+                    'sql': sql,
+                    'params': None if many else params,
+                    'duration_ms': round(duration * 1000, 3),
+                })
+            else:
+                self.dropped += 1
+
+
+def explain(alias, sql, params):
+    """The plan of one statement, as text lines; never executes it."""
+    connection = connections[alias]
+    prefix = 'EXPLAIN (VERBOSE, FORMAT TEXT)' if connection.vendor == 'postgresql' else 'EXPLAIN QUERY PLAN'
+    try:
+        # A savepoint, so a failing EXPLAIN does not break an open transaction
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except (DatabaseError, TypeError, ValueError) as e:
+        return [f'EXPLAIN failed: {e}']
+
+
+def _function_name(key):
+    filename, line, name = key
+    return f'{name} ({filename}:{line})' if line else name
+
+
+def top_functions(profiler, limit=TOP_FUNCTIONS):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': _function_name(key),
+            'calls': total_calls,
+            'total_ms': round(total_time * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for key, (primitive_calls, total_calls, total_time, cumulative, callers) in rows
+    ]
+
+
+def serializer_seconds(profiler):
+    """Time in the outermost DRF to_representation calls (a list serializer
+    includes its items), i.e. building the response data."""
+    stats = pstats.Stats(profiler, stream=io.StringIO()).stats
+    times = [
+        cumulative for (filename, line, name), (_, _, _, cumulative, _) in stats.items()
+        if name == 'to_representation' and filename.endswith(os.path.join('rest_framework', 'serializers.py'))
+    ]
+    return max(times, default=0.0)
+
+
+def build_report(request, response, profiler, statements, dropped, total_seconds, render_seconds):
+    captured = statements
+    slowest = sorted(
+        (s for s in captured if s['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))),
+        key=lambda s: s['duration_ms'], reverse=True,
+    )
+    explained = set()
+    for statement in slowest:
+        if len(explained) >= EXPLAIN_LIMIT:
+            break
+        key = (statement['alias'], statement['sql'])
+        if key in explained:
+            continue
+        explained.add(key)
+        statement['explain'] = explain(statement['alias'], statement['sql'], statement['params'])
+
+    for statement in captured:
+        statement['params'] = None if statement['params'] is None else [str(p) for p in statement['params']]
+
+    match = getattr(request, 'resolver_match', None)
+    return {
+        'path': request.get_full_path(),
+        'method': request.method,
+        'view': (match.view_name or match.route) if match else None,
+        'status': response.status_code,
+        'user': request.user.get_username(),
+        'created_at': timezone.now().isoformat(),
+        'total_ms': round(total_seconds * 1000, 3),
+        'render_ms': round(render_seconds * 1000, 3),
+        'serializer_ms': round(serializer_seconds(profiler) * 1000, 3),
+        'sql': {
+            'count': len(captured) + dropped,
+            'captured': len(captured),
+            'total_ms': round(sum(s['duration_ms'] for s in captured), 3),
+        },
+        'statements': captured,
+        'functions': top_functions(profiler),
+    }
+
+
+def store_report(report, user):
+    """Write a report and prune old ones. Returns its id."""
+    report_id = uuid.uuid4().hex
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = _report_path(report_id, user.pk)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, default=str)
+    os.replace(tmp_path, path)
+    for _, _, _, old_path in _report_files()[PROFILE_KEEP:]:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+    return report_id
+
+
+def load_report(report_id):
+    if not REPORT_ID_RE.match(report_id or ''):
+        return None
+    for _, _, stored_id, path in _report_files():
+        if stored_id == report_id:
+            try:
+                with open(path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return None
+    return None
+
+
+def list_reports():
+    """Summary of the stored reports, newest first."""
+    summaries = []
+    for _, _, report_id, path in _report_files():
+        try:
+            with open(path) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summaries.append({
+            'id': report_id,
+            'path': report['path'],
+            'view': report['view'],
+            'status': report['status'],
+            'user': report['user'],
+            'created_at': report['created_at'],
+            'total_ms': report['total_ms'],
+            'sql_count': report['sql']['count'],
+            'sql_ms': report['sql']['total_ms'],
+        })
+    return summaries
@@ -0,0 +1,227 @@
+"""
+Query-count budgets for the API endpoints.
+
+Every URL name in expeditor_app/urls.py is either given a budget here
+(query parameters and the maximum number of SQL queries one GET may run)
+or listed in UNBUDGETED with the reason. The check_query_budgets command
+seeds a synthetic dataset at two sizes, requests every budgeted URL at
+both, and fails when a request goes over its budget or when its query
+count grows with the number of rows - the signature of an N+1 loop.
+"""
+
+from datetime import timedelta
+
+from django.urls import get_resolver
+from django.urls.resolvers import URLResolver
+from django.utils import timezone
+
+from .models import (
+    Check, CheckAnalytics, CheckDetail, City, Ekispiditor, Filial, Projects, ScheduledTask,
+    Sklad, TaskList, TaskRun, UserSession, YandexToken,
+)
+
+# Rows per unit of scale; the command compares scale 1 with a larger one
+CHECKS_PER_EXPEDITOR = 12
+EXPEDITORS_PER_SCALE = 3
+ANALYTICS_PER_EXPEDITOR = 3
+
+# url name: (query parameters, max queries)
+ENDPOINT_BUDGETS = {
+    'api-root': ({}, 8),
+    'analytics-summary': ({}, 12),
+    'violation-dashboard': ({}, 28),
+    'violation-detail': ({'expeditor': '{expeditor}'}, 12),
+    'violation-checks': ({}, 12),
+    'violation-insights': ({}, 16),
+    'same-location-violations': ({}, 12),
+    'analytics-simple': ({}, 10),
+    'statistics': ({}, 30),
+    'statistics-global': ({}, 30),
+    'manager-report': ({'date_from': '{date_from}', 'date_to': '{date_to}'}, 14),
+    'manager-report-pdf': ({'date_from': '{date_from}', 'date_to': '{date_to}'}, 14),
+    'check-sync': ({}, 12),
+    'bootstrap': ({}, 20),
+    'telegram-target': ({}, 8),
+    'task-status': ({}, 18),
+    'task-analytics': ({}, 16),
+    'yandex-token-status': ({}, 8),
+    'profile': ({}, 8),
+    'auth-status': ({}, 8),
+    'user-analytics': ({}, 24),
+    'live-user-data': ({}, 16),
+    'user-sessions': ({}, 12),
+    'profile-list': ({}, 8),
+    'projects-list': ({}, 8),
+    'projects-detail': ({}, 8),
+    'checkdetail-list': ({}, 10),
+    'checkdetail-detail': ({}, 8),
+    'sklad-list': ({}, 8),
+    'sklad-detail': ({}, 8),
+    'city-list': ({}, 8),
+    'city-detail': ({}, 8),
+    'filial-list': ({}, 8),
+    'filial-detail': ({}, 8),
+    'ekispiditor-list': ({}, 10),
+    'ekispiditor-detail': ({}, 10),
+    'check-list': ({}, 10),
+    'check-today-checks': ({}, 10),
+    'check-with-locations': ({}, 10),
+    'check-detail': ({}, 10),
+    'analytics-list': ({}, 10),
+    'analytics-detail': ({}, 10),
+    'tasks-list': ({}, 8),
+    'tasks-detail': ({}, 8),
+    'task-runs-list': ({}, 8),
+    'task-runs-recent': ({}, 8),
+    'task-runs-running': ({}, 8),
+    'task-runs-detail': ({}, 8),
+    'task-list-list': ({}, 8),
+    'task-list-detail': ({}, 8),
+    'yandex-tokens-list': ({}, 8),
+    'yandex-tokens-active': ({}, 8),
+    'yandex-tokens-detail': ({}, 8),
+}
+
+# url name: why it is not budgeted
+UNBUDGETED = {
+    'manager-report-email': 'POST only, sends mail',
+    'update-checks': 'POST only, calls the integration endpoints',
+    'events': 'long-lived event stream',
+    'metrics': 'reads worker snapshots, no database access',
+    'profile-detail': 'reads a stored profile file, none exist for the seeded data',
+    'register': 'POST only',
+    'login': 'POST only',
+    'logout': 'POST only',
+    'tasks-run-all-due': 'POST only, runs tasks',
+    'tasks-run-now': 'POST only, runs a task',
+    'task-runs-cancel': 'POST only',
+    'yandex-tokens-activate': 'POST only',
+    'yandex-tokens-block': 'POST only',
+    'yandex-tokens-deactivate': 'POST only',
+}
+
+# Detail routes: the model whose first row is requested
+DETAIL_MODELS = {
+    'projects-detail': Projects,
+    'checkdetail-detail': CheckDetail,
+    'sklad-detail': Sklad,
+    'city-detail': City,
+    'filial-detail': Filial,
+    'ekispiditor-detail': Ekispiditor,
+    'check-detail': Check,
+    'analytics-detail': CheckAnalytics,
+    'tasks-detail': ScheduledTask,
+    'task-runs-detail': TaskRun,
+    'task-list-detail': TaskList,
+    'yandex-tokens-detail': YandexToken,
+}
+
+
+def url_names(urlconf='expeditor_app.urls'):
+    """Names of all routes in the app's URLconf (format suffix variants included once)."""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    walk(get_resolver(urlconf).url_patterns)
+    return names
+
+
+def missing_budgets():
+    """Routes that have neither a budget nor a reason to be skipped."""
+    return sorted(url_names() - set(ENDPOINT_BUDGETS) - set(UNBUDGETED))
+
+
+def seed(scale, prefix='qb'):
+    """Create a representative dataset whose row counts grow with `scale`.
+
+    Returns the values the budget parameters are formatted with. Meant to
+    run inside a transaction that is rolled back afterwards.
+    """
+    now = timezone.now()
+    start = now - timedelta(days=2)
+
+    filials = Filial.objects.bulk_create([Filial(filial_name=f'{prefix} filial {i}') for i in range(scale)])
+    projects = Projects.objects.bulk_create([Projects(project_name=f'{prefix} project {i}') for i in range(scale)])
+    sklads = Sklad.objects.bulk_create([
+        Sklad(sklad_name=f'{prefix} sklad {i}', lat=41.30 + i * 0.1, lon=69.24) for i in range(scale)
+    ])
+    cities = City.objects.bulk_create([
+        City(city_name=f'{prefix} city {i}', filial=filial) for i, filial in enumerate(filials)
+    ])
+    expeditors = Ekispiditor.objects.bulk_create([
+        Ekispiditor(ekispiditor_name=f'{prefix} expeditor {i}', transport_number=f'{prefix}-T{i}',
+                    filial=filials[i % scale])
+        for i in range(EXPEDITORS_PER_SCALE * scale)
+    ])
+
+    checks, details, analytics = [], [], []
+    for e, expeditor in enumerate(expeditors):
+        project, sklad, city = projects[e % scale], sklads[e % scale], cities[e % scale]
+        expeditor_checks = []
+        for i in range(CHECKS_PER_EXPEDITOR):
+            delivered = start + timedelta(hours=e % 24, minutes=4 * i)
+            # Pairs of checks from the same spot, so violations are found
+            lat, lon = 41.30 + e * 0.01 + (i // 2) * 0.001, 69.24 + (i // 2) * 0.001
+            check = Check(
+                check_id=f'{prefix}-{e}-{i}', project=project.project_name, sklad=sklad.sklad_name,
+                city=city.city_name, ekispiditor=expeditor.ekispiditor_name, yetkazilgan_vaqti=delivered,
+                client_name=f'client {e}-{i}', check_lat=lat, check_lon=lon,
+                status='delivered' if i % 3 else 'pending', project_ref=project, sklad_ref=sklad,
+                city_ref=city, ekispiditor_ref=expeditor,
+            )
+            expeditor_checks.append(check)
+            details.append(CheckDetail(
+                check_id=check.check_id, checkURL=f'https://example.com/{check.check_id}',
+                check_date=delivered, check_lat=lat, check_lon=lon,
+                total_sum=100000 + i, nalichniy=50000, uzcard=30000, humo=20000, click=i,
+            ))
+        checks.extend(expeditor_checks)
+        for a in range(ANALYTICS_PER_EXPEDITOR):
+            window = expeditor_checks[a * 4:a * 4 + 4]
+            analytics.append(CheckAnalytics(
+                violation_type=(CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION if a % 2
+                                else CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE),
+                window_start=window[0].yetkazilgan_vaqti, window_end=window[-1].yetkazilgan_vaqti,
+                window_duration_minutes=10, center_lat=window[0].check_lat, center_lon=window[0].check_lon,
+                radius_meters=(50, 600, 1200)[a % 3], total_checks=len(window), unique_expiditors=1,
+                most_active_expiditor=expeditor.ekispiditor_name, most_active_count=len(window),
+                check_ids=[check.check_id for check in window],
+                check_details=[
+                    {'lat': check.check_lat, 'lng': check.check_lon, 'time': check.yetkazilgan_vaqti.isoformat(),
+                     'expeditor': check.ekispiditor, 'status': check.status}
+                    for check in window
+                ],
+            ))
+    Check.objects.bulk_create(checks)
+    CheckDetail.objects.bulk_create(details)
+    CheckAnalytics.objects.bulk_create(analytics)
+
+    task_list = TaskList.objects.create(code=f'{prefix}_task', name='Budget task', description='Seeded')
+    tasks = ScheduledTask.objects.bulk_create([
+        ScheduledTask(name=f'{prefix} task {i}', task_type=ScheduledTask.TASK_ANALYZE_PATTERNS, task=task_list)
+        for i in range(2 * scale)
+    ])
+    TaskRun.objects.bulk_create([
+        TaskRun(task_type=task.task_type, status=TaskRun.STATUS_COMPLETED, is_running=False, finished_at=now)
+        for task in tasks
+    ])
+    # bulk_create skips YandexToken.save(), which writes the active key to env.local
+    YandexToken.objects.bulk_create([YandexToken(
+        name=f'{prefix} token', keyword=f'{prefix.upper()}_KEY', api_key=f'{prefix}-key',
+        status=YandexToken.STATUS_ACTIVE,
+    )])
+    UserSession.objects.bulk_create([
+        UserSession(session_id=f'{prefix}-session-{i}', ip_address='127.0.0.1')
+        for i in range(2 * scale)
+    ])
+    return {
+        'date_from': (start - timedelta(hours=1)).isoformat(),
+        'date_to': (now + timedelta(hours=1)).isoformat(),
+        'expeditor': expeditors[0].ekispiditor_name,
+    }
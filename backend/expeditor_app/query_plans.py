@@ -0,0 +1,153 @@
+"""
+Query-plan checks for the hot endpoints.
+
+PLANNED_ENDPOINTS lists the busiest endpoints with the parameters the
+frontend sends (formatted with benchmark.benchmark_context()). The
+check_query_plans command seeds synthetic checks over the span the hot
+tables keep before archiving (inside a transaction that is rolled back),
+requests each endpoint, captures the SELECT statements it runs and
+EXPLAINs them as they are, with no planner settings changed. It fails on
+fallback scans (fallback_scans): a Seq Scan, or an Index Scan that only
+filters, of an app table of at least MIN_TABLE_ROWS rows that keeps less
+than MAX_SCAN_FRACTION of them. The planner only reads a table in full
+for so few rows when no index serves the filter - it stopped being
+sargable (e.g. a `__date` cast on an indexed column) or an index went
+missing. Scans that keep a larger share (a month of a year of checks)
+are cheaper than index lookups and are allowed, as are scans of small
+tables such as the dimensions. Once the check tables are partitioned
+(see partitioning), a one-month query must also be pruned to a single
+partition.
+"""
+
+import json
+
+from django.db import connection
+from django.utils import timezone
+
+from .partitioning import PARTITION_KEYS, add_months, month_boundary, month_start
+
+# Synthetic checks seeded before planning (over CHECK_ARCHIVE_AFTER_MONTHS)
+SEED_CHECKS = 200000
+
+# Tables with fewer (estimated) rows may be scanned in full
+MIN_TABLE_ROWS = 10000
+
+# Share of a table's rows below which a full scan means no index was usable
+MAX_SCAN_FRACTION = 0.01
+
+# plan name: (url name, query parameters; formatted with benchmark_context())
+PLANNED_ENDPOINTS = {
+    'checks by expeditor and time': ('check-list', {
+        'ekispiditor_id': '{ekispiditor_id}', 'date_from': '{date_from}', 'date_to': '{date_to}',
+    }),
+    'checks by expeditor name and time': ('check-list', {
+        'ekispiditor': '{expeditor}', 'date_from': '{date_from}', 'date_to': '{date_to}',
+    }),
+    'check search': ('check-list', {'search': 'market', 'limit': '100'}),
+    'today checks': ('check-today-checks', {}),
+    'check sync': ('check-sync', {}),
+    'expeditors with KPIs': ('ekispiditor-list', {}),
+    'statistics': ('statistics', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'analytics summary': ('analytics-summary', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'violation dashboard': ('violation-dashboard', {'date_from': '{date_from}', 'date_to': '{date_to}'}),
+    'violation detail': ('violation-detail', {
+        'expeditor': '{expeditor}', 'date_from': '{date_from}', 'date_to': '{date_to}',
+    }),
+    'manager report': ('manager-report', {'date_from': '{report_from}', 'date_to': '{report_to}'}),
+}
+
+
+def month_query(model):
+    """Query bounded to the current month on a model's partition key."""
+    month = month_start(timezone.localdate())
+    key = PARTITION_KEYS[model]
+    return model.objects.filter(**{
+        f'{key}__gte': month_boundary(month),
+        f'{key}__lt': month_boundary(add_months(month, 1)),
+    }).order_by()
+
+
+def capture_selects(client, url, params):
+    """Request a URL and return (response, [(sql, params)]) with every
+    distinct SELECT it ran on the default database, in order."""
+    statements = []
+
+    def capture(execute, sql, sql_params, many, context):
+        if not many and sql.lstrip().upper().startswith(('SELECT', 'WITH')) and (sql, sql_params) not in statements:
+            statements.append((sql, sql_params))
+        return execute(sql, sql_params, many, context)
+
+    with connection.execute_wrapper(capture):
+        response = client.get(url, params)
+    return response, statements
+
+
+def explain(sql, params=None):
+    """Return the JSON plan of a statement as the planner would run it."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def table_rows(relation):
+    """The planner's estimate of a relation's row count (reltuples is not
+    kept up to date for rows seeded in the same transaction)."""
+    return explain(f'SELECT 1 FROM {connection.ops.quote_name(relation)}')['Plan Rows']
+
+
+def plan_nodes(plan):
+    """Yield every node of a plan tree."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+# Scan nodes that read a relation; bitmap heap scans are always bounded by their bitmap index scans
+TABLE_SCANS = ('Seq Scan', 'Index Scan', 'Index Only Scan')
+
+
+def unbounded_scans(plan):
+    """Scan nodes that read a relation without an index condition:
+    sequential scans, and index scans that walk the whole index and only
+    filter."""
+    return [
+        node for node in plan_nodes(plan)
+        if node.get('Node Type') in TABLE_SCANS and 'Index Cond' not in node
+    ]
+
+
+def fallback_scans(plan, min_rows=MIN_TABLE_ROWS, max_fraction=MAX_SCAN_FRACTION):
+    """App tables the plan reads in full to keep only a few of their rows."""
+    scanned = set()
+    for node in unbounded_scans(plan):
+        relation = node.get('Relation Name') or ''
+        if not relation.startswith('expeditor_app_') or relation in scanned:
+            continue
+        rows = table_rows(relation)
+        if rows >= min_rows and node['Plan Rows'] < rows * max_fraction:
+            scanned.add(relation)
+    return sorted(scanned)
+
+
+def scanned_partitions(plan, model):
+    """Partitions of a model's table the plan reads."""
+    prefix = f'{model._meta.db_table}_p'
+    return sorted({
+        node['Relation Name'] for node in plan_nodes(plan)
+        if node.get('Relation Name', '').startswith(prefix)
+    })
+
+
+def describe(plan, depth=0):
+    """One line per plan node, indented like EXPLAIN's text format."""
+    label = plan.get('Node Type', '?')
+    for key in ('Index Name', 'Relation Name'):
+        if key in plan:
+            label += f' {key.split()[0].lower()}={plan[key]}'
+    lines = ['  ' * depth + label]
+    for child in plan.get('Plans', []):
+        lines.extend(describe(child, depth + 1))
+    return lines
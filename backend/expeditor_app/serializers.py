@@ -52,38 +52,95 @@ class EkispiditorSerializer(serializers.ModelSerializer):
                  'photo', 'is_active', 'today_checks_count', 'checks_count', 'created_at', 'updated_at']
 
 
+
+class BootstrapEkispiditorSerializer(EkispiditorSerializer):
+    """EkispiditorSerializer plus the filial id, for the bootstrap endpoint."""
+    filial_id = serializers.IntegerField(read_only=True)
+
+    class Meta(EkispiditorSerializer.Meta):
+        fields = EkispiditorSerializer.Meta.fields + ['filial_id']
+
+
+class CheckListSerializer(serializers.ListSerializer):
+    """Loads the details of a whole page of checks in one query."""
+
+    DETAIL_CHUNK = 2000
+
+    def to_representation(self, data):
+        checks = list(data.all() if hasattr(data, 'all') else data)
+        check_ids = [check.check_id for check in checks]
+        details = {}
+        for i in range(0, len(check_ids), self.DETAIL_CHUNK):
+            for detail in CheckDetail.objects.filter(check_id__in=check_ids[i:i + self.DETAIL_CHUNK]):
+                details[detail.check_id] = detail
+        self.child._details = details
+        try:
+            return super().to_representation(checks)
+        finally:
+            self.child._details = None
+
+
 class CheckSerializer(serializers.ModelSerializer):
     check_detail = serializers.SerializerMethodField()
+    _details = None
     
     def get_check_detail(self, obj):
         """Get check detail with total_sum"""
-        try:
-            check_detail = CheckDetail.objects.get(check_id=obj.check_id)
-            return CheckDetailSerializer(check_detail).data
-        except CheckDetail.DoesNotExist:
+        if self._details is not None:
+            check_detail = self._details.get(obj.check_id)
+        else:
+            check_detail = CheckDetail.objects.filter(check_id=obj.check_id).first()
+        if check_detail is None:
             return None
+        return CheckDetailSerializer(check_detail).data
     
     class Meta:
         model = Check
+        list_serializer_class = CheckListSerializer
         fields = ['id', 'check_id', 'project', 'sklad', 'city', 'sborshik', 'agent',
                  'ekispiditor', 'yetkazilgan_vaqti', 'receiptIdDate', 'transport_number', 'kkm_number',
                  'client_name', 'client_address', 'check_lat', 'check_lon', 'status',
                  'created_at', 'updated_at', 'check_detail']
 
 
+class CheckSyncSerializer(serializers.ModelSerializer):
+    """Flat check payload for delta sync; details are sent as their own stream."""
+
+    class Meta:
+        model = Check
+        fields = ['id', 'check_id', 'project', 'sklad', 'city', 'sborshik', 'agent',
+                 'ekispiditor', 'yetkazilgan_vaqti', 'receiptIdDate', 'transport_number', 'kkm_number',
+                 'client_name', 'client_address', 'check_lat', 'check_lon', 'status',
+                 'created_at', 'updated_at']
+
+
 class TelegramAccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = TelegramAccount
         fields = ['id', 'display_name', 'username', 'phone_number', 'is_active', 'created_at', 'updated_at']
 
 
+class CheckAnalyticsListSerializer(serializers.ListSerializer):
+    """Locates the checks of a whole page of analytics in one query."""
+
+    def to_representation(self, data):
+        records = list(data.all() if hasattr(data, 'all') else data)
+        self.child._check_locations = CheckAnalytics.check_locations_for(records)
+        try:
+            return super().to_representation(records)
+        finally:
+            self.child._check_locations = None
+
+
 class CheckAnalyticsSerializer(serializers.ModelSerializer):
     time_window_display = serializers.ReadOnlyField()
     area_display = serializers.ReadOnlyField()
     check_locations = serializers.SerializerMethodField()
+    _check_locations = None
     
     class Meta:
         model = CheckAnalytics
+        list_serializer_class = CheckAnalyticsListSerializer
         fields = [
             'id', 'window_start', 'window_end', 'window_duration_minutes', 
             'center_lat', 'center_lon', 'radius_meters', 'total_checks', 
@@ -95,6 +152,8 @@ class CheckAnalyticsSerializer(serializers.ModelSerializer):
     
     def get_check_locations(self, obj):
         """Get check locations for map visualization."""
+        if self._check_locations is not None and obj.pk in self._check_locations:
+            return self._check_locations[obj.pk]
         return obj.get_check_locations()
 
 
@@ -0,0 +1,72 @@
+"""
+Model signal handlers for Expeditor Tracker.
+
+Keeps derived bookkeeping tables (sync tombstones) and the archive union
+views in step with the core Check and CheckDetail tables and pushes task
+progress events.
+"""
+
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_migrate
+from django.dispatch import receiver
+
+from .archive import drop_union_views, ensure_archive_tables
+from .events import publish_task_run
+from .models import Check, CheckDetail, SyncTombstone, TaskRun
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_delete, sender=Check)
+def record_check_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so delta-sync clients can drop the deleted check."""
+    SyncTombstone.objects.create(
+        model_name=SyncTombstone.MODEL_CHECK,
+        object_id=instance.pk,
+        check_id=instance.check_id,
+    )
+
+
+@receiver(post_delete, sender=CheckDetail)
+def record_check_detail_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so delta-sync clients can drop the deleted detail."""
+    SyncTombstone.objects.create(
+        model_name=SyncTombstone.MODEL_CHECK_DETAIL,
+        object_id=instance.pk,
+        check_id=instance.check_id,
+    )
+
+
+@receiver(post_save, sender=TaskRun)
+def push_task_run_progress(sender, instance, **kwargs):
+    """Push TaskRun progress to event streams instead of making the UI poll."""
+    try:
+        publish_task_run(instance)
+    except Exception as e:
+        # Progress push is best effort and must never fail the task itself.
+        logger.error(f"Failed to publish task run {instance.pk} progress: {e}")
+
+
+def _archive_database(app_config, using):
+    return (
+        app_config.label == 'expeditor_app' and using == DEFAULT_DB_ALIAS
+        and connections[using].vendor == 'postgresql'
+    )
+
+
+@receiver(pre_migrate)
+def drop_archive_views(sender, app_config, using=DEFAULT_DB_ALIAS, **kwargs):
+    """The union views depend on the check tables' columns; drop them so
+    migrations can alter those."""
+    if _archive_database(app_config, using):
+        drop_union_views()
+
+
+@receiver(post_migrate)
+def rebuild_archive_views(sender, app_config, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Catch the archive tables up with the migrated check tables and
+    recreate the union views from CheckAll / CheckDetailAll."""
+    if _archive_database(app_config, using):
+        ensure_archive_tables()
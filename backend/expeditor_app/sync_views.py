@@ -0,0 +1,170 @@
+"""
+Delta-sync API for checks and check details.
+
+Polling clients keep an opaque cursor and ask only for rows created,
+updated or deleted since that cursor instead of re-downloading the full
+check list on every refresh.
+
+Rows are paged by updated_at, which is stamped when a row is written, not
+when its transaction commits. A page therefore only reaches up to a high
+water mark below the start of the oldest transaction still writing
+(sync_high_water): a row stamped before the cursor but committed after it
+would otherwise be skipped by every client.
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Check, CheckDetail, SyncTombstone
+from .serializers import CheckSyncSerializer, CheckDetailSerializer
+
+logger = logging.getLogger(__name__)
+
+
+# Margin below the high water mark for the gap between stamping a row in
+# Python and the writing transaction taking a transaction id
+SYNC_SAFETY_LAG_SECONDS = 5
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 5000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class UnknownHighWater(RuntimeError):
+    pass
+
+
+def encode_cursor(position):
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into {'c': [ts, id], 'd': [ts, id], 't': id}."""
+    empty = {'c': None, 'd': None, 't': 0}
+    if not cursor:
+        return empty
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = dict(empty)
+        for key in ('c', 'd'):
+            if data.get(key):
+                ts, pk = data[key]
+                position[key] = [datetime.fromisoformat(ts).isoformat(), int(pk)]
+        position['t'] = int(data.get('t') or 0)
+        return position
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor('Invalid sync cursor')
+
+
+def sync_high_water():
+    """Newest updated_at/deleted_at a sync page may include: on PostgreSQL,
+    the start of the oldest transaction still writing (an import batch may
+    run for minutes with its KPI refresh and events), at most now; less
+    SYNC_SAFETY_LAG_SECONDS.
+
+    The oldest writer is the one holding the snapshot's xmin; every
+    uncommitted row was written after it took its transaction id. Its
+    start time comes from pg_stat_activity, which shows it for other
+    database users only to roles with pg_read_all_stats; when it cannot
+    be read, UnknownHighWater is raised rather than guessing.
+    """
+    high_water = timezone.now()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT a.xact_start FROM pg_locks l LEFT JOIN pg_stat_activity a ON a.pid = l.pid "
+                "WHERE l.locktype = 'transactionid' AND l.mode = 'ExclusiveLock' AND l.granted "
+                "AND l.transactionid = xid(pg_snapshot_xmin(pg_current_snapshot())) "
+                "AND l.pid IS DISTINCT FROM pg_backend_pid()"
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            if row[0] is None:
+                raise UnknownHighWater(
+                    'The oldest running write transaction is not visible in pg_stat_activity; '
+                    'grant pg_read_all_stats to the database user'
+                )
+            high_water = min(high_water, row[0])
+    return high_water - timedelta(seconds=SYNC_SAFETY_LAG_SECONDS)
+
+
+def _changed_since(queryset, position, high_water, limit):
+    """Keyset page of rows ordered by (updated_at, id) after position."""
+    queryset = queryset.filter(updated_at__lte=high_water)
+    if position:
+        ts = datetime.fromisoformat(position[0])
+        queryset = queryset.filter(
+            Q(updated_at__gt=ts) | Q(updated_at=ts, id__gt=position[1])
+        )
+    return list(queryset.order_by('updated_at', 'id')[:limit])
+
+
+class CheckSyncView(APIView):
+    """
+    Returns checks and check details changed since `cursor`, plus
+    tombstones for deleted rows and the cursor to send next time.
+
+    Call without a cursor for the initial load and keep calling with the
+    returned cursor while `has_more` is true.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        try:
+            position = decode_cursor(request.GET.get('cursor'))
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_SYNC_LIMIT))
+        except ValueError:
+            limit = DEFAULT_SYNC_LIMIT
+        limit = max(1, min(limit, MAX_SYNC_LIMIT))
+
+        try:
+            high_water = sync_high_water()
+        except UnknownHighWater as e:
+            logger.error(f"Check sync unavailable: {e}")
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        checks = _changed_since(Check.objects.all(), position['c'], high_water, limit)
+        details = _changed_since(CheckDetail.objects.all(), position['d'], high_water, limit)
+        tombstones = list(
+            SyncTombstone.objects.filter(id__gt=position['t'], deleted_at__lte=high_water)
+            .order_by('id')[:limit]
+        )
+
+        next_position = dict(position)
+        if checks:
+            next_position['c'] = [checks[-1].updated_at.isoformat(), checks[-1].id]
+        if details:
+            next_position['d'] = [details[-1].updated_at.isoformat(), details[-1].id]
+        if tombstones:
+            next_position['t'] = tombstones[-1].id
+
+        return Response({
+            'checks': CheckSyncSerializer(checks, many=True).data,
+            'check_details': CheckDetailSerializer(details, many=True).data,
+            'tombstones': [
+                {'model': t.model_name, 'id': t.object_id, 'check_id': t.check_id}
+                for t in tombstones
+            ],
+            'cursor': encode_cursor(next_position),
+            'has_more': len(checks) == limit or len(details) == limit or len(tombstones) == limit,
+        })
@@ -0,0 +1,329 @@
+"""
+Synthetic Check / CheckDetail data for load testing.
+
+generate_checks() writes N checks (and one detail per check) with
+realistic shapes: expeditors grouped by filial, each working a territory
+around Tashkent from a home sklad, routes that start in the morning with
+exponential gaps between deliveries, fewer deliveries on Sundays, a
+status mix and log-normal payment sums. A fraction of routes contain a
+planted violation cluster - several checks from the same spot within a
+few minutes, some of them at the sklad - for the pattern analysis to find.
+
+Rows are streamed in batches with COPY on PostgreSQL (bulk_create
+elsewhere). Every synthetic row is tagged: check ids start with
+SYNTHETIC_PREFIX and dimension names with SYNTHETIC_NAME, so
+delete_synthetic() can remove them again.
+"""
+
+import csv
+import io
+import logging
+import math
+import random
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Check, CheckDetail, City, Ekispiditor, Filial, Projects, Sklad
+from .partitioning import PARTITION_KEYS, add_months, create_month_partition, is_partitioned, month_start
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PREFIX = 'SYN'
+SYNTHETIC_NAME = 'Synthetic'
+
+# Tashkent city centre and the spread of expeditor territories around it
+TASHKENT = (41.3111, 69.2797)
+TERRITORY_SPREAD = 0.05  # degrees, ~5 km
+ROUTE_STEP = 0.003  # degrees, ~300 m between consecutive deliveries
+
+ROUTE_START_HOUR = 8.5
+WORKDAY_HOURS = 10
+SUNDAY_FACTOR = 0.5
+STATUS_WEIGHTS = (('delivered', 0.90), ('pending', 0.06), ('failed', 0.04))
+
+# Planted violations: checks from one spot (jitter in degrees, ~15 m)
+CLUSTER_SIZES = (3, 6)
+CLUSTER_JITTER = 0.00015
+CLUSTER_AT_SKLAD = 0.3
+
+DEFAULT_BATCH_SIZE = 50000
+
+
+def parse_count(value):
+    """Row count from '250000', '100k', '1M' or '10m'."""
+    value = str(value).strip().lower().replace('_', '')
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    count = int(float(value) * multiplier)
+    if count < 0:
+        raise ValueError(f'Negative row count: {value}')
+    return count
+
+
+def _dimension_name(kind, index):
+    return f'{SYNTHETIC_NAME} {kind} {index + 1}'
+
+
+def ensure_dimensions(filials, expeditors_per_filial, rng):
+    """Create (or reuse) the synthetic filials, cities, projects, sklads and
+    expeditors. Returns a list of expeditor profiles."""
+    profiles = []
+    projects = [
+        Projects.objects.get_or_create(project_name=_dimension_name('project', i))[0]
+        for i in range(max(2, filials))
+    ]
+    for f in range(filials):
+        filial, _ = Filial.objects.get_or_create(
+            filial_name=_dimension_name('filial', f), defaults={'filial_code': f'{SYNTHETIC_PREFIX}{f + 1}'},
+        )
+        city, _ = City.objects.get_or_create(city_name=_dimension_name('city', f), defaults={'filial': filial})
+        sklads = []
+        for s in range(2):
+            lat = TASHKENT[0] + rng.gauss(0, TERRITORY_SPREAD)
+            lon = TASHKENT[1] + rng.gauss(0, TERRITORY_SPREAD)
+            sklad, _ = Sklad.objects.get_or_create(
+                sklad_name=_dimension_name('sklad', f * 2 + s), defaults={'lat': lat, 'lon': lon},
+            )
+            sklads.append(sklad)
+        for e in range(expeditors_per_filial):
+            expeditor, _ = Ekispiditor.objects.get_or_create(
+                ekispiditor_name=f'{SYNTHETIC_NAME} expeditor {f + 1}-{e + 1}',
+                defaults={'transport_number': f'{SYNTHETIC_PREFIX}-{f + 1:02d}-{e + 1:03d}', 'filial': filial},
+            )
+            sklad = sklads[e % len(sklads)]
+            profiles.append({
+                'expeditor': expeditor,
+                'filial': filial,
+                'city': city,
+                'sklad': sklad,
+                'project': projects[(f + e) % len(projects)],
+                'center': (sklad.lat + rng.gauss(0, TERRITORY_SPREAD / 2), sklad.lon + rng.gauss(0, TERRITORY_SPREAD / 2)),
+                # Some expeditors are consistently busier than others
+                'activity': max(0.2, rng.gauss(1, 0.3)),
+            })
+    return profiles
+
+
+def _slot_counts(total, profiles, days, rng):
+    """Number of checks per (day, expeditor), summing to exactly `total`."""
+    slots, weights = [], []
+    for day in days:
+        day_factor = SUNDAY_FACTOR if day.weekday() == 6 else 1.0
+        for index, profile in enumerate(profiles):
+            slots.append((day, index))
+            weights.append(max(0.0, profile['activity'] * day_factor * rng.gauss(1, 0.25)))
+    scale = total / (sum(weights) or 1)
+    counts = [int(w * scale) for w in weights]
+    for i in rng.sample(range(len(slots)), min(len(slots), total - sum(counts))):
+        counts[i] += 1
+    return [(slot, count) for slot, count in zip(slots, counts) if count]
+
+
+def _route(profile, day, count, violation_rate, rng, tz):
+    """(delivered_at, lat, lon) of one expeditor's deliveries on one day."""
+    moment = timezone.make_aware(datetime.combine(day, time()), tz) + timedelta(
+        hours=ROUTE_START_HOUR + rng.gauss(0, 0.5))
+    mean_gap = WORKDAY_HOURS * 60 / count
+    lat, lon = profile['center']
+    stops = []
+    for _ in range(count):
+        moment += timedelta(minutes=rng.expovariate(1 / mean_gap))
+        lat += rng.gauss(0, ROUTE_STEP)
+        lon += rng.gauss(0, ROUTE_STEP)
+        stops.append([moment, lat, lon])
+
+    if count >= CLUSTER_SIZES[0] and rng.random() < violation_rate:
+        size = min(count, rng.randint(*CLUSTER_SIZES))
+        first = rng.randrange(count - size + 1)
+        if rng.random() < CLUSTER_AT_SKLAD and profile['sklad'].lat is not None:
+            spot = (profile['sklad'].lat, profile['sklad'].lon)
+        else:
+            spot = (stops[first][1], stops[first][2])
+        for i in range(first, first + size):
+            if i > first:
+                stops[i][0] = stops[i - 1][0] + timedelta(minutes=rng.uniform(0.5, 3))
+            stops[i][1] = spot[0] + rng.gauss(0, CLUSTER_JITTER)
+            stops[i][2] = spot[1] + rng.gauss(0, CLUSTER_JITTER)
+        # Keep the rest of the route after the cluster in time order
+        for i in range(first + size, count):
+            if stops[i][0] <= stops[i - 1][0]:
+                stops[i][0] = stops[i - 1][0] + timedelta(minutes=rng.expovariate(1 / mean_gap))
+    return stops
+
+
+def _payments(rng):
+    total = round(math.exp(rng.gauss(13.6, 0.6)), -2)  # median ~800k UZS
+    shares = [rng.random() for _ in range(4)]
+    scale = total / sum(shares)
+    nalichniy, uzcard, humo = (round(s * scale, -2) for s in shares[:3])
+    return {
+        'total_sum': total,
+        'nalichniy': nalichniy,
+        'uzcard': uzcard,
+        'humo': humo,
+        'click': max(0, int(total - nalichniy - uzcard - humo)),
+    }
+
+
+def generate_rows(total, profiles, days, violation_rate, rng, run_tag):
+    """Yield (check row, detail row) dicts keyed by attname."""
+    tz = timezone.get_current_timezone()
+    now = timezone.now()
+    statuses, status_weights = zip(*STATUS_WEIGHTS)
+    sequence = 0
+    for (day, index), count in _slot_counts(total, profiles, days, rng):
+        profile = profiles[index]
+        expeditor = profile['expeditor']
+        for delivered, lat, lon in _route(profile, day, count, violation_rate, rng, tz):
+            sequence += 1
+            check_id = f'{SYNTHETIC_PREFIX}-{run_tag}-{sequence:09d}'
+            check = {
+                'check_id': check_id,
+                'project': profile['project'].project_name,
+                'sklad': profile['sklad'].sklad_name,
+                'city': profile['city'].city_name,
+                'sborshik': f'{SYNTHETIC_NAME} sborshik {index % 7 + 1}',
+                'agent': f'{SYNTHETIC_NAME} agent {index % 11 + 1}',
+                'ekispiditor': expeditor.ekispiditor_name,
+                'yetkazilgan_vaqti': delivered,
+                'receiptIdDate': delivered - timedelta(hours=rng.uniform(2, 30)),
+                'transport_number': expeditor.transport_number,
+                'kkm_number': f'KKM{index:05d}',
+                'client_name': f'{SYNTHETIC_NAME} client {rng.randrange(1, 20000)}',
+                'client_address': f'Tashkent, synthetic street {rng.randrange(1, 500)}',
+                'check_lat': lat,
+                'check_lon': lon,
+                'status': rng.choices(statuses, status_weights)[0],
+                'created_at': now,
+                'updated_at': now,
+                'project_ref_id': profile['project'].id,
+                'sklad_ref_id': profile['sklad'].id,
+                'city_ref_id': profile['city'].id,
+                'ekispiditor_ref_id': expeditor.id,
+            }
+            detail = {
+                'check_id': check_id,
+                'checkURL': f'https://synthetic.invalid/check/{check_id}',
+                'check_date': delivered,
+                'receiptIdDate': check['receiptIdDate'],
+                'check_lat': lat,
+                'check_lon': lon,
+                'created_at': now,
+                'updated_at': now,
+                **_payments(rng),
+            }
+            yield check, detail
+
+
+def _copy_fields(model):
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def _csv_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def copy_rows(model, rows):
+    """Insert rows (dicts keyed by attname) with COPY, or bulk_create off PostgreSQL."""
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create([model(**row) for row in rows], batch_size=2000)
+        return
+    fields = _copy_fields(model)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(field.attname)) for field in fields])
+    buffer.seek(0)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+
+
+def _ensure_month_partitions(first_day, last_day):
+    for model in PARTITION_KEYS:
+        if not is_partitioned(model):
+            continue
+        month = month_start(first_day)
+        while month <= last_day:
+            create_month_partition(model, month)
+            month = add_months(month, 1)
+
+
+def generate_checks(total, filials=5, expeditors_per_filial=20, days=90, violation_rate=0.03,
+                    seed=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Generate `total` synthetic checks over the last `days` days.
+
+    Each batch is committed on its own, so an interrupted run keeps what
+    it wrote. Returns (checks written, first day, last day).
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    day_list = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    profiles = ensure_dimensions(filials, expeditors_per_filial, rng)
+    _ensure_month_partitions(day_list[0], day_list[-1])
+    run_tag = timezone.now().strftime('%y%m%d%H%M%S')
+
+    written = 0
+    checks, details = [], []
+    for check, detail in generate_rows(total, profiles, day_list, violation_rate, rng, run_tag):
+        checks.append(check)
+        details.append(detail)
+        if len(checks) >= batch_size:
+            written += _write_batch(checks, details)
+            checks, details = [], []
+            if progress:
+                progress(written, total)
+    if checks:
+        written += _write_batch(checks, details)
+        if progress:
+            progress(written, total)
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for model in (Check, CheckDetail):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+    logger.info(f'Generated {written} synthetic checks for {day_list[0]}..{day_list[-1]}')
+    return written, day_list[0], day_list[-1]
+
+
+def _write_batch(checks, details):
+    with transaction.atomic():
+        copy_rows(Check, checks)
+        copy_rows(CheckDetail, details)
+    return len(checks)
+
+
+def synthetic_count():
+    return Check.objects.filter(check_id__startswith=f'{SYNTHETIC_PREFIX}-').count()
+
+
+def delete_synthetic():
+    """Remove all synthetic checks, details and dimension rows. Returns the
+    number of checks deleted.
+
+    Checks and details are deleted in SQL, without the per-row delete
+    signals (no sync tombstones for rows no client should have kept).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        deleted = 0
+        for model in (CheckDetail, Check):
+            cursor.execute(
+                f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE check_id LIKE %s",
+                [f'{SYNTHETIC_PREFIX}-%'],
+            )
+            deleted = cursor.rowcount
+        Ekispiditor.objects.filter(ekispiditor_name__startswith=f'{SYNTHETIC_NAME} ').delete()
+        for model, field in ((City, 'city_name'), (Sklad, 'sklad_name'), (Projects, 'project_name'),
+                             (Filial, 'filial_name')):
+            model.objects.filter(**{f'{field}__startswith': f'{SYNTHETIC_NAME} '}).delete()
+    return deleted
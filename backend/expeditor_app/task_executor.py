@@ -10,12 +10,32 @@ from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db import transaction, models
 from django.core.management.base import BaseCommand, CommandError
-from expeditor_app.models import ScheduledTask, TaskRun, Check, CheckAnalytics
+from expeditor_app.models import (
+    ScheduledTask, TaskRun, Check, CheckAnalytics, CheckAnalyticsMember, AnalysisWatermark, DirtyPartition,
+)
 from expeditor_app.integration import UpdateChecksView
-import math
+from expeditor_app.kpi import expeditor_days_between, kpi_day, refresh_expeditor_days
+from expeditor_app.partitioning import DEFAULT_MONTHS_AHEAD, PARTITION_KEYS, add_months, ensure_partitions, month_start
+from expeditor_app.archive import archive_old_checks
+from expeditor_app.geo import haversine
+from expeditor_app.pattern_analysis import (
+    WINDOW_MODES, align_to_window, cell_bounds, fingerprint, load_check_points, load_cluster_checks,
+    load_detail_sums, local_day_start, partition_cell, points_from, watermark_key, window_clusters,
+)
+from expeditor_app.utils import local_day_bounds
 
 logger = logging.getLogger(__name__)
 
+# CheckAnalytics records per bulk upsert statement
+ANALYTICS_BATCH_SIZE = 1000
+
+# CheckAnalytics fields an analysis run (re)writes
+ANALYTICS_UPDATE_FIELDS = [
+    'violation_type', 'window_start', 'window_end', 'window_duration_minutes', 'center_lat', 'center_lon',
+    'radius_meters', 'total_checks', 'unique_expiditors', 'most_active_expiditor', 'most_active_count',
+    'avg_checks_per_expiditor', 'check_ids', 'check_details', 'window_mode', 'updated_at',
+]
+
 
 class TaskExecutor:
     """Core task execution engine."""
@@ -26,6 +46,10 @@ class TaskExecutor:
             ScheduledTask.TASK_SCAN_PROBLEM_CHECKS: self._execute_scan_problems,
             ScheduledTask.TASK_SEND_ANALYTICS: self._execute_send_analytics,
             ScheduledTask.TASK_ANALYZE_PATTERNS: self._execute_analyze_patterns,
+            ScheduledTask.TASK_MAINTAIN_PARTITIONS: self._execute_maintain_partitions,
+            ScheduledTask.TASK_ARCHIVE_CHECKS: self._execute_archive_checks,
+            ScheduledTask.TASK_ANALYZE_DIRTY: self._execute_analyze_dirty,
+            ScheduledTask.TASK_BACKFILL_PATTERNS: self._execute_backfill_patterns,
         }
     
     def execute_task(self, scheduled_task: ScheduledTask) -> TaskRun:
@@ -55,11 +79,15 @@ class TaskExecutor:
             
             result = handler(scheduled_task, task_run)
             
-            # Mark as completed
-            task_run.status_message = f"Completed successfully. {result.get('message', '')}"
             task_run.total = result.get('total', 0)
             task_run.processed = result.get('processed', 0)
-            task_run.mark_completed()
+            if result.get('cancelled'):
+                # The handler stopped because the run was cancelled
+                task_run.mark_cancelled(cancel_message=f"Cancelled. {result.get('message', '')}")
+            else:
+                # Mark as completed
+                task_run.status_message = f"Completed successfully. {result.get('message', '')}"
+                task_run.mark_completed()
             
             # Update scheduled task
             scheduled_task.last_run_at = timezone.now()
@@ -337,112 +365,363 @@ class TaskExecutor:
             raise
     
     def _execute_analyze_patterns(self, scheduled_task: ScheduledTask, task_run: TaskRun) -> dict:
-        """Execute analyze patterns task."""
+        """Execute analyze patterns task.
+        
+        Incremental: starts rescan_hours before the AnalysisWatermark of the
+        parameter set (at most lookback_hours back; the 'full' param ignores
+        it), upserts clusters by fingerprint and drops the records of the
+        re-analysed range that no longer match a cluster. Checks can be
+        imported after later deliveries were analysed, so rescan_hours
+        defaults to the whole lookback; lower it only when the ANALYZE_DIRTY
+        task re-analyses late imports.
+        """
         try:
             params = scheduled_task.params or {}
             time_window_minutes = params.get('time_window_minutes', 10)
             distance_meters = params.get('distance_meters', 15)
             lookback_hours = params.get('lookback_hours', 24)
-            
-            # Calculate time window
+            rescan_hours = params.get('rescan_hours', lookback_hours)
+            window_mode = params.get('window_mode', 'fixed')
+            if window_mode not in WINDOW_MODES:
+                raise ValueError(f"Unknown window_mode: {window_mode}")
+            window = timedelta(minutes=time_window_minutes)
+            key = watermark_key(window_mode, time_window_minutes, distance_meters)
+            
+            # Calculate time window: rescan_hours before the watermark, at most lookback_hours back
             now = timezone.now()
             start_time = now - timedelta(hours=lookback_hours)
+            watermark = None if params.get('full') else AnalysisWatermark.objects.filter(key=key).first()
+            if watermark and watermark.processed_until - timedelta(hours=rescan_hours) > start_time:
+                start_time = watermark.processed_until - timedelta(hours=rescan_hours)
+            if window_mode == 'fixed':
+                start_time = align_to_window(start_time, window)
+            # Same-location groups are per (local) day, so their first day is re-analysed whole
+            day_start = local_day_start(start_time)
+            
+            # All checks of the range, loaded once and swept window by window
+            points = load_check_points(day_start, now)
+            
+            with transaction.atomic():
+                analytics_created = self._analyze_time_distance_violations(
+                    points_from(points, start_time), start_time, window_mode,
+                    time_window_minutes, distance_meters
+                )
+                
+                # Also analyze same location violations (same day, same location)
+                same_location_created = self._analyze_same_location_violations(day_start, now, points)
+                
+                # The last window may still get checks: the next run starts there
+                processed_until = align_to_window(now, window) if window_mode == 'fixed' else now - window
+                AnalysisWatermark.objects.update_or_create(key=key, defaults={'processed_until': processed_until})
             
-            # Get checks in the time window
-            checks = Check.objects.filter(
-                yetkazilgan_vaqti__gte=start_time,
-                yetkazilgan_vaqti__lte=now,
-                check_lat__isnull=False,
-                check_lon__isnull=False
-            ).order_by('yetkazilgan_vaqti')
-            
-            if not checks.exists():
+            if not points:
                 return {
                     'message': "No checks found for analysis",
                     'total': 0,
                     'processed': 0
                 }
             
-            # Group checks by time windows and geographic clusters
-            analytics_created = 0
+            # Violation counts in the expeditor daily KPIs
+            try:
+                refresh_expeditor_days(expeditor_days_between(day_start, now))
+            except Exception as e:
+                logger.error(f"Failed to refresh expeditor KPIs: {e}")
             
-            # Process checks in time windows
-            current_time = start_time
-            while current_time < now:
-                window_end = current_time + timedelta(minutes=time_window_minutes)
-                
-                # Get checks in this time window
-                window_checks = checks.filter(
-                    yetkazilgan_vaqti__gte=current_time,
-                    yetkazilgan_vaqti__lt=window_end
-                )
-                
-                if window_checks.exists():
-                    # Group by geographic clusters
-                    clusters = self._create_geographic_clusters(
-                        window_checks, distance_meters
-                    )
+            return {
+                'message': f"Saved {analytics_created} time-distance analytics records and {same_location_created} same-location violation records since {start_time:%Y-%m-%d %H:%M}",
+                'total': analytics_created + same_location_created,
+                'processed': analytics_created + same_location_created
+            }
+            
+        except Exception as e:
+            logger.error(f"Analyze patterns failed: {str(e)}")
+            raise
+    
+    def _execute_analyze_dirty(self, scheduled_task: ScheduledTask, task_run: TaskRun) -> dict:
+        """Re-analyze the partitions imports marked dirty.
+        
+        Same-location groups of each dirty (expeditor, day) and fixed-window
+        time-distance clusters seeded in each dirty (day, cell) are
+        recomputed and their records replaced, one partition per
+        transaction. Parameters should match the ANALYZE_PATTERNS task so
+        both produce the same fingerprints.
+        """
+        try:
+            params = scheduled_task.params or {}
+            time_window_minutes = params.get('time_window_minutes', 10)
+            distance_meters = params.get('distance_meters', 15)
+            max_partitions = params.get('max_partitions', 1000)
+            window = timedelta(minutes=time_window_minutes)
+            
+            partition_ids = list(
+                DirtyPartition.objects.order_by('created_at').values_list('id', flat=True)[:max_partitions]
+            )
+            processed = 0
+            records_saved = 0
+            days = set()
+            for partition_id in partition_ids:
+                with transaction.atomic():
+                    # Another worker may be on it already
+                    partition = DirtyPartition.objects.select_for_update(skip_locked=True).filter(id=partition_id).first()
+                    if partition is None:
+                        continue
                     
-                    # Create analytics records for each cluster
-                    for cluster in clusters:
-                        analytics_record = self._create_analytics_record(
-                            cluster, current_time, window_end, 
-                            time_window_minutes, distance_meters,
-                            violation_type=CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE
+                    day_start, day_end = local_day_bounds(partition.date)
+                    if partition.kind == DirtyPartition.KIND_EXPEDITOR_DAY:
+                        records_saved += self._analyze_same_location_violations(
+                            day_start, day_end - timedelta(microseconds=1), expeditor=partition.ekispiditor
                         )
-                        if analytics_record:
-                            analytics_created += 1
-                
-                current_time = window_end
+                    else:
+                        # The fixed windows starting on that day, checks of the cell and its neighbours
+                        cell = (partition.cell_lat, partition.cell_lon)
+                        range_start = align_to_window(day_start, window)
+                        range_end = align_to_window(day_end, window)
+                        points = load_check_points(
+                            range_start, range_end - timedelta(microseconds=1), bounds=cell_bounds(cell)
+                        )
+                        records_saved += self._analyze_time_distance_violations(
+                            points, range_start, 'fixed', time_window_minutes, distance_meters,
+                            end_time=range_end, cell=cell
+                        )
+                    
+                    partition.delete()
+                processed += 1
+                days.add(partition.date)
             
-            # Also analyze same location violations (same day, same location)
-            same_location_created = self._analyze_same_location_violations(start_time, now)
+            # Violation counts in the expeditor daily KPIs
+            try:
+                for day in sorted(days):
+                    refresh_expeditor_days(expeditor_days_between(*local_day_bounds(day)))
+            except Exception as e:
+                logger.error(f"Failed to refresh expeditor KPIs: {e}")
             
             return {
-                'message': f"Created {analytics_created} time-distance analytics records and {same_location_created} same-location violation records",
-                'total': analytics_created + same_location_created,
-                'processed': analytics_created + same_location_created
+                'message': f"Re-analyzed {processed} dirty partitions, saved {records_saved} violation records",
+                'total': len(partition_ids),
+                'processed': processed
             }
             
         except Exception as e:
-            logger.error(f"Analyze patterns failed: {str(e)}")
+            logger.error(f"Analyze dirty partitions failed: {str(e)}")
             raise
     
-    def _create_geographic_clusters(self, checks, distance_meters):
-        """Create geographic clusters from checks."""
-        clusters = []
-        processed_checks = set()
+    def _execute_backfill_patterns(self, scheduled_task: ScheduledTask, task_run: TaskRun) -> dict:
+        """Analyze the local days start_date..end_date in worker processes.
         
-        for check in checks:
-            if check.id in processed_checks:
-                continue
+        Resumable: every committed day is checkpointed, and a later run
+        with the same params continues after the last committed day (the
+        'restart' param starts over). Cancelling the task run stops it after
+        the current day.
+        """
+        from expeditor_app.parallel_analysis import backfill_patterns
+        try:
+            params = scheduled_task.params or {}
+            time_window_minutes = params.get('time_window_minutes', 10)
+            distance_meters = params.get('distance_meters', 15)
+            try:
+                first_day = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+                last_day = datetime.strptime(params['end_date'], '%Y-%m-%d').date()
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("start_date and end_date params are required (YYYY-MM-DD)")
+            if last_day < first_day:
+                raise ValueError("end_date is before start_date")
+            
+            result = backfill_patterns(
+                first_day, last_day, time_window_minutes, distance_meters,
+                workers=params.get('workers'), task_run=task_run, restart=params.get('restart', False)
+            )
             
-            cluster = [check]
-            processed_checks.add(check.id)
+            return {
+                'message': f"Backfilled {result['done']}/{result['days']} days from {first_day} to {last_day}, saved {result['time_distance']} time-distance and {result['same_location']} same-location violation records",
+                'total': result['days'],
+                'processed': result['done'],
+                'cancelled': result['cancelled']
+            }
             
-            # Find nearby checks
-            for other_check in checks:
-                if other_check.id in processed_checks:
-                    continue
-                
-                distance = self._calculate_distance(
-                    check.check_lat, check.check_lon,
-                    other_check.check_lat, other_check.check_lon
-                )
-                
-                if distance <= distance_meters:
-                    cluster.append(other_check)
-                    processed_checks.add(other_check.id)
+        except Exception as e:
+            logger.error(f"Backfill patterns failed: {str(e)}")
+            raise
+    
+    def _execute_maintain_partitions(self, scheduled_task: ScheduledTask, task_run: TaskRun) -> dict:
+        """Create the monthly partitions of the coming months."""
+        try:
+            params = scheduled_task.params or {}
+            months_ahead = params.get('months_ahead', DEFAULT_MONTHS_AHEAD)
+            
+            created = 0
+            for model in PARTITION_KEYS:
+                created += ensure_partitions(model, months_ahead=months_ahead)
+            
+            return {
+                'message': f"Created {created} partitions ({months_ahead} months ahead)",
+                'total': created,
+                'processed': created
+            }
+            
+        except Exception as e:
+            logger.error(f"Maintain partitions failed: {str(e)}")
+            raise
+    
+    def _execute_archive_checks(self, scheduled_task: ScheduledTask, task_run: TaskRun) -> dict:
+        """Move checks older than the archive horizon to the archive schema."""
+        try:
+            params = scheduled_task.params or {}
+            horizon = None
+            if params.get('months'):
+                horizon = add_months(month_start(timezone.localdate()), -int(params['months']))
             
-            # Only create cluster if 3+ checks (violation criteria)
-            if len(cluster) >= 3:
-                clusters.append(cluster)
+            checks_moved, details_moved = archive_old_checks(horizon)
+            
+            return {
+                'message': f"Archived {checks_moved} checks and {details_moved} check details",
+                'total': checks_moved + details_moved,
+                'processed': checks_moved + details_moved
+            }
+            
+        except Exception as e:
+            logger.error(f"Archive checks failed: {str(e)}")
+            raise
+    
+    def _analyze_time_distance_violations(self, points, start_time, window_mode,
+                                          time_window_minutes, distance_meters, end_time=None, cell=None):
+        """Upsert the time-distance clusters of the points (from start_time,
+        up to end_time) and delete the records of that range whose cluster is
+        gone. With a cell, only clusters seeded in that spatial cell count."""
+        window = timedelta(minutes=time_window_minutes)
+        
+        # Anchored windows of an earlier run can reach into the range; their checks stay theirs
+        claimed = set()
+        if window_mode == 'anchored':
+            earlier = CheckAnalytics.objects.filter(
+                violation_type=CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE,
+                window_duration_minutes=time_window_minutes,
+                radius_meters=distance_meters,
+                window_mode=window_mode,
+                window_start__lt=start_time,
+                window_end__gt=start_time
+            )
+            for check_ids in earlier.values_list('check_ids', flat=True):
+                claimed.update(check_ids or [])
+        
+        clusters = window_clusters(points, start_time, window, distance_meters, mode=window_mode, claimed=claimed)
+        if cell is not None:
+            clusters = (
+                (window_start, window_end, cluster) for window_start, window_end, cluster in clusters
+                if partition_cell(cluster[0].lat, cluster[0].lon) == cell
+            )
+        return self._save_time_distance_clusters(
+            clusters, start_time, window_mode, time_window_minutes, distance_meters, end_time=end_time, cell=cell
+        )
+    
+    def _save_time_distance_clusters(self, clusters, start_time, window_mode,
+                                     time_window_minutes, distance_meters, end_time=None, cell=None):
+        """Upsert (window start, window end, cluster points) clusters in bulk
+        and delete the records of the range (from start_time, up to end_time,
+        seeded in cell) and of the same parameters and window mode that none
+        of them matches."""
+        records = CheckAnalytics.objects.filter(
+            violation_type=CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE,
+            window_duration_minutes=time_window_minutes,
+            radius_meters=distance_meters,
+            window_mode=window_mode
+        )
         
-        return clusters
+        fingerprints = self._upsert_clusters(
+            (cluster, dict(
+                window_start=window_start,
+                window_end=window_end,
+                window_duration_minutes=time_window_minutes,
+                radius_meters=distance_meters,
+                violation_type=CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE,
+                window_mode=window_mode,
+                fingerprint=fingerprint(
+                    CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE, window_mode, time_window_minutes,
+                    distance_meters, window_start, cluster[0].check_id
+                ),
+            ))
+            for window_start, window_end, cluster in clusters
+        )
+        
+        stale = records.filter(window_start__gte=start_time).exclude(fingerprint__in=fingerprints)
+        if end_time is not None:
+            stale = stale.filter(window_start__lt=end_time)
+        if cell is not None:
+            # The seed is the first check of the stored cluster
+            stale_ids = []
+            for record_id, details in stale.values_list('id', 'check_details'):
+                cluster_checks = details.get('checks') if isinstance(details, dict) else None
+                seed = cluster_checks[0] if cluster_checks else None
+                if seed and seed.get('lat') and seed.get('lon') and partition_cell(seed['lat'], seed['lon']) == cell:
+                    stale_ids.append(record_id)
+            stale = CheckAnalytics.objects.filter(id__in=stale_ids)
+        stale.delete()
+        return len(fingerprints)
+    
+    def _upsert_clusters(self, clusters):
+        """Materialise (cluster points, record fields) pairs into
+        CheckAnalytics records and upsert them by fingerprint, keeping
+        analysis_date/created_at of existing records. The checks and their
+        detail sums are loaded with one query each, the records written with
+        bulk statements of ANALYTICS_BATCH_SIZE. Returns the fingerprints
+        written."""
+        clusters = list(clusters)
+        points = [point for cluster, _ in clusters for point in cluster]
+        checks = {check.id: check for check in load_cluster_checks(points)}
+        detail_sums = load_detail_sums(point.check_id for point in points)
+        
+        analytics_records = []
+        members = {}
+        for cluster, fields in clusters:
+            cluster_checks = [checks[point.id] for point in cluster if point.id in checks]
+            analytics_record = self._build_analytics_record(cluster_checks, detail_sums, **fields)
+            if analytics_record:
+                analytics_records.append(analytics_record)
+                members[analytics_record.fingerprint] = [check.id for check in cluster_checks]
+        
+        if analytics_records:
+            CheckAnalytics.objects.bulk_create(
+                analytics_records,
+                batch_size=ANALYTICS_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['fingerprint'],
+                update_fields=ANALYTICS_UPDATE_FIELDS,
+            )
+            self._replace_members(members)
+        return [analytics_record.fingerprint for analytics_record in analytics_records]
     
-    def _create_analytics_record(self, cluster, window_start, window_end, 
-                                window_duration_minutes, radius_meters, violation_type=None):
-        """Create CheckAnalytics record from cluster."""
+    def _replace_members(self, members):
+        """Rewrite the CheckAnalyticsMember rows of the records with the
+        given fingerprints ({fingerprint: check pks in cluster order})."""
+        fingerprints = list(members)
+        for start in range(0, len(fingerprints), ANALYTICS_BATCH_SIZE):
+            # The upsert does not return the ids of updated rows
+            analytics_ids = dict(
+                CheckAnalytics.objects
+                .filter(fingerprint__in=fingerprints[start:start + ANALYTICS_BATCH_SIZE])
+                .values_list('fingerprint', 'id')
+            )
+            CheckAnalyticsMember.objects.filter(analytics_id__in=analytics_ids.values()).delete()
+            CheckAnalyticsMember.objects.bulk_create(
+                [
+                    CheckAnalyticsMember(
+                        analytics_id=analytics_id,
+                        check_ref_id=check_pk,
+                        position=position,
+                        role=CheckAnalyticsMember.ROLE_SEED if position == 0 else CheckAnalyticsMember.ROLE_MEMBER,
+                    )
+                    for fingerprint, analytics_id in analytics_ids.items()
+                    for position, check_pk in enumerate(members[fingerprint])
+                ],
+                batch_size=5000,
+            )
+    
+    def _build_analytics_record(self, cluster, detail_sums, window_start, window_end,
+                                window_duration_minutes, radius_meters, violation_type=None, fingerprint=None,
+                                window_mode=''):
+        """Unsaved CheckAnalytics record of a cluster of checks, or None;
+        detail_sums maps check_id to CheckDetail.total_sum (load_detail_sums)."""
+        if not cluster:
+            return None
         try:
             # Calculate cluster center
             total_lat = sum(check.check_lat for check in cluster)
@@ -471,27 +750,26 @@ class TaskExecutor:
             # Create detailed check information for the frontend
             checks_info = []
             for check in cluster:
-                check_detail = check.check_detail_data
                 checks_info.append({
                     'id': check.check_id,
                     'client_name': check.client_name or 'Unknown',
                     'time': check.yetkazilgan_vaqti.strftime('%H:%M') if check.yetkazilgan_vaqti else '',
+                    'timestamp': check.yetkazilgan_vaqti.isoformat() if check.yetkazilgan_vaqti else '',
                     'expeditor': check.ekispiditor or 'Unknown',
                     'lat': float(check.check_lat) if check.check_lat else 0,
                     'lon': float(check.check_lon) if check.check_lon else 0,
                     'status': check.status or 'Unknown',
-                    'total_sum': check_detail.total_sum if check_detail else 0
+                    'total_sum': detail_sums.get(check.check_id, 0)
                 })
             
             check_details = {
                 'checks': checks_info,
                 'expeditors': list(expeditors),
-                'total_amount': sum(check.check_detail_data.total_sum or 0 for check in cluster if check.check_detail_data),
+                'total_amount': sum(detail_sums.get(check.check_id) or 0 for check in cluster),
                 'cluster_size': len(cluster)
             }
             
-            # Create analytics record
-            analytics = CheckAnalytics.objects.create(
+            return CheckAnalytics(
                 violation_type=violation_type or CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE,
                 window_start=window_start,
                 window_end=window_end,
@@ -505,83 +783,82 @@ class TaskExecutor:
                 most_active_count=most_active_count,
                 avg_checks_per_expiditor=avg_checks_per_expiditor,
                 check_ids=check_ids,
-                check_details=check_details
+                check_details=check_details,
+                fingerprint=fingerprint,
+                window_mode=window_mode
             )
             
-            return analytics
-            
         except Exception as e:
-            logger.error(f"Failed to create analytics record: {str(e)}")
+            logger.error(f"Failed to build analytics record: {str(e)}")
             return None
     
-    def _analyze_same_location_violations(self, start_time, end_time):
-        """Analyze violations where expeditors issue multiple checks from same location on same day."""
+    def _analyze_same_location_violations(self, start_time, end_time, points=None, expeditor=None):
+        """Analyze violations where expeditors issue multiple checks from same location on same day.
+        
+        Re-analyses whole local days from the day of start_time (optionally
+        of one expeditor): groups are upserted by fingerprint and the
+        records of those days whose group is gone are deleted.
+        """
         try:
-            from django.db.models import Count, Q
-            from datetime import timedelta
-            
-            violations_created = 0
+            day_start = local_day_start(start_time)
             
-            # Get all checks with coordinates in the time range
-            checks = Check.objects.filter(
-                yetkazilgan_vaqti__gte=start_time,
-                yetkazilgan_vaqti__lte=end_time,
-                check_lat__isnull=False,
-                check_lon__isnull=False,
-                ekispiditor__isnull=False
-            ).order_by('ekispiditor', 'yetkazilgan_vaqti__date', 'check_lat', 'check_lon')
+            # All checks with coordinates in the time range (shared with the window sweep)
+            if points is None:
+                points = load_check_points(day_start, end_time, expeditor=expeditor)
             
             # Group by expeditor, date, and location (rounded coordinates)
             location_groups = {}
             
-            for check in checks:
+            for point in points:
+                if point.expeditor is None:
+                    continue
                 # Round coordinates to group nearby locations (within ~10 meters)
-                rounded_lat = round(float(check.check_lat), 4)
-                rounded_lon = round(float(check.check_lon), 4)
-                date_key = check.yetkazilgan_vaqti.date()
+                rounded_lat = round(float(point.lat), 4)
+                rounded_lon = round(float(point.lon), 4)
+                date_key = kpi_day(point.time)
                 
-                group_key = (check.ekispiditor, date_key, rounded_lat, rounded_lon)
+                group_key = (point.expeditor, date_key, rounded_lat, rounded_lon)
                 
                 if group_key not in location_groups:
                     location_groups[group_key] = []
-                location_groups[group_key].append(check)
+                location_groups[group_key].append(point)
             
-            # Create violation records for groups with 3+ checks
+            # Create violation records for groups with 3+ checks (same location violation threshold)
+            groups = []
             for (expiditor, date, lat, lon), checks_in_group in location_groups.items():
-                if len(checks_in_group) >= 3:  # Same location violation threshold
-                    # Sort checks by time
-                    checks_in_group.sort(key=lambda x: x.yetkazilgan_vaqti)
-                    
-                    window_start = checks_in_group[0].yetkazilgan_vaqti
-                    window_end = checks_in_group[-1].yetkazilgan_vaqti
-                    duration_minutes = int((window_end - window_start).total_seconds() / 60)
-                    
-                    # Create analytics record for same location violation
-                    analytics_record = self._create_analytics_record(
-                        checks_in_group, window_start, window_end,
-                        duration_minutes, 0,  # 0 radius for same location
-                        violation_type=CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION
-                    )
-                    
-                    if analytics_record:
-                        violations_created += 1
-            
-            return violations_created
+                if len(checks_in_group) >= 3:
+                    # Points are time-sorted already
+                    window_start = checks_in_group[0].time
+                    window_end = checks_in_group[-1].time
+                    groups.append((checks_in_group, dict(
+                        window_start=window_start,
+                        window_end=window_end,
+                        window_duration_minutes=int((window_end - window_start).total_seconds() / 60),
+                        radius_meters=0,  # 0 radius for same location
+                        violation_type=CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION,
+                        fingerprint=fingerprint(
+                            CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION, expiditor, date.isoformat(), lat, lon
+                        ),
+                    )))
+            fingerprints = self._upsert_clusters(groups)
+            
+            stale = CheckAnalytics.objects.filter(
+                violation_type=CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION,
+                window_start__gte=day_start,
+                window_start__lte=end_time
+            ).exclude(fingerprint__in=fingerprints)
+            if expeditor is not None:
+                stale = stale.filter(most_active_expiditor=expeditor)
+            stale.delete()
+            
+            return len(fingerprints)
             
         except Exception as e:
+            # Runs inside the caller's transaction: re-raise so it rolls back
+            # and the task run records the failure
             logger.error(f"Failed to analyze same location violations: {str(e)}")
-            return 0
+            raise
     
     def _calculate_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between two points in meters."""
-        R = 6371000  # Earth radius in meters
-        
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(dlat/2) * math.sin(dlat/2) + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(dlon/2) * math.sin(dlon/2))
-        
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        return R * c
+        return haversine(lat1, lon1, lat2, lon2)
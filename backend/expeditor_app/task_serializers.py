@@ -12,6 +12,7 @@ class ScheduledTaskSerializer(serializers.ModelSerializer):
     """Serializer for ScheduledTask model."""
     
     estimated_duration = serializers.SerializerMethodField()
+    _estimated_durations = None
     
     class Meta:
         model = ScheduledTask
@@ -25,22 +26,30 @@ class ScheduledTaskSerializer(serializers.ModelSerializer):
     def get_estimated_duration(self, obj):
         """
         Calculate estimated duration based on average of last 10 completed runs.
-        Returns duration in seconds.
+        Returns duration in seconds. Memoized per task type, so a list of
+        tasks runs one query per type rather than per task.
         """
+        if self._estimated_durations is None:
+            self._estimated_durations = {}
+        if obj.task_type not in self._estimated_durations:
+            self._estimated_durations[obj.task_type] = self._estimate_duration(obj.task_type)
+        return self._estimated_durations[obj.task_type]
+    
+    def _estimate_duration(self, task_type):
         from django.db.models import Avg, F
         from django.db.models.functions import Cast
         from django.db.models import DurationField
         
         # Get last 10 completed runs for this task type
-        recent_runs = TaskRun.objects.filter(
-            task_type=obj.task_type,
+        recent_runs = list(TaskRun.objects.filter(
+            task_type=task_type,
             status=TaskRun.STATUS_COMPLETED,
             finished_at__isnull=False,
             started_at__isnull=False
-        ).order_by('-started_at')[:10]
+        ).order_by('-started_at')[:10])
         
         # Calculate average duration
-        if recent_runs.exists():
+        if recent_runs:
             total_seconds = 0
             count = 0
             for run in recent_runs:
@@ -58,7 +67,7 @@ class ScheduledTaskSerializer(serializers.ModelSerializer):
             'ANALYZE_PATTERNS': 5.0,
             'CLEANUP_OLD_DATA': 2.0,
         }
-        return defaults.get(obj.task_type, 1.0)
+        return defaults.get(task_type, 1.0)
 
 
 class TaskRunSerializer(serializers.ModelSerializer):
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from expeditor_app.models import Check, CheckAnalytics, DirtyPartition, ScheduledTask
+from expeditor_app.pattern_analysis import dirty_partitions, mark_dirty, partition_cell
+from expeditor_app.task_executor import TaskExecutor
+
+
+class DirtyCellNeighbourTests(TestCase):
+    """A check on a cell border belongs to a cluster seeded in the next cell."""
+
+    # Cell columns change at 69.25; the seed is ~4 m west of it, the other
+    # checks up to ~8 m east
+    SEED = (41.312, 69.24995)
+    BORDER = [(41.312, 69.25002), (41.31203, 69.25004), (41.31201, 69.25005)]
+
+    def setUp(self):
+        self.start = timezone.make_aware(datetime(2025, 3, 10, 10, 1))
+        for i, (lat, lon) in enumerate([self.SEED] + self.BORDER):
+            Check.objects.create(
+                check_id=f'border-{i}', ekispiditor='Expeditor', status='delivered',
+                yetkazilgan_vaqti=self.start + timedelta(minutes=i), check_lat=lat, check_lon=lon,
+            )
+        self.executor = TaskExecutor()
+        self.task = ScheduledTask(params={'time_window_minutes': 10, 'distance_meters': 15})
+        self._analyze_dirty(Check.objects.all())
+
+    def _analyze_dirty(self, checks):
+        partitions = set()
+        for check in checks:
+            partitions |= dirty_partitions(check.ekispiditor, check.yetkazilgan_vaqti, check.check_lat, check.check_lon)
+        mark_dirty(partitions)
+        self.executor._execute_analyze_dirty(self.task, None)
+        self.assertFalse(DirtyPartition.objects.exists())
+
+    def _cluster(self):
+        records = CheckAnalytics.objects.filter(violation_type=CheckAnalytics.VIOLATION_TYPE_TIME_DISTANCE)
+        self.assertEqual(records.count(), 1)
+        return records.get()
+
+    def test_seed_and_border_checks_are_in_different_cells(self):
+        self.assertNotEqual(partition_cell(*self.SEED), partition_cell(*self.BORDER[-1]))
+        self.assertEqual(self._cluster().total_checks, 4)
+
+    def test_border_check_leaving_updates_cluster_seeded_next_door(self):
+        moved = Check.objects.get(check_id='border-3')
+        old = Check(ekispiditor=moved.ekispiditor, yetkazilgan_vaqti=moved.yetkazilgan_vaqti,
+                    check_lat=moved.check_lat, check_lon=moved.check_lon)
+        moved.check_lat, moved.check_lon = 41.4, 69.4
+        moved.save()
+
+        # As the importer does, the partitions of the old and the new values
+        self._analyze_dirty([old, moved])
+
+        cluster = self._cluster()
+        self.assertEqual(cluster.total_checks, 3)
+        self.assertNotIn('border-3', cluster.check_ids)
+        self.assertEqual(
+            list(cluster.members.order_by('position').values_list('check_ref__check_id', flat=True)),
+            ['border-0', 'border-1', 'border-2'],
+        )
+
+    def test_border_check_joining_updates_cluster_seeded_next_door(self):
+        Check.objects.filter(check_id='border-3').delete()
+        CheckAnalytics.objects.all().delete()
+        self._analyze_dirty(Check.objects.all())
+        self.assertEqual(self._cluster().total_checks, 3)
+
+        joined = Check.objects.create(
+            check_id='border-4', ekispiditor='Other', status='delivered',
+            yetkazilgan_vaqti=self.start + timedelta(minutes=5), check_lat=self.BORDER[-1][0], check_lon=self.BORDER[-1][1],
+        )
+        self._analyze_dirty([joined])
+
+        cluster = self._cluster()
+        self.assertEqual(cluster.total_checks, 4)
+        self.assertIn('border-4', cluster.check_ids)
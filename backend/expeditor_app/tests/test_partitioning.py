@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from expeditor_app.models import Check
+from expeditor_app.partitioning import (
+    UNIQUE_GUARD_TABLE, add_months, convert_to_partitioned, create_month_partition, default_partition_name,
+    list_partitions, month_start, partition_name,
+)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Partitioning needs PostgreSQL')
+class PartitionedCheckTests(TestCase):
+
+    def setUp(self):
+        self.current = month_start(timezone.localdate())
+        Check.objects.create(check_id='existing', yetkazilgan_vaqti=timezone.now())
+        convert_to_partitioned(Check, months_ahead=1)
+
+    def _in_default(self, check_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {connection.ops.quote_name(default_partition_name(Check))} '
+                f'WHERE check_id = %s)',
+                [check_id],
+            )
+            return cursor.fetchone()[0]
+
+    def _guarded(self, check_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {UNIQUE_GUARD_TABLE} '
+                f"WHERE table_name = %s AND column_name = 'check_id' AND value = %s)",
+                [Check._meta.db_table, check_id],
+            )
+            return cursor.fetchone()[0]
+
+    def test_ids_keep_increasing_after_conversion(self):
+        existing = Check.objects.get(check_id='existing')
+        created = Check.objects.create(check_id='new', yetkazilgan_vaqti=timezone.now())
+        self.assertGreater(created.id, existing.id)
+
+    def test_check_id_unique_across_partitions(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Check.objects.create(
+                check_id='existing', yetkazilgan_vaqti=timezone.make_aware(datetime(2001, 1, 15)),
+            )
+
+    def test_check_id_moved_out_of_default_stays_unique(self):
+        # A late import for a month without a partition lands in DEFAULT
+        month = add_months(self.current, 6)
+        moment = timezone.make_aware(datetime(month.year, month.month, 15))
+        Check.objects.create(check_id='late', yetkazilgan_vaqti=moment)
+        self.assertTrue(self._in_default('late'))
+
+        self.assertTrue(create_month_partition(Check, month))
+        self.assertIn(partition_name(Check, month), [name for name, _ in list_partitions(Check)])
+        self.assertFalse(self._in_default('late'))
+        self.assertTrue(self._guarded('late'))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Check.objects.create(check_id='late', yetkazilgan_vaqti=timezone.now())
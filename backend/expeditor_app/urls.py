@@ -10,6 +10,11 @@ from .task_views import ScheduledTaskViewSet, TaskRunViewSet, TaskStatusView, Ta
 from .yandex_token_views import YandexTokenViewSet, YandexTokenStatusView
 from .auth_views import register_user, login_user, logout_user, get_user_profile, check_auth_status
 from .integration import UpdateChecksView
+from .sync_views import CheckSyncView
+from .event_views import EventStreamView
+from .bootstrap_views import BootstrapView
+from .metrics_views import metrics_view
+from .profile_views import ProfileListView, ProfileDetailView
 from .violation_insights_views import ViolationInsightsView, SameLocationViolationsView
 from .user_analytics_views import UserAnalyticsView, LiveUserDataView, UserSessionListView
 from .manager_report_views import ManagerReportView, ManagerReportPDFView, ManagerReportEmailView
@@ -50,12 +55,18 @@ urlpatterns = [
     path('manager-report/pdf/', ManagerReportPDFView.as_view(), name='manager-report-pdf'),
     path('manager-report/email/', ManagerReportEmailView.as_view(), name='manager-report-email'),
     
+    # Delta sync (must be before router.urls so it is not taken as a check pk)
+    path('check/sync/', CheckSyncView.as_view(), name='check-sync'),
+    
     # Other specific endpoints
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('telegram/target/', TelegramTargetView.as_view(), name='telegram-target'),
     path('update-checks/', UpdateChecksView.as_view(), name='update-checks'),
     path('task-status/', TaskStatusView.as_view(), name='task-status'),
+    path('events/', EventStreamView.as_view(), name='events'),
     path('task-analytics/', TaskAnalyticsView.as_view(), name='task-analytics'),
     path('yandex-token-status/', YandexTokenStatusView.as_view(), name='yandex-token-status'),
+    path('metrics/', metrics_view, name='metrics'),
     
     # Authentication endpoints
     path('auth/register/', register_user, name='register'),
@@ -68,6 +79,8 @@ urlpatterns = [
     path('admin/user-analytics/', UserAnalyticsView.as_view(), name='user-analytics'),
     path('admin/user-analytics/live/', LiveUserDataView.as_view(), name='live-user-data'),
     path('admin/user-sessions/', UserSessionListView.as_view(), name='user-sessions'),
+    path('admin/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('admin/profiles/<str:report_id>/', ProfileDetailView.as_view(), name='profile-detail'),
     
     # Router URLs (must be LAST to avoid conflicts with specific paths)
     path('', include(router.urls)),
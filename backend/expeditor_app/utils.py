@@ -1,6 +1,7 @@
 from expeditor_backend import settings
 import os
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from django.utils import timezone
 
 
 def get_last_update_date():
@@ -15,3 +16,9 @@ def save_last_update_date(date_str):
     path = settings.LAST_UPDATE_DATE_PATH
     with open(path, 'w') as file:
         file.write(date_str)
+
+
+def local_day_bounds(day):
+    """Aware [start, end) datetimes of a calendar day in the current time zone."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
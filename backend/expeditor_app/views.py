@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
-from django.db.models import Count, Sum, Q, OuterRef, Subquery, IntegerField, FloatField, F, Value, Prefetch
+from django.db.models import Count, Sum, Q, Exists, OuterRef, Subquery, IntegerField, FloatField, F, Value, Prefetch
 from django.db.models.functions import TruncDate, TruncHour, Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -16,7 +16,14 @@ from django.views.decorators.cache import cache_page
 import django_filters
 import hashlib
 
-from .models import Projects, CheckDetail, Sklad, City, Ekispiditor, Check, Filial, TelegramAccount, CheckAnalytics
+from .models import Projects, CheckDetail, Sklad, City, Ekispiditor, Check, Filial, TelegramAccount, CheckAnalytics, CheckAnalyticsMember, ExpeditorDailyKPI
+from .conditional import conditional_on
+from .search import CheckSearchFilter
+from .dimensions import DIMENSIONS, filter_by_dimension_name, dimension_names
+from .kpi import annotate_expeditor_kpis, expeditor_leaderboard, kpis_backfilled
+from .archive import check_models_for
+from .db_router import ReplicaReadMixin
+from .utils import local_day_bounds
 from .serializers import (
     ProjectsSerializer, CheckDetailSerializer, SkladSerializer, 
     CitySerializer, EkispiditorSerializer, CheckSerializer, FilialSerializer, TelegramAccountSerializer, CheckAnalyticsSerializer
@@ -50,12 +57,15 @@ class CheckFilter(django_filters.FilterSet):
         lookup_expr='lte',
         method='filter_date_to_end_of_day'
     )
-    project = django_filters.CharFilter(field_name='project', lookup_expr='icontains')
-    sklad = django_filters.CharFilter(field_name='sklad', lookup_expr='icontains')
-    city = django_filters.CharFilter(field_name='city', lookup_expr='icontains')
-    ekispiditor = django_filters.CharFilter(field_name='ekispiditor', lookup_expr='icontains')
+    project = django_filters.CharFilter(field_name='project', method='filter_by_dimension_name')
+    sklad = django_filters.CharFilter(field_name='sklad', method='filter_by_dimension_name')
+    city = django_filters.CharFilter(field_name='city', method='filter_by_dimension_name')
+    ekispiditor = django_filters.CharFilter(field_name='ekispiditor', method='filter_by_dimension_name')
     status = django_filters.CharFilter(field_name='status')
-    ekispiditor_id = django_filters.NumberFilter(method='filter_by_ekispiditor_id')
+    ekispiditor_id = django_filters.NumberFilter(field_name='ekispiditor_ref_id')
+    project_id = django_filters.NumberFilter(field_name='project_ref_id')
+    sklad_id = django_filters.NumberFilter(field_name='sklad_ref_id')
+    city_id = django_filters.NumberFilter(field_name='city_ref_id')
     
     def filter_date_from_start_of_day(self, queryset, name, value):
         if value:
@@ -76,17 +86,14 @@ class CheckFilter(django_filters.FilterSet):
             return queryset.filter(**{f"{name}__lte": end_of_day})
         return queryset
     
-    def filter_by_ekispiditor_id(self, queryset, name, value):
-        try:
-            ekispiditor = Ekispiditor.objects.get(id=value)
-            return queryset.filter(ekispiditor=ekispiditor.ekispiditor_name)
-        except Ekispiditor.DoesNotExist:
-            return queryset.none()
+    def filter_by_dimension_name(self, queryset, name, value):
+        # Match the name on the dimension table, then filter checks by id
+        if value:
+            return filter_by_dimension_name(queryset, name, value)
+        return queryset
     
     class Meta:
         model = Check
-        # Exclude 'ekispiditor_id' from auto-generated filters to avoid
-        # unsupported lookup on CharField; we provide a custom method filter above.
         fields = ['date_from', 'date_to', 'project', 'sklad', 'city', 'ekispiditor', 'status']
 
 
@@ -119,6 +126,7 @@ class CheckAnalyticsFilter(django_filters.FilterSet):
         fields = ['date_from', 'date_to', 'expiditor', 'min_checks', 'max_checks', 'radius_meters', 'window_duration_minutes']
 
 
+@method_decorator(conditional_on(Projects), name='list')
 class ProjectsViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Projects.objects.all()
     serializer_class = ProjectsSerializer
@@ -137,6 +145,7 @@ class CheckDetailViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['check_date', 'total_sum']
     ordering = ['-check_date']
 
+@method_decorator(conditional_on(Sklad), name='list')
 class SkladViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Sklad.objects.all()
     serializer_class = SkladSerializer
@@ -146,8 +155,9 @@ class SkladViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['sklad_name', 'created_at']
     ordering = ['sklad_name']
 
+@method_decorator(conditional_on(City, Filial), name='list')
 class CityViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = City.objects.all()
+    queryset = City.objects.select_related('filial')
     serializer_class = CitySerializer
     pagination_class = None  # No pagination for dropdown data
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -155,6 +165,7 @@ class CityViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['city_name', 'created_at']
     ordering = ['city_name']
 
+@method_decorator(conditional_on(Filial), name='list')
 class FilialViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Filial.objects.all()
     serializer_class = FilialSerializer
@@ -166,6 +177,8 @@ class FilialViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     authentication_classes = []
 
+# today_checks_count depends on the date as well as the tables
+@method_decorator(conditional_on(Ekispiditor, Filial, ExpeditorDailyKPI, extra=lambda request: timezone.localdate().isoformat()), name='list')
 class EkispiditorViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]  # Allow access without authentication
     authentication_classes = []  # Remove authentication classes
@@ -178,41 +191,33 @@ class EkispiditorViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['ekispiditor_name']
     
     def get_queryset(self):
-        # Optimized queryset with proper select_related and efficient subquery
+        # Optimized queryset with proper select_related; today's count and
+        # the delivered checks total come from the daily KPI rows
         queryset = Ekispiditor.objects.filter(is_active=True).select_related('filial')
+        return annotate_expeditor_kpis(queryset)
 
-        # Optimized subquery for checks count - only count delivered checks for better performance
-        checks_count_sq = (
-            Check.objects
-            .filter(ekispiditor=OuterRef('ekispiditor_name'), 
-                   yetkazilgan_vaqti__isnull=False,
-                   status='delivered')  # Only count delivered checks for better performance
-            .values('ekispiditor')
-            .annotate(c=Count('id'))
-            .values('c')[:1]
-        )
-
-        queryset = queryset.annotate(checks_count=Subquery(checks_count_sq, output_field=IntegerField()))
-
-        return queryset
-
+@method_decorator(conditional_on(Check, CheckDetail), name='list')
 class CheckViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]  # Allow access without authentication
     authentication_classes = []  # Remove authentication classes
     serializer_class = CheckSerializer
     pagination_class = None  # Return all checks for selected expeditor
-    filter_backends = [DjangoFilterBackend, SearchFilter]  # Remove OrderingFilter to avoid reordering after slice
+    filter_backends = [DjangoFilterBackend, CheckSearchFilter]  # Remove OrderingFilter to avoid reordering after slice
     filterset_class = CheckFilter
     search_fields = ['check_id', 'client_name', 'client_address', 'ekispiditor', 'project']
     
     def get_queryset(self):
         # Simple queryset without check_detail relationship
         # Order by date first to ensure consistent ordering
-        queryset = Check.objects.all().order_by('-yetkazilgan_vaqti', '-id')
+        return Check.objects.all().order_by('-yetkazilgan_vaqti', '-id')
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
         
-        # Apply limit parameter from request to prevent overloading (only after ordering)
+        # Apply limit parameter from request to prevent overloading (only after
+        # filtering, search and ordering; a sliced queryset cannot be filtered)
         limit = self.request.query_params.get('limit')
-        if limit:
+        if limit and self.action == 'list':
             try:
                 limit_int = int(limit)
                 if 0 < limit_int <= 1000:  # Maximum 1000 records
@@ -224,8 +229,9 @@ class CheckViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def today_checks(self, request):
-        today = timezone.now().date()
-        checks = self.get_queryset().filter(yetkazilgan_vaqti__date=today)
+        # Range on the raw column so the yetkazilgan_vaqti index is usable
+        day_start, day_end = local_day_bounds(timezone.localdate())
+        checks = self.get_queryset().filter(yetkazilgan_vaqti__gte=day_start, yetkazilgan_vaqti__lt=day_end)
         serializer = self.get_serializer(checks, many=True)
         return Response(serializer.data)
     
@@ -283,7 +289,7 @@ class CheckAnalyticsAPIView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=500)
 
-class StatisticsView(APIView):
+class StatisticsView(ReplicaReadMixin, APIView):
     def get(self, request):
         # Create cache key based on request parameters
         cache_key_params = {
@@ -322,21 +328,28 @@ class StatisticsView(APIView):
         ekispiditor_id = request.GET.get('ekispiditor_id')
         status = request.GET.get('status')
         
-        # Base queryset with optimization
-        checks_qs = Check.objects.all()
-        check_details_qs = CheckDetail.objects.all()
         today = timezone.now().date()
+        kpi_date_from = kpi_date_to = None
         
-        # Apply filters
+        range_start = None
         if date_from:
             try:
                 df = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
                 # Normalize to local tz and clamp to start-of-day
                 df = timezone.make_aware(df) if timezone.is_naive(df) else df
-                df = df.astimezone(timezone.get_current_timezone()).replace(hour=0, minute=0, second=0, microsecond=0)
-                checks_qs = checks_qs.filter(yetkazilgan_vaqti__gte=df)
+                range_start = df.astimezone(timezone.get_current_timezone()).replace(hour=0, minute=0, second=0, microsecond=0)
             except ValueError:
                 pass
+        
+        # Ranges reaching back past the hot tables read the archive views
+        check_model, detail_model = check_models_for(range_start)
+        checks_qs = check_model.objects.all()
+        check_details_qs = detail_model.objects.all()
+        
+        # Apply filters
+        if range_start:
+            checks_qs = checks_qs.filter(yetkazilgan_vaqti__gte=range_start)
+            kpi_date_from = range_start.date()
                 
         if date_to:
             try:
@@ -345,24 +358,21 @@ class StatisticsView(APIView):
                 dt = timezone.make_aware(dt) if timezone.is_naive(dt) else dt
                 dt = dt.astimezone(timezone.get_current_timezone()).replace(hour=23, minute=59, second=59, microsecond=999999)
                 checks_qs = checks_qs.filter(yetkazilgan_vaqti__lte=dt)
+                kpi_date_to = dt.date()
             except ValueError:
                 pass
         
         if ekispiditor_id:
-            try:
-                ekispiditor = Ekispiditor.objects.get(id=ekispiditor_id)
-                checks_qs = checks_qs.filter(ekispiditor=ekispiditor.ekispiditor_name)
-            except Ekispiditor.DoesNotExist:
-                pass
+            checks_qs = checks_qs.filter(ekispiditor_ref_id=ekispiditor_id)
                 
         if project:
-            checks_qs = checks_qs.filter(project__icontains=project)
+            checks_qs = filter_by_dimension_name(checks_qs, 'project', project)
             
         if sklad:
-            checks_qs = checks_qs.filter(sklad__icontains=sklad)
+            checks_qs = filter_by_dimension_name(checks_qs, 'sklad', sklad)
             
         if city:
-            checks_qs = checks_qs.filter(city__icontains=city)
+            checks_qs = filter_by_dimension_name(checks_qs, 'city', city)
             
         if status:
             checks_qs = checks_qs.filter(status=status)
@@ -372,7 +382,7 @@ class StatisticsView(APIView):
         if check_ids:
             check_details_qs = check_details_qs.filter(check_id__in=check_ids)
         else:
-            check_details_qs = CheckDetail.objects.none()
+            check_details_qs = detail_model.objects.none()
         
         # Calculate statistics with single queries
         total_checks = checks_qs.count()
@@ -382,7 +392,8 @@ class StatisticsView(APIView):
             pending=Count('id', filter=Q(status='pending'))
         )
         
-        today_checks_count = checks_qs.filter(yetkazilgan_vaqti__date=today).count()
+        today_start, today_end = local_day_bounds(timezone.localdate())
+        today_checks_count = checks_qs.filter(yetkazilgan_vaqti__gte=today_start, yetkazilgan_vaqti__lt=today_end).count()
         
         delivered_checks = status_counts['delivered'] or 0
         failed_checks = status_counts['failed'] or 0
@@ -403,113 +414,14 @@ class StatisticsView(APIView):
         if payment_stats['total_sum'] and total_checks:
             avg_check_sum = float(payment_stats['total_sum']) / float(total_checks)
         
-        # Optimized top expeditors query with single aggregation
-        top_expeditors = list(
-            checks_qs.values('ekispiditor')
-            .annotate(
-                check_count=Count('id'),
-                success_count=Count('id', filter=Q(status='delivered'))
-            )
-            .order_by('-check_count')[:5]
-        )
-        
-        # Optimized: Get all expeditor sums using bulk queries
-        if top_expeditors:
-            expeditor_names = [exp['ekispiditor'] for exp in top_expeditors]
-            expeditor_sums = {}
-            
-            # Get all check IDs for these expeditors
-            expeditor_check_ids = list(
-                checks_qs.filter(ekispiditor__in=expeditor_names)
-                .values_list('check_id', 'ekispiditor')
-            )
-            
-            # Get all check details in one query
-            check_ids = [check_id for check_id, _ in expeditor_check_ids]
-            check_details = {
-                detail.check_id: detail.total_sum or 0 
-                for detail in CheckDetail.objects.filter(check_id__in=check_ids)
-            }
-            
-            # Calculate sums by expeditor
-            for check_id, expeditor_name in expeditor_check_ids:
-                if expeditor_name not in expeditor_sums:
-                    expeditor_sums[expeditor_name] = 0
-                expeditor_sums[expeditor_name] += check_details.get(check_id, 0)
-            
-            # Add total sum to each expeditor
-            for exp_stat in top_expeditors:
-                exp_stat['total_sum'] = expeditor_sums.get(exp_stat['ekispiditor'], 0) or 0
-        
-        # Optimized top projects query
-        top_projects = list(
-            checks_qs.values('project')
-            .annotate(check_count=Count('id'))
-            .order_by('-check_count')[:5]
-        )
-        
-        # Optimized: Get all project sums using bulk queries
-        if top_projects:
-            project_names = [proj['project'] for proj in top_projects]
-            project_sums = {}
-            
-            # Get all check IDs for these projects
-            project_check_ids = list(
-                checks_qs.filter(project__in=project_names)
-                .values_list('check_id', 'project')
-            )
-            
-            # Get all check details in one query
-            check_ids = [check_id for check_id, _ in project_check_ids]
-            check_details = {
-                detail.check_id: detail.total_sum or 0 
-                for detail in CheckDetail.objects.filter(check_id__in=check_ids)
-            }
-            
-            # Calculate sums by project
-            for check_id, project_name in project_check_ids:
-                if project_name not in project_sums:
-                    project_sums[project_name] = 0
-                project_sums[project_name] += check_details.get(check_id, 0)
-            
-            # Add total sum to each project
-            for proj_stat in top_projects:
-                proj_stat['total_sum'] = project_sums.get(proj_stat['project'], 0) or 0
-        
-        # Optimized top cities query
-        top_cities = list(
-            checks_qs.values('city')
-            .annotate(check_count=Count('id'))
-            .order_by('-check_count')[:5]
-        )
-        
-        # Optimized: Get all city sums using bulk queries
-        if top_cities:
-            city_names = [city['city'] for city in top_cities]
-            city_sums = {}
-            
-            # Get all check IDs for these cities
-            city_check_ids = list(
-                checks_qs.filter(city__in=city_names)
-                .values_list('check_id', 'city')
-            )
-            
-            # Get all check details in one query
-            check_ids = [check_id for check_id, _ in city_check_ids]
-            check_details = {
-                detail.check_id: detail.total_sum or 0 
-                for detail in CheckDetail.objects.filter(check_id__in=check_ids)
-            }
-            
-            # Calculate sums by city
-            for check_id, city_name in city_check_ids:
-                if city_name not in city_sums:
-                    city_sums[city_name] = 0
-                city_sums[city_name] += check_details.get(check_id, 0)
-            
-            # Add total sum to each city
-            for city_stat in top_cities:
-                city_stat['total_sum'] = city_sums.get(city_stat['city'], 0) or 0
+        # Top dimensions, grouped on the integer foreign keys
+        if project or sklad or city or status or not kpis_backfilled():
+            top_expeditors = self._top_by_dimension(checks_qs, 'ekispiditor', detail_model, with_success=True)
+        else:
+            # Only a date range / expeditor filter: read the daily KPI rows
+            top_expeditors = expeditor_leaderboard(kpi_date_from, kpi_date_to, ekispiditor_id)
+        top_projects = self._top_by_dimension(checks_qs, 'project', detail_model)
+        top_cities = self._top_by_dimension(checks_qs, 'city', detail_model)
         
         # Daily statistics - optimized for date range
         if date_from and date_to:
@@ -528,11 +440,7 @@ class StatisticsView(APIView):
             end_date = today
         
         # Top warehouses (sklads)
-        top_sklads = list(
-            checks_qs.values('sklad')
-            .annotate(check_count=Count('id'))
-            .order_by('-check_count')[:5]
-        )
+        top_sklads = self._top_by_dimension(checks_qs, 'sklad', detail_model, with_sum=False)
 
         # Hourly distribution
         hourly_data = (
@@ -559,8 +467,8 @@ class StatisticsView(APIView):
         # Get daily stats using TruncDate for portability
         daily_data = (
             checks_qs.filter(
-                yetkazilgan_vaqti__date__gte=start_date,
-                yetkazilgan_vaqti__date__lte=end_date
+                yetkazilgan_vaqti__gte=local_day_bounds(start_date)[0],
+                yetkazilgan_vaqti__lt=local_day_bounds(end_date)[1]
             )
             .annotate(day=TruncDate('yetkazilgan_vaqti'))
             .values('day')
@@ -599,8 +507,42 @@ class StatisticsView(APIView):
             'dow_stats': dow_counts,
         }
 
+    def _top_by_dimension(self, checks_qs, dimension, detail_model=CheckDetail, with_success=False, with_sum=True):
+        """Top 5 values of a dimension by check count, keyed by dimension name."""
+        ref_id = f'{DIMENSIONS[dimension][1]}_id'
+        annotations = {'check_count': Count('id')}
+        if with_success:
+            annotations['success_count'] = Count('id', filter=Q(status='delivered'))
+        rows = list(
+            checks_qs.values(ref_id)
+            .annotate(**annotations)
+            .order_by('-check_count')[:5]
+        )
+        ids = [row[ref_id] for row in rows]
+        names = dimension_names(dimension, ids)
+        
+        sums = {}
+        if with_sum and rows:
+            # Sum check detail totals for these dimension values in bulk
+            check_refs = list(checks_qs.filter(**{f'{ref_id}__in': ids}).values_list('check_id', ref_id))
+            totals = dict(
+                detail_model.objects.filter(check_id__in=[check_id for check_id, _ in check_refs])
+                .values_list('check_id', 'total_sum')
+            )
+            for check_id, dimension_id in check_refs:
+                sums[dimension_id] = sums.get(dimension_id, 0) + (totals.get(check_id) or 0)
+        
+        result = []
+        for row in rows:
+            item = {dimension: names.get(row[ref_id])}
+            item.update((key, row[key]) for key in annotations)
+            if with_sum:
+                item['total_sum'] = sums.get(row[ref_id], 0) or 0
+            result.append(item)
+        return result
+
 
-class GlobalStatisticsView(APIView):
+class GlobalStatisticsView(ReplicaReadMixin, APIView):
     def get(self, request):
         # Reuse StatisticsView logic without ekispiditor filter
         request.GET._mutable = True  # type: ignore
@@ -610,7 +552,7 @@ class GlobalStatisticsView(APIView):
         return StatisticsView().get(request)
 
 
-class AnalyticsSummaryView(APIView):
+class AnalyticsSummaryView(ReplicaReadMixin, APIView):
     """Dimension-based aggregates for analytics page.
 
     Supports grouping by project/sklad/city/ekispiditor/date with
@@ -642,11 +584,11 @@ class AnalyticsSummaryView(APIView):
             except ValueError:
                 pass
         if project:
-            checks_qs = checks_qs.filter(project__icontains=project)
+            checks_qs = filter_by_dimension_name(checks_qs, 'project', project)
         if sklad:
-            checks_qs = checks_qs.filter(sklad__icontains=sklad)
+            checks_qs = filter_by_dimension_name(checks_qs, 'sklad', sklad)
         if city:
-            checks_qs = checks_qs.filter(city__icontains=city)
+            checks_qs = filter_by_dimension_name(checks_qs, 'city', city)
         if status:
             checks_qs = checks_qs.filter(status=status)
 
@@ -715,49 +657,54 @@ class AnalyticsSummaryView(APIView):
         return Response({'group_by': group_by, 'items': items})
 
 
+def telegram_target_payload():
+    """Preferred Telegram deep-link based on the latest active TelegramAccount."""
+    account = TelegramAccount.objects.filter(is_active=True).order_by('-updated_at', '-id').first()
+    if not account:
+        return { 
+            'url': None, 
+            'error': 'No active Telegram account found. Please configure a Telegram account in Django admin panel.',
+            'display_name': None,
+            'username': None,
+            'phone_number': None
+        }
+
+    url = None
+    if account.username:
+        # Remove @ if present
+        username = account.username.lstrip('@')
+        url = f"https://t.me/{username}"
+    elif account.phone_number:
+        # tg://resolve?phone=... works in some clients; https form is more universal via share
+        phone = account.phone_number.lstrip('+')
+        url = f"https://t.me/+{phone}"
+    else:
+        return {
+            'url': None,
+            'error': 'Telegram account found but no username or phone number configured. Please set username or phone number in Django admin.',
+            'display_name': account.display_name,
+            'username': account.username,
+            'phone_number': account.phone_number
+        }
+
+    return {
+        'url': url, 
+        'display_name': account.display_name, 
+        'username': account.username, 
+        'phone_number': account.phone_number,
+        'error': None
+    }
+
+
 class TelegramTargetView(APIView):
     """Returns preferred Telegram deep-link based on active TelegramAccount."""
     permission_classes = [AllowAny]
     
     def get(self, request):
-        account = TelegramAccount.objects.filter(is_active=True).order_by('-updated_at', '-id').first()
-        if not account:
-            return Response({ 
-                'url': None, 
-                'error': 'No active Telegram account found. Please configure a Telegram account in Django admin panel.',
-                'display_name': None,
-                'username': None,
-                'phone_number': None
-            }, status=200)
+        return Response(telegram_target_payload(), status=200)
 
-        url = None
-        if account.username:
-            # Remove @ if present
-            username = account.username.lstrip('@')
-            url = f"https://t.me/{username}"
-        elif account.phone_number:
-            # tg://resolve?phone=... works in some clients; https form is more universal via share
-            phone = account.phone_number.lstrip('+')
-            url = f"https://t.me/+{phone}"
-        else:
-            return Response({
-                'url': None,
-                'error': 'Telegram account found but no username or phone number configured. Please set username or phone number in Django admin.',
-                'display_name': account.display_name,
-                'username': account.username,
-                'phone_number': account.phone_number
-            }, status=200)
 
-        return Response({
-            'url': url, 
-            'display_name': account.display_name, 
-            'username': account.username, 
-            'phone_number': account.phone_number,
-            'error': None
-        })
-
-
-class ViolationAnalyticsDashboardView(APIView):
+class ViolationAnalyticsDashboardView(ReplicaReadMixin, APIView):
     """
     Comprehensive analytics dashboard for violation patterns.
     Provides all statistics that update based on filters.
@@ -864,8 +811,10 @@ class ViolationAnalyticsDashboardView(APIView):
         # === 3. GEOGRAPHIC DISTRIBUTION ===
         # Get all check locations from analytics
         location_data = []
-        for analytics in analytics_qs[:100]:  # Limit to prevent overload
-            check_locs = analytics.get_check_locations()  # ✅ Method call
+        recent_analytics = list(analytics_qs[:100])  # Limit to prevent overload
+        locations_by_analytics = CheckAnalytics.check_locations_for(recent_analytics)
+        for analytics in recent_analytics:
+            check_locs = locations_by_analytics[analytics.pk]
             if check_locs:
                 for loc in check_locs:
                     location_data.append({
@@ -1013,7 +962,7 @@ class ViolationAnalyticsDashboardView(APIView):
         return Response(response_data)
 
 
-class ViolationDetailView(APIView):
+class ViolationDetailView(ReplicaReadMixin, APIView):
     """
     Get detailed violation information for a specific expeditor.
     Returns all violation instances and their check locations.
@@ -1095,9 +1044,10 @@ class ViolationDetailView(APIView):
             ):
                 dedup_map[key] = item
 
+        locations_by_analytics = CheckAnalytics.check_locations_for(dedup_map.values())
         for analytics in dedup_map.values():
             # Get check locations for this violation
-            check_locations = analytics.get_check_locations()
+            check_locations = locations_by_analytics[analytics.pk]
             
             violation_data = {
                 'id': analytics.id,
@@ -1151,7 +1101,7 @@ class ViolationDetailView(APIView):
         return Response(response_data)
 
 
-class ViolationChecksListView(APIView):
+class ViolationChecksListView(ReplicaReadMixin, APIView):
     """
     Get paginated list of all checks that are part of violations (3+ checks).
     """
@@ -1214,15 +1164,10 @@ class ViolationChecksListView(APIView):
             except ValueError:
                 pass
         
-        # Collect all check IDs from violations
-        all_check_ids = []
-        for analytics in analytics_qs:
-            if analytics.check_ids:
-                all_check_ids.extend(analytics.check_ids)
-        
-        # Remove duplicates and get Check objects
-        unique_check_ids = list(set(all_check_ids))
-        checks_qs = Check.objects.filter(check_id__in=unique_check_ids).order_by('-yetkazilgan_vaqti')
+        # Checks that belong to any of the violations (semi-join on the membership table)
+        checks_qs = Check.objects.filter(
+            Exists(CheckAnalyticsMember.objects.filter(check_ref=OuterRef('pk'), analytics__in=analytics_qs))
+        ).order_by('-yetkazilgan_vaqti', '-id')
         
         # Calculate total
         total_checks = checks_qs.count()
@@ -1231,15 +1176,19 @@ class ViolationChecksListView(APIView):
         # Pagination
         start = (page - 1) * page_size
         end = start + page_size
-        checks = checks_qs[start:end]
+        checks = list(checks_qs[start:end])
+        details = {
+            detail.check_id: detail
+            for detail in CheckDetail.objects.filter(check_id__in=[check.check_id for check in checks])
+        }
         
         # Serialize checks
         checks_data = []
         for check in checks:
             # Get check detail
             check_detail = None
-            try:
-                detail = CheckDetail.objects.get(check_id=check.check_id)
+            detail = details.get(check.check_id)
+            if detail is not None:
                 check_detail = {
                     'total_sum': float(detail.total_sum) if detail.total_sum else 0,
                     'nalichniy': float(detail.nalichniy) if detail.nalichniy else 0,
@@ -1247,8 +1196,6 @@ class ViolationChecksListView(APIView):
                     'humo': float(detail.humo) if detail.humo else 0,
                     'click': float(detail.click) if detail.click else 0,
                 }
-            except CheckDetail.DoesNotExist:
-                pass
             
             checks_data.append({
                 'id': check.id,
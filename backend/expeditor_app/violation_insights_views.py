@@ -7,13 +7,14 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.db.models import Count, Sum, Avg, Q, Max, Min
-from django.db.models.functions import TruncHour, TruncDate, ExtractWeekDay
+from django.db.models.functions import TruncHour, TruncDate, ExtractHour, ExtractWeekDay
 from datetime import datetime
 
 from .models import CheckAnalytics
+from .db_router import ReplicaReadMixin
 
 
-class ViolationInsightsView(APIView):
+class ViolationInsightsView(ReplicaReadMixin, APIView):
     """
     Enhanced violation insights: detailed patterns, timeline analysis,
     and expeditor behavior tracking for fraud detection.
@@ -59,38 +60,28 @@ class ViolationInsightsView(APIView):
         
         # === PATTERN ANALYSIS ===
         # Suspicious patterns: multiple checks in <100m within 5-10 minutes
-        suspicious_pattern_qs = analytics_qs.filter(
-            radius_meters__lte=100,
-            window_duration_minutes__lte=10,
-            total_checks__gte=5
-        )
+        suspicious_q = Q(radius_meters__lte=100, window_duration_minutes__lte=10, total_checks__gte=5)
+        suspicious_pattern_qs = analytics_qs.filter(suspicious_q)
+        # Same, without the minimum check count (hourly and daily breakdowns)
+        tight_window_q = Q(radius_meters__lte=100, window_duration_minutes__lte=10)
         
         # === EXPEDITOR RANKING BY SEVERITY ===
+        # The filtered counts come first: after the total_checks Sum below,
+        # total_checks in suspicious_q would refer to the aggregate
         expeditor_insights = analytics_qs.values('most_active_expiditor').annotate(
+            suspicious_count=Count('id', filter=suspicious_q),
+            critical_count=Count('id', filter=Q(radius_meters__gte=1000)),
+            warning_count=Count('id', filter=Q(radius_meters__gte=500, radius_meters__lt=1000)),
+            same_location_count=Count('id', filter=Q(violation_type=CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION)),
+        ).annotate(
             total_violations=Count('id'),
             total_checks=Sum('total_checks'),
             avg_radius=Avg('radius_meters'),
             min_radius=Min('radius_meters'),
             max_radius=Max('radius_meters'),
-            last_violation=Max('window_start')
+            last_violation=Max('window_start'),
         ).order_by('-total_violations')[:50]
-        
-        # Calculate suspicious/critical/warning counts separately (PostgreSQL FILTER limitation workaround)
         expeditor_insights_list = list(expeditor_insights)
-        for exp in expeditor_insights_list:
-            exp_name = exp['most_active_expiditor']
-            exp_qs = analytics_qs.filter(most_active_expiditor=exp_name)
-            
-            exp['suspicious_count'] = exp_qs.filter(
-                radius_meters__lte=100,
-                window_duration_minutes__lte=10,
-                total_checks__gte=5
-            ).count()
-            exp['critical_count'] = exp_qs.filter(radius_meters__gte=1000).count()
-            exp['warning_count'] = exp_qs.filter(radius_meters__gte=500, radius_meters__lt=1000).count()
-            
-            # Add same location violations count
-            exp['same_location_count'] = exp_qs.filter(violation_type=CheckAnalytics.VIOLATION_TYPE_SAME_LOCATION).count()
         
         # Re-sort by suspicious count
         expeditor_insights = sorted(expeditor_insights_list, key=lambda x: (-x['suspicious_count'], -x['total_violations']))
@@ -136,15 +127,18 @@ class ViolationInsightsView(APIView):
             avg_checks=Avg('total_checks')
         ).order_by('hour')[:24]
         
-        # Add suspicious count separately
+        # Suspicious count by hour of day, in one grouped query
+        suspicious_by_hour = dict(
+            analytics_qs.filter(tight_window_q)
+            .annotate(hour_of_day=ExtractHour('window_start'))
+            .values('hour_of_day')
+            .annotate(count=Count('id'))
+            .values_list('hour_of_day', 'count')
+        )
         hourly_pattern_list = list(hourly_pattern)
         for hour_data in hourly_pattern_list:
             hour_val = hour_data['hour']
-            hour_data['suspicious'] = analytics_qs.filter(
-                window_start__hour=hour_val.hour if hour_val else 0,
-                radius_meters__lte=100,
-                window_duration_minutes__lte=10
-            ).count()
+            hour_data['suspicious'] = suspicious_by_hour.get(hour_val.hour if hour_val else 0, 0)
         
         # === LOCATION CLUSTERING ===
         # Find locations where multiple violations occurred
@@ -188,18 +182,10 @@ class ViolationInsightsView(APIView):
             weekday=ExtractWeekDay('window_start')
         ).values('date', 'weekday').annotate(
             violations=Count('id'),
-            checks=Sum('total_checks')
+            checks=Sum('total_checks'),
+            suspicious=Count('id', filter=tight_window_q),
         ).order_by('-date')[:30]
-        
-        # Add suspicious count separately
         daily_heatmap_list = list(daily_heatmap)
-        for day_data in daily_heatmap_list:
-            date_val = day_data['date']
-            day_data['suspicious'] = analytics_qs.filter(
-                window_start__date=date_val,
-                radius_meters__lte=100,
-                window_duration_minutes__lte=10
-            ).count()
         
         response_data = {
             'overview': {
@@ -222,7 +208,7 @@ class ViolationInsightsView(APIView):
         return Response(response_data)
 
 
-class SameLocationViolationsView(APIView):
+class SameLocationViolationsView(ReplicaReadMixin, APIView):
     """
     Dedicated view for same location violations.
     Shows expeditors who issued multiple checks from the same location on the same day.
@@ -4,6 +4,7 @@ Django settings for expeditor_backend project.
 
 from pathlib import Path
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -60,6 +61,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -68,6 +70,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'expeditor_app.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -76,6 +79,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     # 'django.middleware.clickjacking.XFrameOptionsMiddleware',  # Keep disabled to avoid X-Frame-Options: DENY
+    'expeditor_app.middleware.ProfilerMiddleware',
     'expeditor_app.middleware.UserTrackingMiddleware',
     'expeditor_app.middleware.MapInteractionMiddleware',
 ]
@@ -112,6 +116,33 @@ DATABASES = {
     }
 }
 
+# Optional read replica for the analytics views (see expeditor_app.db_router)
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DB_REPLICA_HOST'),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['expeditor_app.db_router.ReplicaRouter']
+
+# Analytics views read from the primary while the replica lags more than this
+DB_REPLICA_MAX_LAG_SECONDS = int(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', 30))
+
+# gthread threads per gunicorn worker; gunicorn.conf.py reads the same
+# variable. Every Server-Sent Events stream holds one of them, so a worker
+# keeps EVENT_API_THREADS for the API and serves the rest as streams;
+# clients beyond that are told to poll (see expeditor_app.event_views)
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 64))
+EVENT_API_THREADS = int(os.environ.get('EVENT_API_THREADS', 16))
+EVENT_STREAMS_PER_WORKER = int(
+    os.environ.get('EVENT_STREAMS_PER_WORKER', max(GUNICORN_THREADS - EVENT_API_THREADS, 0))
+)
+
 # SQLite configuration (commented out)
 # if os.environ.get('DB_ENGINE', 'sqlite') == 'postgres':
 #     DATABASES = {
@@ -211,7 +242,8 @@ CORS_ALLOWED_HEADERS = [
 # Cache configuration
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # LocMemCache counting hits/misses for /api/metrics/
+        'BACKEND': 'expeditor_app.metrics.InstrumentedLocMemCache',
         'LOCATION': 'unique-snowflake',
         'TIMEOUT': 300,  # 5 minutes default
         'OPTIONS': {
@@ -220,6 +252,22 @@ CACHES = {
     }
 }
 
+# Request metrics (expeditor_app.metrics): per-worker snapshots are
+# written to METRICS_DIR; /api/metrics/ is served to METRICS_TOKEN bearers
+# and staff users, to anyone only with METRICS_PUBLIC (e.g. an internal
+# network)
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'expeditor-metrics'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'False') == 'True'
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+
+# On-demand profiling (expeditor_app.profiling), off unless PROFILER_ENABLED
+# is set: superusers add ?_profile=1; reports are written to PROFILE_DIR and
+# served at /api/admin/profiles/
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'False') == 'True'
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'expeditor-profiles'))
+CORS_EXPOSE_HEADERS = ['X-Profile-Id', 'X-Profile-Url', 'X-Profile-Skipped']
+
 # settings.py
 LAST_UPDATE_DATE_PATH = BASE_DIR / 'last_update.txt'
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 7000
@@ -247,3 +295,7 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
 }
+
+# Checks older than this many months are moved to the archive schema by
+# the ARCHIVE_CHECKS task / archive_old_checks command
+CHECK_ARCHIVE_AFTER_MONTHS = int(os.environ.get('CHECK_ARCHIVE_AFTER_MONTHS', 12))
@@ -0,0 +1,21 @@
+"""
+Settings for running tests against two local PostgreSQL databases.
+
+`replica` points at a second local database and mirrors `default` in
+tests, so code paths that read through expeditor_app.db_router run
+exactly as in production with a replica configured:
+
+    DJANGO_SETTINGS_MODULE=expeditor_backend.test_settings python manage.py test
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES['default'].update({
+    'NAME': os.environ.get('DB_NAME', 'expiditor-tracker-test'),
+    'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+})
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.environ.get('DB_REPLICA_NAME', 'expiditor-tracker-test-replica'),
+    'TEST': {'MIRROR': 'default'},
+}
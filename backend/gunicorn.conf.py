@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration, read from the backend directory:
+
+    gunicorn -c gunicorn.conf.py expeditor_backend.wsgi:application
+
+Workers are gthread. A request holds one thread until it is done, and a
+Server-Sent Events stream (/api/events/) holds one for up to
+MAX_STREAM_SECONDS (10 minutes) before the browser reconnects. Each
+worker keeps EVENT_API_THREADS (default 16) threads for the API and
+serves up to GUNICORN_THREADS - EVENT_API_THREADS streams
+(settings.EVENT_STREAMS_PER_WORKER). With the defaults that is
+3 workers x 48 = 144 live dashboards; further clients get a `fallback`
+event and poll until a stream frees up. Raise GUNICORN_THREADS (or
+GUNICORN_WORKERS) for a larger audience. Streams do not hold database
+connections, so this does not raise the number of connections needed.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:7896')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+worker_class = 'gthread'
+# Keep in step with settings.GUNICORN_THREADS, which reads the same variable
+threads = int(os.environ.get('GUNICORN_THREADS', 64))
+timeout = 120
+keepalive = 2
+max_requests = 1000
+max_requests_jitter = 50
@@ -87,8 +87,7 @@ print_step "Step 4: Starting Gunicorn (Backend)..."
 cd "$BACKEND_DIR"
 source venv/bin/activate
 nohup gunicorn expeditor_backend.wsgi:application \
-    --bind 0.0.0.0:7896 \
-    --workers 4 \
+    -c gunicorn.conf.py \
     --timeout 300 \
     --access-logfile gunicorn-access.log \
     --error-logfile gunicorn-error.log \
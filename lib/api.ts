@@ -571,3 +571,137 @@ export async function getManagerReport(params: {
 }
 
 export const analytics = { getAnalyticsSummary, getTelegramTarget, getManagerReport }
+
+// --- Delta sync ---
+
+export interface CheckSyncPage {
+  checks: any[]
+  check_details: any[]
+  tombstones: { model: 'check' | 'check_detail'; id: number; check_id: string }[]
+  cursor: string
+  has_more: boolean
+}
+
+// Fetch only checks/details changed since the cursor returned by the previous call.
+// Pass no cursor for the initial load; keep calling while `has_more` is true.
+export async function getChecksSince(cursor?: string | null, limit?: number): Promise<CheckSyncPage | null> {
+  const search = new URLSearchParams()
+  if (cursor) search.set('cursor', cursor)
+  if (limit) search.set('limit', limit.toString())
+  return apiRequestSafe<CheckSyncPage>(`/check/sync/?${search.toString()}`)
+}
+
+// --- Push events (Server-Sent Events) ---
+
+export type EventChannel = 'checks' | 'tasks'
+
+export interface EventFallback {
+  mode: 'poll'
+  poll_seconds: number
+  retry_seconds: number
+}
+
+// Subscribe to import-batch and task-progress events instead of polling.
+// EventSource cannot send headers, so the auth token goes in the query string.
+// When the server is at its stream limit it sends a `fallback` event instead:
+// the stream is closed, `onPoll` runs every `poll_seconds` (fetch /check/sync/
+// or /task-runs/running/ there) and the stream is tried again after
+// `retry_seconds`. Returns a function that closes the stream.
+export function subscribeToEvents(
+  channels: EventChannel[],
+  handlers: Partial<Record<'checks.batch' | 'task_run.progress', (data: any) => void>>,
+  onPoll?: () => void,
+): () => void {
+  if (typeof window === 'undefined' || typeof EventSource === 'undefined') {
+    return () => {}
+  }
+  let source: EventSource | null = null
+  let pollTimer: ReturnType<typeof setInterval> | null = null
+  let retryTimer: ReturnType<typeof setTimeout> | null = null
+  let closed = false
+
+  const connect = () => {
+    const search = new URLSearchParams()
+    search.set('channels', channels.join(','))
+    const token = getAuthToken()
+    if (token) search.set('token', token)
+
+    source = new EventSource(`${API_BASE_URL}/events/?${search.toString()}`)
+    for (const [eventType, handler] of Object.entries(handlers)) {
+      if (!handler) continue
+      source.addEventListener(eventType, (event) => {
+        try {
+          handler(JSON.parse((event as MessageEvent).data))
+        } catch (err) {
+          console.error(`Failed to handle ${eventType} event:`, err)
+        }
+      })
+    }
+    source.addEventListener('fallback', (event) => {
+      source?.close()
+      let fallback: EventFallback = { mode: 'poll', poll_seconds: 30, retry_seconds: 120 }
+      try {
+        fallback = JSON.parse((event as MessageEvent).data)
+      } catch (err) {
+        console.error('Failed to parse fallback event:', err)
+      }
+      if (onPoll) {
+        onPoll()
+        pollTimer = setInterval(onPoll, fallback.poll_seconds * 1000)
+      }
+      retryTimer = setTimeout(() => {
+        if (pollTimer) clearInterval(pollTimer)
+        pollTimer = null
+        if (!closed) connect()
+      }, fallback.retry_seconds * 1000)
+    })
+  }
+
+  connect()
+  return () => {
+    closed = true
+    source?.close()
+    if (pollTimer) clearInterval(pollTimer)
+    if (retryTimer) clearTimeout(retryTimer)
+  }
+}
+
+// --- Bootstrap (all reference data in one request) ---
+
+export type BootstrapSectionName = 'projects' | 'sklads' | 'cities' | 'filials' | 'expeditors' | 'telegram'
+
+export interface BootstrapSection {
+  version: string
+  data?: any
+  unchanged?: boolean
+}
+
+export interface BootstrapResponse {
+  version: string
+  sections: Partial<Record<BootstrapSectionName, BootstrapSection>>
+}
+
+// Sections from previous calls; their versions are sent back so the server
+// only returns sections that changed since.
+const bootstrapSections: Partial<Record<BootstrapSectionName, BootstrapSection>> = {}
+
+export async function getBootstrap(): Promise<Partial<Record<BootstrapSectionName, any>> | null> {
+  const known = Object.entries(bootstrapSections)
+    .map(([name, section]) => `${name}:${section!.version}`)
+    .join(',')
+  const endpoint = known ? `/bootstrap/?known=${encodeURIComponent(known)}` : "/bootstrap/"
+  const data = await apiRequestSafe<BootstrapResponse>(endpoint)
+  if (!data) return null
+
+  const result: Partial<Record<BootstrapSectionName, any>> = {}
+  for (const [name, section] of Object.entries(data.sections) as [BootstrapSectionName, BootstrapSection][]) {
+    if (!section.unchanged) {
+      bootstrapSections[name] = section
+    }
+    result[name] = bootstrapSections[name]?.data
+  }
+  if (result.expeditors) {
+    result.expeditors = result.expeditors.map(transformExpeditor)
+  }
+  return result
+}
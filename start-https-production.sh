@@ -21,7 +21,7 @@ source venv/bin/activate
 python3 manage.py collectstatic --noinput
 
 # Start Gunicorn in the background on port 7896
-gunicorn --bind 0.0.0.0:7896 --workers 3 --timeout 120 --keep-alive 2 --max-requests 1000 --max-requests-jitter 50 expeditor_backend.wsgi &
+gunicorn -c gunicorn.conf.py expeditor_backend.wsgi &
 echo "✅ Django backend started on port 7896."
 
 # Frontend setup and start
@@ -98,13 +98,9 @@ fi
 
 # Start Gunicorn in background
 echo -e "${GREEN}🚀 Starting Gunicorn on port 7896...${NC}"
+# Workers, threads and Server-Sent Events capacity: see gunicorn.conf.py
 nohup gunicorn \
-    --bind 0.0.0.0:7896 \
-    --workers 3 \
-    --timeout 120 \
-    --keep-alive 2 \
-    --max-requests 1000 \
-    --max-requests-jitter 50 \
+    -c gunicorn.conf.py \
     --access-logfile - \
     --error-logfile - \
     expeditor_backend.wsgi > gunicorn.log 2>&1 &